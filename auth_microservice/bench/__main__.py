@@ -0,0 +1,33 @@
+import argparse
+from typing import Optional
+
+from . import (
+    auth_latency,
+    authorization,
+    client_verify,
+    hashing,
+    jwt_codec,
+    verify,
+)
+
+BENCHMARKS = {
+    "auth_latency": auth_latency,
+    "authorization": authorization,
+    "client_verify": client_verify,
+    "hashing": hashing,
+    "jwt_codec": jwt_codec,
+    "verify": verify,
+}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m auth_microservice.bench")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    for name, module in BENCHMARKS.items():
+        module.add_arguments(subparsers.add_parser(name, help=module.__doc__))
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.benchmark].run(args)
+
+
+if __name__ == "__main__":
+    main()
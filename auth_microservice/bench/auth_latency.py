@@ -0,0 +1,120 @@
+"""/auth latency with and without a concurrent login flood."""
+
+import argparse
+import asyncio
+import secrets
+import time
+
+import httpx
+
+from ..src.password_utils import generate_code_challenge
+from .common import bench_clients, format_latencies
+
+PASSWORD = "benchBENCH123"
+
+
+async def register(client: httpx.AsyncClient, username: str) -> None:
+    response = await client.post(
+        "/register", json={"username": username, "password": PASSWORD}
+    )
+    response.raise_for_status()
+
+
+async def probe_auth(
+    client: httpx.AsyncClient,
+    code_verifier: str,
+    requests: int,
+    latencies: list[float],
+) -> None:
+    async with client:
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.post(
+                "/auth/auth", json={"code_verifier": code_verifier}
+            )
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+
+async def login_flood(
+    client: httpx.AsyncClient, username: str, stop: asyncio.Event
+) -> int:
+    logins = 0
+    credentials = {"username": username, "password": PASSWORD}
+    async with client:
+        while not stop.is_set():
+            client.cookies.clear()
+            await client.post("/login", json=credentials)
+            logins += 1
+    return logins
+
+
+async def measure(
+    args: argparse.Namespace, with_flood: bool
+) -> tuple[list[float], int]:
+    async with bench_clients(args.base_url) as new_client:
+        flood_user = f"flood_{secrets.token_hex(4)}"
+        async with new_client() as client:
+            await register(client, flood_user)
+        async with new_client() as client:
+            await register(client, f"probe_{secrets.token_hex(4)}")
+            code_verifier = secrets.token_urlsafe(32)
+            response = await client.post(
+                "/auth/auth",
+                json={
+                    "code_challenge": generate_code_challenge(code_verifier),
+                    "code_challenge_method": "S256",
+                },
+            )
+            response.raise_for_status()
+            probe_cookies = httpx.Cookies(client.cookies)
+
+        stop = asyncio.Event()
+        flooders = [
+            asyncio.create_task(login_flood(new_client(), flood_user, stop))
+            for _ in range(args.flood_concurrency if with_flood else 0)
+        ]
+        await asyncio.sleep(0)
+        latencies: list[float] = []
+        await asyncio.gather(
+            *(
+                probe_auth(
+                    new_client(cookies=probe_cookies),
+                    code_verifier,
+                    args.requests,
+                    latencies,
+                )
+                for _ in range(args.concurrency)
+            )
+        )
+        stop.set()
+        logins = sum(await asyncio.gather(*flooders))
+        return latencies, logins
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="benchmark a running service instead of the in-process app",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=200, help="/auth calls per probe"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="concurrent /auth probes"
+    )
+    parser.add_argument(
+        "--flood-concurrency",
+        type=int,
+        default=16,
+        help="concurrent /login clients during the flood phase",
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    idle, _ = asyncio.run(measure(args, with_flood=False))
+    print(format_latencies("/auth idle", idle))
+    flooded, logins = asyncio.run(measure(args, with_flood=True))
+    print(format_latencies("/auth under login flood", flooded))
+    print(f"{'logins during flood':<28} {logins}")
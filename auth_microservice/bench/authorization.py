@@ -0,0 +1,107 @@
+"""Authorization decisions per second: the precompiled policy table on the
+token's ``perm`` claim against a per-request roles join in sqlite.
+"""
+
+import argparse
+import sqlite3
+from typing import Any, Coroutine
+
+from starlette.requests import Request
+
+from ..src.dependencies.auth_dependency import require
+from ..src.permissions import ROLE_PERMISSIONS, Permission, policies
+from ..src.principal import ACCESS, Principal
+from .jwt_codec import ops_per_second
+
+USER_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+OTHER_ID = "6f0b2a51-4f39-4c31-9a35-3b0b9c1d2e10"
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Result of a coroutine that never suspends, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def roles_database(users: int) -> sqlite3.Connection:
+    """In-memory users, user_roles and role_permissions tables: the join
+    a per-request check would run, minus the network round trip.
+    """
+    db = sqlite3.connect(":memory:")
+    db.executescript(
+        """
+        CREATE TABLE user_roles (user_id TEXT, role TEXT,
+            PRIMARY KEY (user_id, role));
+        CREATE TABLE role_permissions (role TEXT, permission TEXT,
+            PRIMARY KEY (role, permission));
+        """
+    )
+    db.executemany(
+        "INSERT INTO role_permissions VALUES (?, ?)",
+        [
+            (role, permission.name)
+            for role, permissions in ROLE_PERMISSIONS.items()
+            for permission in Permission
+            if permissions & permission
+        ],
+    )
+    db.executemany(
+        "INSERT INTO user_roles VALUES (?, 'user')",
+        [(f"user-{i}",) for i in range(users)] + [(USER_ID,)],
+    )
+    return db
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=1.0,
+        help="time spent on every measurement",
+    )
+    parser.add_argument(
+        "--users", type=int, default=100000, help="rows of the roles join"
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    permissions = ROLE_PERMISSIONS["user"]
+    principal = Principal(USER_ID, ACCESS, 2**32, {}, permissions)
+    dependency = require("user:update", owner="user_id")
+    scope = {
+        "type": "http",
+        "path_params": {"user_id": USER_ID},
+        "state": {"principal": principal},
+    }
+    db = roles_database(args.users)
+    query = (
+        "SELECT 1 FROM user_roles JOIN role_permissions USING (role) "
+        "WHERE user_id = ? AND permission IN (?, ?) LIMIT 1"
+    )
+
+    def joined() -> None:
+        db.execute(
+            query, (USER_ID, "USER_UPDATE", "USER_UPDATE_OWN")
+        ).fetchone()
+
+    for name, func in (
+        (
+            "policy table (own)",
+            lambda: policies.allows(
+                "user:update", permissions, USER_ID, USER_ID
+            ),
+        ),
+        (
+            "policy table (other)",
+            lambda: policies.allows(
+                "user:update", permissions, USER_ID, OTHER_ID
+            ),
+        ),
+        ("require dependency", lambda: run_sync(dependency(Request(scope)))),
+        ("sqlite roles join", joined),
+    ):
+        rate = ops_per_second(func, args.seconds)
+        print(f"{name:<28} {rate:12.0f} decisions/s")
@@ -0,0 +1,117 @@
+"""Local verification with the client package against remote /auth calls."""
+
+import argparse
+import asyncio
+import secrets
+import time
+
+import httpx
+
+from ..client import TokenVerifier
+from ..src.password_utils import generate_code_challenge
+from ..src.routers.introspection_router import INTROSPECTION_TOKEN
+from ..src.signing_keys import ACCESS_SECRET_KEY, ALGORITHM
+from ..src.token_utils import ID_FIELD
+from .common import bench_clients, format_latencies
+from .jwt_codec import ops_per_second
+
+PASSWORD = "benchBENCH123"
+
+
+async def remote_latencies(
+    client: httpx.AsyncClient, method: str, path: str, json: object, n: int
+) -> list[float]:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = await client.request(method, path, json=json)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+
+async def measure(args: argparse.Namespace) -> None:
+    async with bench_clients(args.base_url) as new_client:
+        async with new_client() as client:
+            response = await client.post(
+                "/register",
+                json={
+                    "username": f"client_{secrets.token_hex(4)}",
+                    "password": PASSWORD,
+                },
+            )
+            response.raise_for_status()
+            code_verifier = secrets.token_urlsafe(32)
+            response = await client.post(
+                "/auth/auth",
+                json={
+                    "code_challenge": generate_code_challenge(code_verifier),
+                    "code_challenge_method": "S256",
+                },
+            )
+            response.raise_for_status()
+            token = client.cookies["access_token"]
+            verifier = TokenVerifier(
+                str(client.base_url),
+                secret=(
+                    ACCESS_SECRET_KEY if ALGORITHM.startswith("HS") else None
+                ),
+                algorithm=ALGORITHM,
+                id_field=ID_FIELD,
+                http_client=client,
+                client_token=INTROSPECTION_TOKEN or None,
+            )
+            if verifier.secret is None:
+                await verifier.refresh_keys()
+            await verifier.refresh_revocations()
+            for name, path, method, body in (
+                (
+                    "remote /auth",
+                    "/auth/auth",
+                    "POST",
+                    {"code_verifier": code_verifier},
+                ),
+                ("remote /auth/verify", "/auth/verify", "GET", None),
+            ):
+                latencies = await remote_latencies(
+                    client, method, path, body, args.requests
+                )
+                print(format_latencies(name, latencies))
+                print(
+                    f"{'':<28} {len(latencies) / sum(latencies):10.0f} req/s"
+                )
+
+    def cold() -> None:
+        verifier.verified.clear()
+        verifier.verify(token)
+
+    assert verifier.verify(token) is not None
+    for name, func in (
+        ("local verify (cached)", lambda: verifier.verify(token)),
+        ("local verify (uncached)", cold),
+    ):
+        print(f"{name:<28} {ops_per_second(func, args.seconds):10.0f} ops/s")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help=(
+            "benchmark a running service instead of the in-process app, "
+            "its keys must match this environment"
+        ),
+    )
+    parser.add_argument(
+        "--requests", type=int, default=500, help="sequential remote calls"
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=1.0,
+        help="time spent on every local measurement",
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    asyncio.run(measure(args))
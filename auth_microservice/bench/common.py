@@ -0,0 +1,76 @@
+import statistics
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Callable, Optional, Sequence
+
+import httpx
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def format_latencies(name: str, latencies: Sequence[float]) -> str:
+    ms = [value * 1000 for value in latencies]
+    return (
+        f"{name:<28} n={len(ms):<6} "
+        f"mean={statistics.fmean(ms) if ms else 0:8.2f}ms "
+        f"p50={percentile(ms, 50):8.2f}ms "
+        f"p99={percentile(ms, 99):8.2f}ms "
+        f"max={max(ms, default=0):8.2f}ms"
+    )
+
+
+ClientFactory = Callable[..., httpx.AsyncClient]
+
+
+@asynccontextmanager
+async def bench_clients(
+    base_url: Optional[str],
+) -> AsyncIterator[ClientFactory]:
+    """Yield a factory of clients for the live service at base_url or,
+    when it is not given, for the in-process app backed by an in-memory
+    sqlite database. Without an INTROSPECTION_TOKEN the in-process app
+    opens its client endpoints (/revoke/list, /events, /introspect).
+    """
+    if base_url:
+        yield lambda **kwargs: httpx.AsyncClient(base_url=base_url, **kwargs)
+        return
+
+    from ..src.connection import connect_db_data
+    from ..src.main import app
+    from ..src.models.dynamic_db_models import UserDBType
+    from ..src.routers import introspection_router
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(UserDBType.metadata.create_all)
+    session_factory = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[connect_db_data] = get_session
+    introspection_open = introspection_router.INTROSPECTION_OPEN
+    if not introspection_router.INTROSPECTION_TOKEN:
+        introspection_router.INTROSPECTION_OPEN = True
+    transport = httpx.ASGITransport(app=app)
+    try:
+        yield lambda **kwargs: httpx.AsyncClient(
+            transport=transport, base_url="http://bench", **kwargs
+        )
+    finally:
+        introspection_router.INTROSPECTION_OPEN = introspection_open
+        app.dependency_overrides.clear()
+        await engine.dispose()
@@ -0,0 +1,163 @@
+"""Password hashing cost, calibration and login capacity."""
+
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..src.password_utils import (
+    ARGON2ID,
+    HASH_PARAMS,
+    PBKDF2_SHA256,
+    SCRYPT,
+    HashParams,
+    hash_password,
+    hash_secret_raw,
+)
+
+PASSWORD = "benchBENCH123"
+COST_GRID = {
+    PBKDF2_SHA256: [{"i": i} for i in (10000, 100000, 300000, 600000)],
+    SCRYPT: [{"n": n, "r": 8, "p": 1} for n in (4096, 16384, 65536)],
+    ARGON2ID: [
+        {"m": m, "t": t, "p": 1}
+        for m, t in ((19456, 2), (65536, 2), (65536, 3), (262144, 3))
+    ],
+}
+ENV_NAMES = {
+    PBKDF2_SHA256: {"i": "PBKDF2_ITERATIONS"},
+    SCRYPT: {"n": "SCRYPT_N", "r": "SCRYPT_R", "p": "SCRYPT_P"},
+    ARGON2ID: {
+        "m": "ARGON2_MEMORY_COST",
+        "t": "ARGON2_TIME_COST",
+        "p": "ARGON2_PARALLELISM",
+    },
+}
+
+
+def seconds_per_hash(params: HashParams, repeat: int) -> float:
+    hash_password(PASSWORD, params)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hash_password(PASSWORD, params)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def hashes_per_second(params: HashParams, workers: int, total: int) -> float:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        list(
+            executor.map(
+                lambda _: hash_password(PASSWORD, params), range(total)
+            )
+        )
+        return total / (time.perf_counter() - start)
+
+
+def calibrate(algorithm: str, target: float, repeat: int) -> HashParams:
+    """Return the params of algorithm whose single hash takes about target
+    seconds on this machine.
+    """
+    if algorithm == PBKDF2_SHA256:
+        probe = HashParams(PBKDF2_SHA256, {"i": 100000})
+        elapsed = seconds_per_hash(probe, repeat)
+        iterations = int(probe.cost["i"] * target / elapsed)
+        return HashParams(
+            PBKDF2_SHA256, {"i": max(1000, iterations // 1000 * 1000)}
+        )
+    if algorithm == SCRYPT:
+        params = HashParams(SCRYPT, {"n": 1024, "r": 8, "p": 1})
+        while True:
+            bigger = HashParams(
+                SCRYPT, {**params.cost, "n": params.cost["n"] * 2}
+            )
+            if seconds_per_hash(bigger, repeat) > target:
+                return params
+            params = bigger
+    # argon2id: the most memory that fits in target with one pass,
+    # then as many passes as still fit
+    memory = 65536
+    elapsed = seconds_per_hash(argon2id_params(memory, 1), repeat)
+    while elapsed > target and memory > 8192:
+        memory //= 2
+        elapsed = seconds_per_hash(argon2id_params(memory, 1), repeat)
+    return argon2id_params(memory, max(1, int(target / elapsed)))
+
+
+def argon2id_params(memory: int, time_cost: int) -> HashParams:
+    return HashParams(ARGON2ID, {"m": memory, "t": time_cost, "p": 1})
+
+
+def describe(params: HashParams) -> str:
+    return f"{params.algorithm} {params.encode_cost()}"
+
+
+def supported_algorithms() -> list[str]:
+    algorithms = [PBKDF2_SHA256, SCRYPT]
+    if hash_secret_raw is not None:
+        algorithms.append(ARGON2ID)
+    return algorithms
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=50.0,
+        help="hash latency the recommended params should hit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="hashing workers to estimate login capacity for",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="hashes timed per setting"
+    )
+    parser.add_argument(
+        "--algorithm",
+        action="append",
+        choices=[PBKDF2_SHA256, SCRYPT, ARGON2ID],
+        help="limit the run to these algorithms",
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    algorithms = args.algorithm or supported_algorithms()
+    cores = os.cpu_count() or 1
+    print(f"cpu cores: {cores}, target: {args.target_ms:.0f} ms per hash\n")
+
+    print(f"{'params':<40} {'ms/hash':>9} {'hashes/s/core':>14}")
+    for algorithm in algorithms:
+        for cost in COST_GRID[algorithm]:
+            params = HashParams(algorithm, cost)
+            elapsed = seconds_per_hash(params, args.repeat)
+            print(
+                f"{describe(params):<40} {elapsed * 1000:9.2f} "
+                f"{1 / elapsed:14.1f}"
+            )
+
+    print(f"\nrecommended for {args.target_ms:.0f} ms per hash:")
+    for algorithm in algorithms:
+        params = calibrate(algorithm, args.target_ms / 1000, args.repeat)
+        elapsed = seconds_per_hash(params, args.repeat)
+        env = " ".join(
+            f"{ENV_NAMES[algorithm][key]}={value}"
+            for key, value in params.cost.items()
+        )
+        print(f"  {elapsed * 1000:7.2f} ms  HASH_ALGORITHM={algorithm} {env}")
+
+    workers = args.workers
+    total = max(workers * args.repeat, 2 * workers)
+    per_core = 1 / seconds_per_hash(HASH_PARAMS, args.repeat)
+    measured = hashes_per_second(HASH_PARAMS, workers, total)
+    print(
+        f"\nlogin capacity with configured {describe(HASH_PARAMS)}, "
+        f"{workers} hashing workers (one hash per login):"
+    )
+    print(f"  estimated: {per_core * min(workers, cores):8.1f} logins/s")
+    print(f"  measured:  {measured:8.1f} logins/s")
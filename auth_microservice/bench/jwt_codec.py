@@ -0,0 +1,104 @@
+"""Token issue and verify throughput, PyJWT against the token codec."""
+
+import argparse
+import time
+from typing import Callable
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from ..src.signing_keys import KeyRing, SigningKey
+from ..src.token_codec import TokenCodec
+from ..src.token_utils import ACCESS_TOKEN_EXP
+
+ALGORITHMS = ["HS256", "ES256", "EdDSA", "RS256"]
+
+
+def generate_key(algorithm: str) -> SigningKey:
+    if algorithm.startswith("HS"):
+        return SigningKey.from_secret("bench secret " * 4, algorithm)
+    if algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(65537, 2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return SigningKey.from_pem(pem, algorithm)
+
+
+def ops_per_second(func: Callable[[], object], seconds: float) -> float:
+    func()
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def claims() -> dict:
+    return {
+        "id": "3fa85f64-5717-4562-b3fc-2c963f66afa6",
+        "exp": int(time.time()) + ACCESS_TOKEN_EXP * 60,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=1.0,
+        help="time spent on every measurement",
+    )
+    parser.add_argument(
+        "--algorithm",
+        action="append",
+        choices=ALGORITHMS,
+        help="limit the run to these algorithms",
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    print(
+        f"{'algorithm':<10} {'operation':<8} {'pyjwt/s':>10} "
+        f"{'codec/s':>10} {'speedup':>8}"
+    )
+    for algorithm in args.algorithm or ALGORITHMS:
+        key = generate_key(algorithm)
+        codec = TokenCodec(KeyRing("bench", [key]))
+        headers = {"kid": key.kid}
+
+        def pyjwt_issue() -> str:
+            return jwt.encode(
+                claims(), key.signing_key, algorithm, headers=headers
+            )
+
+        def codec_issue() -> str:
+            return codec.encode(claims())
+
+        token = codec_issue()
+
+        def pyjwt_verify() -> dict:
+            return jwt.decode(token, key.verifying_key, algorithms=[algorithm])
+
+        def codec_verify() -> dict:
+            return codec.decode(token)
+
+        for operation, baseline, fast in (
+            ("issue", pyjwt_issue, codec_issue),
+            ("verify", pyjwt_verify, codec_verify),
+        ):
+            baseline_rate = ops_per_second(baseline, args.seconds)
+            fast_rate = ops_per_second(fast, args.seconds)
+            print(
+                f"{algorithm:<10} {operation:<8} {baseline_rate:10.0f} "
+                f"{fast_rate:10.0f} {fast_rate / baseline_rate:7.2f}x"
+            )
@@ -0,0 +1,117 @@
+"""GET /auth/verify throughput, the gateway subrequest path."""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+import httpx
+
+from ..src.token_utils import ID_FIELD, create_access_token
+from .common import format_latencies
+
+USER_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def verify_scope(token: str) -> dict[str, Any]:
+    headers = [(b"host", b"bench")]
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "root_path": "",
+        "path": "/auth/verify",
+        "raw_path": b"/auth/verify",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def in_process(token: str, seconds: float) -> tuple[float, int]:
+    """Requests per second calling the ASGI app directly, without a
+    server or an http client in the way.
+    """
+    from ..src.main import app
+
+    scope = verify_scope(token)
+    statuses = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await app(scope, receive, send)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            await app(dict(scope), receive, send)
+        count += 100
+    return count / (time.perf_counter() - start), statuses[0]
+
+
+async def live(args: argparse.Namespace, token: str) -> list[float]:
+    latencies: list[float] = []
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def probe(client: httpx.AsyncClient) -> None:
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            response = await client.get("/auth/verify", headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        await asyncio.gather(*(probe(client) for _ in range(args.concurrency)))
+    return latencies
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help=(
+            "benchmark a running service instead of the in-process app, "
+            "its ACCESS_SECRET_KEY must match this environment"
+        ),
+    )
+    parser.add_argument(
+        "--seconds",
+        type=float,
+        default=2.0,
+        help="time spent on every in-process measurement",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="requests per live probe"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="concurrent live probes"
+    )
+
+
+def run(args: argparse.Namespace) -> None:
+    token = create_access_token({ID_FIELD: USER_ID})
+    if args.base_url:
+        started = time.perf_counter()
+        latencies = asyncio.run(live(args, token))
+        elapsed = time.perf_counter() - started
+        print(format_latencies("/auth/verify", latencies))
+        print(f"{'requests per second':<28} {len(latencies) / elapsed:.0f}")
+        return
+    for name, probe_token in (
+        ("valid token", token),
+        ("invalid token", token[:-4] + "AAAA"),
+        ("no token", ""),
+    ):
+        rate, status = asyncio.run(in_process(probe_token, args.seconds))
+        print(f"{name:<28} status={status} {rate:10.0f} req/s")
@@ -0,0 +1,17 @@
+"""Clients of the auth service for other services: local verification of
+its access tokens (TokenVerifier, AuthMiddleware, principal_dependency) and
+the user API (UserClient).
+"""
+
+from .middleware import AuthMiddleware, principal_dependency
+from .users import UserClient
+from .verifier import Principal, RevocationSet, TokenVerifier
+
+__all__ = [
+    "AuthMiddleware",
+    "Principal",
+    "RevocationSet",
+    "TokenVerifier",
+    "UserClient",
+    "principal_dependency",
+]
@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, Request
+from starlette.requests import cookie_parser
+
+from .verifier import Principal, TokenVerifier
+
+ACCESS_COOKIE = "access_token"
+
+
+def request_token(headers: list[tuple[bytes, bytes]]) -> str:
+    """Access token from the cookie or an ``Authorization: Bearer`` header."""
+    authorization = ""
+    for name, value in headers:
+        if name == b"cookie":
+            token = cookie_parser(value.decode("latin-1")).get(ACCESS_COOKIE)
+            if token:
+                return token
+        elif name == b"authorization":
+            authorization = value.decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    return token if scheme.lower() == "bearer" else ""
+
+
+class AuthMiddleware:
+    """Pure ASGI middleware that verifies the access token of every
+    request locally and stores the Principal, or None, on
+    ``request.state.principal``. It rejects nothing by itself, routes
+    that need a user depend on ``principal_dependency``.
+    """
+
+    def __init__(self, app: Callable, verifier: TokenVerifier) -> None:
+        self.app = app
+        self.verifier = verifier
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] in ("http", "websocket"):
+            token = request_token(scope["headers"])
+            scope.setdefault("state", {})["principal"] = (
+                self.verifier.principal(token) if token else None
+            )
+        await self.app(scope, receive, send)
+
+
+def principal_dependency(
+    verifier: TokenVerifier,
+) -> Callable[[Request], Awaitable[Principal]]:
+    """FastAPI dependency returning the caller or raising 401, works with
+    and without AuthMiddleware installed.
+    """
+
+    async def dependency(request: Request) -> Principal:
+        if "principal" in request.scope.get("state", {}):
+            principal = request.state.principal
+        else:
+            token = request_token(request.scope["headers"])
+            principal = verifier.principal(token) if token else None
+        if principal is None:
+            raise HTTPException(
+                status_code=401,
+                detail="You should be authorized",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return principal
+
+    return dependency
@@ -0,0 +1,45 @@
+# Vendored copy of src/single_flight.py, the client does not depend on the
+# service. tests/test_single_flight.py checks that both copies are identical.
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Per-worker coalescing of concurrent calls with the same key.\n
+    The first caller runs the call as a task, callers that arrive while
+    it is running await the same task and get its result or exception.
+    Every caller awaits the task shielded, so cancelling any of them, the
+    first one included, leaves the call running for the others. Nothing
+    is kept once the task is done, so a later call runs again.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._tasks: dict[str, asyncio.Task[T]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        self.calls += 1
+        task = asyncio.ensure_future(call())
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # the leader's cancellation must not cancel the followers' call
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,193 @@
+import base64
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import httpx
+
+from .single_flight import SingleFlight
+
+REFRESH_PATH = "/auth"
+
+
+def code_challenge(code_verifier: str) -> str:
+    digest = hashlib.sha256(code_verifier.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+class UserCache:
+    """LRU of users by id, entries live ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return dict(entry[1])
+
+    def put(self, user_id: str, user: dict) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, dict(user))
+        self._entries.move_to_end(user_id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class UserClient:
+    """Async client of the service's user API for other services.\n
+    One pooled ``httpx.AsyncClient`` keeps connections alive and holds the
+    session cookies set by ``login``/``register``. A 401 refreshes the
+    session through ``POST /auth`` (PKCE with ``code_verifier``) and the
+    request is sent again; concurrent refreshes share one call, as do
+    concurrent ``get_user`` calls for the same id. Users are cached for
+    ``cache_ttl`` seconds, 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        code_verifier: Optional[str] = None,
+        cache_ttl: float = 0,
+        cache_size: int = 10000,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30,
+        timeout: float = 5,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.code_verifier = code_verifier or secrets.token_urlsafe(32)
+        self.cache = UserCache(cache_ttl, cache_size)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.flight: SingleFlight[Any] = SingleFlight("UserClient")
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+        self._pkce_registered = False
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout
+            )
+        return self._http_client
+
+    async def request(
+        self, method: str, path: str, **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, refresh the session and retry once on 401."""
+        url = self.base_url + path
+        response = await self.http_client.request(method, url, **kwargs)
+        if response.status_code != 401 or not self.http_client.cookies.get(
+            "refresh_token"
+        ):
+            return response
+        await self.flight.do("refresh", self.refresh)
+        return await self.http_client.request(method, url, **kwargs)
+
+    async def refresh(self) -> None:
+        """Get a new access token for the session's refresh token."""
+        url = self.base_url + REFRESH_PATH
+        if not self._pkce_registered:
+            response = await self.http_client.post(
+                url,
+                json={
+                    "code_challenge": code_challenge(self.code_verifier),
+                    "code_challenge_method": "S256",
+                },
+            )
+            # 400: the challenge of this host is already registered
+            if response.status_code != 400:
+                response.raise_for_status()
+                self._pkce_registered = True
+                return
+        response = await self.http_client.post(
+            url, json={"code_verifier": self.code_verifier}
+        )
+        response.raise_for_status()
+        self._pkce_registered = True
+
+    async def register(self, **fields: Any) -> dict:
+        """Register a user and keep its session, return the user."""
+        response = await self.request("POST", "/register", json=fields)
+        response.raise_for_status()
+        return response.json()
+
+    async def login(self, **credentials: Any) -> dict:
+        """Log in and keep the session, return the user."""
+        response = await self.request("POST", "/login", json=credentials)
+        response.raise_for_status()
+        return response.json()
+
+    async def logout(self) -> None:
+        response = await self.request("POST", "/logout")
+        response.raise_for_status()
+        self.http_client.cookies.clear()
+
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        """User by id, None when it does not exist."""
+        user_id = str(user_id)
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
+
+        async def fetch() -> Optional[dict]:
+            response = await self.request("GET", f"/user/{user_id}")
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            self.cache.put(user_id, response.json())
+            return response.json()
+
+        user = await self.flight.do(f"user:{user_id}", fetch)
+        return dict(user) if user is not None else None
+
+    async def users_by_field(self, **fields: Any) -> list[dict]:
+        """Users whose field contains the given value, case-insensitively.\n
+        The service matches a single field (``ILIKE '%value%'``), so
+        ``users_by_field(email="a@b.c")`` also finds ``"xa@b.com"``; compare
+        the results when an exact match is needed.
+        """
+        response = await self.request(
+            "POST", "/user/user_by_field", json=fields
+        )
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> dict:
+        return self.flight.stats()
+
+    async def close(self) -> None:
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def __aenter__(self) -> "UserClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
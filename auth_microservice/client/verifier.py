@@ -0,0 +1,371 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+import jwt
+from loguru import logger
+
+KEYS_PATH = "/.well-known/jwks.json"
+REVOCATIONS_PATH = "/revoke/list"
+EVENTS_PATH = "/events"
+PURGE_INTERVAL = 60
+
+
+class Principal:
+    """Caller authenticated by a locally verified access token.
+    ``claims`` is the verified payload and is read-only.
+    """
+
+    __slots__ = ("user_id", "expires_at", "claims")
+
+    def __init__(self, user_id: str, expires_at: int, claims: dict) -> None:
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.claims = claims
+
+    def __repr__(self) -> str:
+        return (
+            f"Principal(user_id={self.user_id!r}, "
+            f"expires_at={self.expires_at})"
+        )
+
+
+class RevocationSet:
+    """Copy of the service's revocation list: revoked ``jti`` and per-user
+    token epochs, tokens with an older ``ep`` claim are revoked.
+    """
+
+    def __init__(self) -> None:
+        self.tokens: dict[str, int] = {}
+        self.users: dict[str, tuple[int, int]] = {}
+
+    def replace(self, snapshot: dict) -> None:
+        self.tokens = dict(snapshot.get("tokens", {}))
+        self.users = {
+            user_id: (int(epoch), int(expires_at))
+            for user_id, (epoch, expires_at) in snapshot.get(
+                "users", {}
+            ).items()
+        }
+
+    def apply(self, event: str, data: dict) -> None:
+        """Apply a ``token`` or ``user`` event of the service."""
+        if event == "token":
+            jti, expires_at = data["jti"], int(data["exp"])
+            self.tokens[jti] = max(expires_at, self.tokens.get(jti, 0))
+        elif event == "user":
+            current = self.users.get(data["user"])
+            if current is None or current[0] < data["epoch"]:
+                self.users[data["user"]] = (
+                    int(data["epoch"]),
+                    int(data["exp"]),
+                )
+
+    def purge(self, now: float) -> None:
+        self.tokens = {
+            jti: exp for jti, exp in self.tokens.items() if exp > now
+        }
+        self.users = {
+            user_id: user
+            for user_id, user in self.users.items()
+            if user[1] > now
+        }
+
+    def is_revoked(self, claims: dict, user_id: str) -> bool:
+        if claims.get("jti") in self.tokens:
+            return True
+        if self.users:
+            user = self.users.get(user_id)
+            if user is not None and claims.get("ep", 0) < user[0]:
+                return True
+        return False
+
+
+class VerifiedTokens:
+    """LRU of verified payloads by token digest, entries live until the
+    token's ``exp``.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        payload = self._entries.get(key)
+        if payload is None:
+            return None
+        if payload["exp"] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        if self.max_size <= 0:
+            return
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        self._entries[key] = payload
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TokenVerifier:
+    """Verifies access tokens of the auth service without calling it.\n
+    Keys come from the service's JWKS (asymmetric ``ALGORITHM``) or from
+    the shared ``secret`` (HS algorithms, whose keys are never published).
+    The JWKS and the revocation list are refreshed in the background
+    between ``start()`` and ``close()``, so ``verify`` itself never does
+    network I/O: revocations and key changes arrive on the service's
+    event stream, resumed with the last event id after a disconnect, and
+    the revocation list is polled every ``revocations_interval`` while the
+    stream is unavailable. A token signed by an unknown ``kid`` is
+    rejected and triggers an early JWKS refresh, at most every
+    ``min_keys_interval``.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        secret: Optional[str] = None,
+        algorithm: str = "HS256",
+        id_field: str = "id",
+        client_token: Optional[str] = None,
+        keys_interval: float = 300,
+        min_keys_interval: float = 10,
+        revocations_interval: float = 5,
+        events_timeout: float = 60,
+        leeway: float = 0,
+        cache_size: int = 10000,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret.encode() if secret else None
+        self.algorithm = algorithm
+        self.id_field = id_field
+        self.keys_interval = keys_interval
+        self.min_keys_interval = min_keys_interval
+        self.revocations_interval = revocations_interval
+        self.events_timeout = events_timeout
+        self.last_event_id = ""
+        self.leeway = leeway
+        self.keys: dict[str, jwt.PyJWK] = {}
+        self.revocations = RevocationSet()
+        self.verified = VerifiedTokens(cache_size)
+        self.headers = (
+            {"Authorization": f"Bearer {client_token}"} if client_token else {}
+        )
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+        self._revocations_etag = ""
+        self._keys_loaded_at = 0.0
+        self._keys_generation: Optional[int] = None
+        self._purged_at = time.monotonic()
+        self._keys_wanted = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=5)
+        return self._http_client
+
+    def verifying_key(self, token: str) -> Optional[tuple[Any, str]]:
+        if self.secret is not None:
+            return self.secret, self.algorithm
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys.get(kid) if kid else None
+        if key is None:
+            self._keys_wanted.set()
+            return None
+        return key.key, key.algorithm_name
+
+    def verify(self, token: str) -> Optional[dict]:
+        """Verified claims of an access token, None when it is invalid,
+        expired, revoked or signed by a key not known yet.
+        """
+        payload = self.verified.get(token)
+        if payload is None:
+            try:
+                key = self.verifying_key(token)
+                if key is None:
+                    return None
+                payload = jwt.decode(
+                    token,
+                    key[0],
+                    algorithms=[key[1]],
+                    leeway=self.leeway,
+                    options={"require": ["exp"]},
+                )
+            except jwt.PyJWTError:
+                return None
+            self.verified.put(token, payload)
+        if self.revocations.is_revoked(
+            payload, str(payload.get(self.id_field))
+        ):
+            return None
+        return payload
+
+    def principal(self, token: str) -> Optional[Principal]:
+        payload = self.verify(token)
+        if payload is None or not payload.get(self.id_field):
+            return None
+        return Principal(
+            str(payload[self.id_field]), int(payload["exp"]), payload
+        )
+
+    async def refresh_keys(self) -> None:
+        response = await self.http_client.get(self.base_url + KEYS_PATH)
+        response.raise_for_status()
+        keys: dict[str, jwt.PyJWK] = {}
+        for jwk in response.json().get("keys", []):
+            try:
+                key = jwt.PyJWK(jwk)
+            except jwt.PyJWTError as e:
+                logger.warning(f"Skipping key {jwk.get('kid')!r}: {e}")
+                continue
+            keys[key.key_id or ""] = key
+        if keys.keys() != self.keys.keys():
+            # tokens of dropped (retired) keys must not stay verified
+            self.verified.clear()
+        self.keys = keys
+        self._keys_loaded_at = time.monotonic()
+
+    async def refresh_revocations(self) -> bool:
+        """Fetch the revocation list unless it is unchanged, return whether
+        it changed.
+        """
+        headers = dict(self.headers)
+        if self._revocations_etag:
+            headers["If-None-Match"] = self._revocations_etag
+        response = await self.http_client.get(
+            self.base_url + REVOCATIONS_PATH, headers=headers
+        )
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        self.revocations.replace(response.json())
+        self._revocations_etag = response.headers.get("etag", "")
+        return True
+
+    async def keys_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._keys_wanted.wait(), self.keys_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            wait = self._keys_loaded_at + self.min_keys_interval
+            await asyncio.sleep(max(0.0, wait - time.monotonic()))
+            self._keys_wanted.clear()
+            try:
+                await self.refresh_keys()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"JWKS refresh failed: {e}")
+                self._keys_loaded_at = time.monotonic()
+
+    def on_event(self, event: str, data: str) -> None:
+        payload = json.loads(data)
+        if event == "snapshot":
+            self.revocations.replace(payload)
+            if payload.get("keys") != self._keys_generation:
+                self._keys_generation = payload.get("keys")
+                self._keys_wanted.set()
+        elif event == "keys":
+            self._keys_wanted.set()
+        else:
+            self.revocations.apply(event, payload)
+        if time.monotonic() - self._purged_at > PURGE_INTERVAL:
+            self.revocations.purge(time.time())
+            self._purged_at = time.monotonic()
+
+    async def follow_events(self) -> int:
+        """Apply the service's events until the stream ends, return how
+        many there were.
+        """
+        headers = dict(self.headers)
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        async with self.http_client.stream(
+            "GET",
+            self.base_url + EVENTS_PATH,
+            headers=headers,
+            timeout=httpx.Timeout(5, read=self.events_timeout),
+        ) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if not content_type.startswith("text/event-stream"):
+                raise ValueError(f"Not an event stream: {content_type!r}")
+            count = 0
+            event_id, event, data = "", "", []
+            async for line in response.aiter_lines():
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "id":
+                        event_id = value
+                    elif field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+                    continue
+                if data:
+                    self.on_event(event, "\n".join(data))
+                    count += 1
+                    if event_id:
+                        self.last_event_id = event_id
+                event_id, event, data = "", "", []
+        return count
+
+    async def revocations_loop(self) -> None:
+        while True:
+            try:
+                if await self.follow_events():
+                    continue
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                logger.error(f"Event stream failed: {e}")
+            try:
+                await self.refresh_revocations()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Revocation list refresh failed: {e}")
+            await asyncio.sleep(self.revocations_interval)
+
+    async def start(self) -> None:
+        """Load keys and revocations, then keep refreshing them."""
+        refreshes: list[Callable[[], Awaitable[Any]]] = [
+            self.refresh_revocations
+        ]
+        if self.secret is None:
+            refreshes.insert(0, self.refresh_keys)
+        for refresh in refreshes:
+            try:
+                await refresh()
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Initial {refresh.__name__} failed: {e}")
+        if self.secret is None:
+            self._tasks.append(asyncio.create_task(self.keys_loop()))
+        self._tasks.append(asyncio.create_task(self.revocations_loop()))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def __aenter__(self) -> "TokenVerifier":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
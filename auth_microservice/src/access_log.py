@@ -0,0 +1,202 @@
+import json
+import os
+import random
+import time
+from typing import Any, Callable
+
+from dotenv import load_dotenv
+
+from .logger import base_logger, log_enabled, redact_text
+
+load_dotenv()
+# request and response bodies in the access log, off by default: they
+# carry passwords and tokens
+ACCESS_LOG_BODIES = os.getenv("ACCESS_LOG_BODIES", "False") == "True"
+ACCESS_LOG_BODY_LIMIT = int(os.getenv("ACCESS_LOG_BODY_LIMIT", "1024"))
+ACCESS_LOG_BODY_SAMPLE_RATE = float(
+    os.getenv("ACCESS_LOG_BODY_SAMPLE_RATE", "0.01")
+)
+# route path prefix -> share of its requests logged, JSON; the longest
+# matching prefix wins, errors (status >= 400) are always logged
+LOG_SAMPLE_RATES: dict[str, float] = json.loads(
+    os.getenv("LOG_SAMPLE_RATES", "") or "{}"
+)
+# documentation and ui pages, never worth their bodies in the log
+NO_BODY_PATHS = ("/docs", "/openapi.json", "/ui/")
+
+
+class RouteSampler:
+    """Per-route sampling rates, prefixes sorted once, longest first.
+    Paths no prefix matches are sampled at ``default``.
+    """
+
+    def __init__(self, rates: dict[str, float], default: float = 1.0) -> None:
+        self.rates = sorted(
+            rates.items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.default = default
+
+    def rate(self, path: str) -> float:
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default
+
+    def sampled(self, path: str) -> bool:
+        rate = self.rate(path) if self.rates else self.default
+        if rate <= 0:
+            return False
+        return rate >= 1 or random.random() < rate
+
+
+class BodySample:
+    """First ``limit`` bytes of a body, the rest is only counted."""
+
+    __slots__ = ("limit", "chunks", "size")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def add(self, chunk: bytes) -> None:
+        room = self.limit - min(self.size, self.limit)
+        if room > 0:
+            self.chunks.append(chunk[:room])
+        self.size += len(chunk)
+
+    def text(self) -> str:
+        text = b"".join(self.chunks).decode("utf-8", "replace")
+        if self.size > self.limit:
+            text += f"... ({self.size} bytes)"
+        return text
+
+
+class AccessLogMiddleware:
+    """Pure ASGI access log, one structured record per request.\n
+    Status, byte counts, time to the first response byte and total time
+    are observed as the ASGI messages pass through: nothing is buffered
+    and responses are never rebuilt, so streaming responses (``/events``)
+    stream and are logged when they end. Successful requests are sampled
+    per route (``sample_rates``). Bodies are logged only with
+    ``capture_bodies``, for a ``sample_rate`` share of the logged requests,
+    at most ``body_limit`` bytes each and redacted.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        capture_bodies: bool = ACCESS_LOG_BODIES,
+        body_limit: int = ACCESS_LOG_BODY_LIMIT,
+        sample_rate: float = ACCESS_LOG_BODY_SAMPLE_RATE,
+        sample_rates: dict[str, float] = LOG_SAMPLE_RATES,
+    ) -> None:
+        self.app = app
+        self.capture_bodies = capture_bodies
+        self.body_limit = body_limit
+        self.sample_rate = sample_rate
+        self.sampler = RouteSampler(sample_rates)
+
+    def bodies_sampled(self, path: str) -> bool:
+        return (
+            self.capture_bodies
+            and random.random() < self.sample_rate
+            and not any(part in path for part in NO_BODY_PATHS)
+        )
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        path = route_path(scope)
+        logged = self.sampler.sampled(path)
+        request_body = response_body = None
+        if logged and self.bodies_sampled(path):
+            request_body = BodySample(self.body_limit)
+            response_body = BodySample(self.body_limit)
+        status = 0
+        first_byte = 0.0
+        bytes_in = bytes_out = 0
+
+        async def receive_counted() -> dict:
+            nonlocal bytes_in
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                bytes_in += len(body)
+                if request_body is not None and body:
+                    request_body.add(body)
+            return message
+
+        async def send_counted(message: dict) -> None:
+            nonlocal status, first_byte, bytes_out
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                first_byte = time.perf_counter() - start
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                bytes_out += len(body)
+                if response_body is not None and body:
+                    response_body.add(body)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        except BaseException:
+            status = status or 500
+            raise
+        finally:
+            if logged or status >= 400 or status == 0:
+                level = (
+                    "ERROR"
+                    if status >= 500 or status == 0
+                    else "WARNING" if status >= 400 else "INFO"
+                )
+                if log_enabled(level):
+                    fields = access_fields(
+                        scope, status, bytes_in, bytes_out, first_byte, start
+                    )
+                    if request_body is not None:
+                        fields["request_body"] = redact_text(
+                            request_body.text()
+                        )
+                    if response_body is not None:
+                        fields["response_body"] = redact_text(
+                            response_body.text()
+                        )
+                    base_logger.bind(**fields).log(
+                        level, f"{scope['method']} {scope['path']} {status}"
+                    )
+
+
+def route_path(scope: dict[str, Any]) -> str:
+    path, root_path = scope["path"], scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path) :]
+    return path
+
+
+def access_fields(
+    scope: dict[str, Any],
+    status: int,
+    bytes_in: int,
+    bytes_out: int,
+    first_byte: float,
+    start: float,
+) -> dict[str, Any]:
+    client = scope.get("client")
+    fields = {
+        "client": client[0] if client else "-",
+        "method": scope["method"],
+        "path": scope["path"],
+        "status": status,
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "ttfb_ms": round(first_byte * 1000, 1),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    if scope.get("query_string"):
+        fields["query"] = redact_text(scope["query_string"].decode("latin-1"))
+    return fields
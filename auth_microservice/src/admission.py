@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from .logger import base_logger
+from .metrics import Counter, Gauge, Histogram, metrics_registry
+from .password_utils import HASH_WORKERS
+
+load_dotenv()
+HASH_MAX_IN_FLIGHT = int(os.getenv("HASH_MAX_IN_FLIGHT", "0")) or HASH_WORKERS
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+QUEUE_WAIT_BUCKETS = (0.0, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+admission_queue_wait = Histogram(
+    "admission_queue_wait_seconds",
+    "Time callers waited for a slot, 0 when one was free.",
+    ("limiter",),
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+
+
+class AdmissionLimiter:
+    """Per-worker concurrency limit with a bounded FIFO wait queue.\n
+    At most max_in_flight callers hold a slot, up to max_queue more wait
+    for one, everything beyond that is rejected at once with 503 and
+    Retry-After instead of piling up.
+    """
+
+    def __init__(
+        self, name: str, max_in_flight: int, max_queue: int, retry_after: int
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            admission_queue_wait.labels(self.name).observe(0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            base_logger.warning(f"{self.name} queue is full, request rejected")
+            raise HTTPException(
+                status_code=503,
+                detail="Service is busy, retry later.",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right before the cancellation
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        queue_time = time.monotonic() - start
+        self.queue_time_total += queue_time
+        self.queue_time_max = max(self.queue_time_max, queue_time)
+        admission_queue_wait.labels(self.name).observe(queue_time)
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # hand the slot over, in_flight stays the same
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_time_total": self.queue_time_total,
+            "queue_time_max": self.queue_time_max,
+        }
+
+
+hash_limiter = AdmissionLimiter(
+    "hashing", HASH_MAX_IN_FLIGHT, HASH_MAX_QUEUE, HASH_RETRY_AFTER
+)
+admission_in_flight = Gauge(
+    "admission_in_flight", "Callers holding a slot.", ("limiter",)
+)
+admission_queued = Gauge(
+    "admission_queue_depth", "Callers waiting for a slot.", ("limiter",)
+)
+admission_rejected = Counter(
+    "admission_rejected_total",
+    "Callers rejected with 503 because the queue was full.",
+    ("limiter",),
+)
+
+
+def collect_limiters() -> None:
+    for limiter in (hash_limiter,):
+        admission_in_flight.labels(limiter.name).set(limiter.in_flight)
+        admission_queued.labels(limiter.name).set(limiter.queued)
+        admission_rejected.labels(limiter.name).set(limiter.rejected)
+
+
+metrics_registry.on_collect(collect_limiters)
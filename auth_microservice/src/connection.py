@@ -1,4 +1,5 @@
 import os
+import time
 from typing import AsyncGenerator
 
 from dotenv import load_dotenv
@@ -7,6 +8,9 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .metrics import Gauge, Histogram, metrics_registry
 
 load_dotenv()
 
@@ -16,7 +20,43 @@ DATABASE_URL = (
     f"{os.getenv('DB_PORT', '5432')}/{os.getenv("DB_NAME", "")}"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# plain asyncpg dsn for LISTEN connections outside of sqlalchemy
+LISTEN_DSN = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, opening one included.",
+)
+pool_connections = Gauge(
+    "db_pool_connections", "Pooled connections by state.", ("state",)
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The default pool of async engines, timing every checkout."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+engine = create_async_engine(
+    DATABASE_URL, echo=False, poolclass=TimedQueuePool
+)
+
+
+def collect_pool() -> None:
+    pool = engine.sync_engine.pool
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        pool_connections.labels("checked_out").set(pool.checkedout())
+        pool_connections.labels("idle").set(pool.checkedin())
+        pool_connections.labels("overflow").set(max(pool.overflow(), 0))
+
+
+metrics_registry.on_collect(collect_pool)
 async_session = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
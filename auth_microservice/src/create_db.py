@@ -1,4 +1,5 @@
 import os
+import sys
 
 import psycopg2
 from dotenv import load_dotenv
@@ -6,6 +7,17 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def keep_existing(sql: str) -> str:
+    """The statements of sql without DROPs, creating only what is missing."""
+    return "\n".join(
+        line.replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS ").replace(
+            "CREATE INDEX ", "CREATE INDEX IF NOT EXISTS "
+        )
+        for line in sql.splitlines()
+        if not line.startswith("DROP ")
+    )
+
+
 def db_create_users_table():
     conn = psycopg2.connect(
         dbname="postgres",
@@ -49,7 +61,8 @@ CREATE TABLE users (
     {os.getenv("USERNAME_FIELD", "username")} VARCHAR(255) UNIQUE,
     {os.getenv("PASSWORD_FIELD", "password")} VARCHAR(255) NOT NULL,
     {os.getenv("EMAIL_FIELD", "email")} VARCHAR(255) UNIQUE,
-    {os.getenv("PHONE_FIELD", "phone")} VARCHAR(255) UNIQUE
+    {os.getenv("PHONE_FIELD", "phone")} VARCHAR(255) UNIQUE,
+    {os.getenv("TOKEN_EPOCH_FIELD", "token_epoch")} INTEGER NOT NULL DEFAULT 0
 );
     """
     cursor.execute(sql1)
@@ -91,5 +104,141 @@ CREATE TABLE pkce (
     conn.close()
 
 
-db_create_users_table()
-db_create_pkce_table()
+def db_create_revocation_tables(drop: bool = True):
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME", ""),
+        user=os.getenv("DB_USER", ""),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", ""),
+    )
+    cursor = conn.cursor()
+    conn.autocommit = True
+    sql1 = """
+DROP TABLE IF EXISTS revoked_tokens CASCADE;
+CREATE TABLE revoked_tokens (
+    jti VARCHAR(64) NOT NULL PRIMARY KEY,
+    expires_at BIGINT NOT NULL
+);
+CREATE INDEX ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+DROP TABLE IF EXISTS revoked_users CASCADE;
+CREATE TABLE revoked_users (
+    user_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    token_epoch INTEGER NOT NULL,
+    expires_at BIGINT NOT NULL
+);
+CREATE INDEX ix_revoked_users_expires_at ON revoked_users (expires_at);
+    """
+    if not drop:
+        sql1 = keep_existing(sql1)
+    cursor.execute(sql1)
+    conn.commit()
+    print("Revocation tables created successfully........")
+
+    # Closing the connection
+
+    cursor.close()
+    conn.close()
+
+
+def db_create_refresh_families_table(drop: bool = True):
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME", ""),
+        user=os.getenv("DB_USER", ""),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", ""),
+    )
+    cursor = conn.cursor()
+    conn.autocommit = True
+    sql1 = """
+DROP TABLE IF EXISTS refresh_families CASCADE;
+CREATE TABLE refresh_families (
+    family_id VARCHAR(32) NOT NULL PRIMARY KEY,
+    user_id VARCHAR(64) NOT NULL,
+    current_jti VARCHAR(64) NOT NULL,
+    previous_jti VARCHAR(64),
+    rotated_at BIGINT NOT NULL DEFAULT 0,
+    expires_at BIGINT NOT NULL,
+    revoked BOOLEAN NOT NULL DEFAULT FALSE
+);
+CREATE INDEX ix_refresh_families_expires_at ON refresh_families (expires_at);
+    """
+    if not drop:
+        sql1 = keep_existing(sql1)
+    cursor.execute(sql1)
+    conn.commit()
+    print("Refresh families table created successfully........")
+
+    # Closing the connection
+
+    cursor.close()
+    conn.close()
+
+
+def db_create_user_roles_table(drop: bool = True):
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME", ""),
+        user=os.getenv("DB_USER", ""),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", ""),
+    )
+    cursor = conn.cursor()
+    conn.autocommit = True
+    sql1 = """
+DROP TABLE IF EXISTS user_roles CASCADE;
+CREATE TABLE user_roles (
+    user_id VARCHAR(64) NOT NULL,
+    role VARCHAR(64) NOT NULL,
+    PRIMARY KEY (user_id, role)
+);
+    """
+    if not drop:
+        sql1 = keep_existing(sql1)
+    cursor.execute(sql1)
+    conn.commit()
+    print("User roles table created successfully........")
+
+    # Closing the connection
+
+    cursor.close()
+    conn.close()
+
+
+def db_migrate_users_table():
+    """Add the columns of newer versions to an existing users table,
+    keeping its rows.
+    """
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME", ""),
+        user=os.getenv("DB_USER", ""),
+        password=os.getenv("DB_PASSWORD", ""),
+        host=os.getenv("DB_HOST", ""),
+    )
+    cursor = conn.cursor()
+    conn.autocommit = True
+    sql1 = f"""
+ALTER TABLE {os.getenv("TABLE_NAME", "users")}
+    ADD COLUMN IF NOT EXISTS {os.getenv("TOKEN_EPOCH_FIELD", "token_epoch")}
+    INTEGER NOT NULL DEFAULT 0;
+    """
+    cursor.execute(sql1)
+    conn.commit()
+    print("Users table migrated successfully........")
+
+    # Closing the connection
+
+    cursor.close()
+    conn.close()
+
+
+if sys.argv[1:] == ["migrate"]:
+    # existing database: add what is missing, drop nothing
+    db_migrate_users_table()
+    db_create_revocation_tables(drop=False)
+    db_create_refresh_families_table(drop=False)
+    db_create_user_roles_table(drop=False)
+else:
+    db_create_users_table()
+    db_create_pkce_table()
+    db_create_revocation_tables()
+    db_create_refresh_families_table()
+    db_create_user_roles_table()
@@ -0,0 +1,122 @@
+from typing import Collection, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select, update
+
+from ..logger import base_logger
+from ..models.refresh_family_models import RefreshFamily
+
+
+class RefreshFamilyCRUD:
+    """Every method is a single statement on the primary key (or the
+    expiry index for purging).
+    """
+
+    name = "Refresh family"
+
+    def __init__(self) -> None:
+        self.logger = base_logger
+
+    async def create(
+        self,
+        family_id: str,
+        user_id: str,
+        jti: str,
+        expires_at: int,
+        session: AsyncSession,
+    ) -> None:
+        session.add(
+            RefreshFamily(
+                family_id=family_id,
+                user_id=user_id,
+                current_jti=jti,
+                expires_at=expires_at,
+            )
+        )
+        await session.flush()
+
+    async def rotate(
+        self,
+        family_id: str,
+        jti: str,
+        new_jti: str,
+        expires_at: int,
+        now: int,
+        session: AsyncSession,
+    ) -> Optional[str]:
+        """Swap the current jti of a live family in one UPDATE ... RETURNING,
+        return the family's user id, or None when jti is not current.
+        now is the new token's ``iat`` and is kept as ``rotated_at``.
+        """
+        result = await session.execute(
+            update(RefreshFamily)
+            .where(
+                RefreshFamily.family_id == family_id,
+                RefreshFamily.current_jti == jti,
+                RefreshFamily.revoked.is_(False),
+                RefreshFamily.expires_at > now,
+            )
+            .values(
+                current_jti=new_jti,
+                previous_jti=jti,
+                rotated_at=now,
+                expires_at=expires_at,
+            )
+            .returning(RefreshFamily.user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def read_rotated(
+        self, family_id: str, jti: str, since: int, session: AsyncSession
+    ) -> Optional[tuple[str, int, int]]:
+        """Current jti, expiry and rotation time of a live family that
+        replaced jti at or after since.
+        """
+        result = await session.execute(
+            select(
+                RefreshFamily.current_jti,
+                RefreshFamily.expires_at,
+                RefreshFamily.rotated_at,
+            ).where(
+                RefreshFamily.family_id == family_id,
+                RefreshFamily.previous_jti == jti,
+                RefreshFamily.rotated_at >= since,
+                RefreshFamily.revoked.is_(False),
+            )
+        )
+        row = result.one_or_none()
+        return None if row is None else (row[0], row[1], row[2])
+
+    async def read_current(
+        self, family_ids: Collection[str], now: int, session: AsyncSession
+    ) -> dict[str, str]:
+        """Current jti of every live family among family_ids."""
+        result = await session.execute(
+            select(RefreshFamily.family_id, RefreshFamily.current_jti).where(
+                RefreshFamily.family_id.in_(family_ids),
+                RefreshFamily.revoked.is_(False),
+                RefreshFamily.expires_at > now,
+            )
+        )
+        return {family_id: jti for family_id, jti in result.all()}
+
+    async def revoke(
+        self, family_id: str, session: AsyncSession
+    ) -> Optional[tuple[str, int]]:
+        """Revoke a live family, return its current jti and expiry."""
+        result = await session.execute(
+            update(RefreshFamily)
+            .where(
+                RefreshFamily.family_id == family_id,
+                RefreshFamily.revoked.is_(False),
+            )
+            .values(revoked=True)
+            .returning(RefreshFamily.current_jti, RefreshFamily.expires_at)
+        )
+        row = result.one_or_none()
+        return None if row is None else (row[0], row[1])
+
+    async def delete_expired(self, now: int, session: AsyncSession) -> None:
+        await session.execute(
+            delete(RefreshFamily).where(RefreshFamily.expires_at <= now)
+        )
@@ -0,0 +1,76 @@
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from ..logger import base_logger
+from ..models.revocation_models import RevokedToken, RevokedUser
+from ..revocation import REVOCATION_CHANNEL, token_event, user_event
+
+
+class RevocationCRUD:
+    """Revocation tables. Writes NOTIFY REVOCATION_CHANNEL in the same
+    transaction (Postgres only), so every worker hears about a revocation
+    exactly when it is committed.
+    """
+
+    name = "Revocation"
+
+    def __init__(self) -> None:
+        self.logger = base_logger
+
+    async def notify(self, payload: str, session: AsyncSession) -> None:
+        if session.get_bind().dialect.name == "postgresql":
+            await session.execute(
+                select(func.pg_notify(REVOCATION_CHANNEL, payload))
+            )
+
+    async def revoke_token(
+        self, jti: str, expires_at: int, session: AsyncSession
+    ) -> None:
+        await session.merge(RevokedToken(jti=jti, expires_at=expires_at))
+        await self.notify(token_event(jti, expires_at), session)
+
+    async def revoke_user(
+        self,
+        user_id: str,
+        epoch: int,
+        expires_at: int,
+        session: AsyncSession,
+    ) -> None:
+        await session.merge(
+            RevokedUser(
+                user_id=user_id, token_epoch=epoch, expires_at=expires_at
+            )
+        )
+        await self.notify(user_event(user_id, epoch, expires_at), session)
+
+    async def read_active(
+        self, now: int, session: AsyncSession
+    ) -> tuple[dict[str, int], dict[str, tuple[int, int]]]:
+        tokens = await session.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at).where(
+                RevokedToken.expires_at > now
+            )
+        )
+        users = await session.execute(
+            select(
+                RevokedUser.user_id,
+                RevokedUser.token_epoch,
+                RevokedUser.expires_at,
+            ).where(RevokedUser.expires_at > now)
+        )
+        return (
+            {jti: expires_at for jti, expires_at in tokens.all()},
+            {
+                user_id: (epoch, expires_at)
+                for user_id, epoch, expires_at in users.all()
+            },
+        )
+
+    async def delete_expired(self, now: int, session: AsyncSession) -> None:
+        await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= now)
+        )
+        await session.execute(
+            delete(RevokedUser).where(RevokedUser.expires_at <= now)
+        )
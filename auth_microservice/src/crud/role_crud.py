@@ -0,0 +1,29 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from ..logger import base_logger
+from ..models.role_models import UserRole
+
+
+class RoleCRUD:
+    """Roles of users, every read is one query on the primary key."""
+
+    name = "Role"
+
+    def __init__(self) -> None:
+        self.logger = base_logger
+
+    async def read(self, user_id: str, session: AsyncSession) -> list[str]:
+        result = await session.execute(
+            select(UserRole.role).where(UserRole.user_id == user_id)
+        )
+        return sorted(result.scalars().all())
+
+    async def replace(
+        self, user_id: str, roles: list[str], session: AsyncSession
+    ) -> None:
+        await session.execute(
+            delete(UserRole).where(UserRole.user_id == user_id)
+        )
+        session.add_all(UserRole(user_id=user_id, role=role) for role in roles)
+        await session.flush()
@@ -1,12 +1,20 @@
-from typing import Sequence
+from typing import Optional, Sequence
+from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import select, update
 
 from ..models.dynamic_db_models import UserDBType
-from ..models.dynamic_models import UserBase, UserCreateType, UserPublicDBType
+from ..models.dynamic_models import (
+    ID_FIELD,
+    PASSWORD_FIELD,
+    TOKEN_EPOCH_FIELD,
+    UserBase,
+    UserCreateType,
+    UserPublicDBType,
+)
 from .base_generic_crud import CRUD
 
 
@@ -37,3 +45,50 @@ class UserCRUD(CRUD[UserPublicDBType, UserCreateType, UserDBType]):
                 )
             )
         return rsp_list
+
+    async def read_db_by_valid_field(
+        self, user: UserBase, session: AsyncSession
+    ) -> Optional[UserDBType]:  # type: ignore # this is class, not var
+        """Return the stored row (password hash included) whose unique
+        field exactly matches the valid field of user, or None.
+        """
+        field, text = user.get_valid_field
+        result = await session.execute(
+            select(self.db_entity).where(
+                getattr(self.db_entity, field) == text
+            )
+        )
+        return result.scalars().one_or_none()
+
+    async def read_db(
+        self, id: UUID, session: AsyncSession
+    ) -> Optional[UserDBType]:  # type: ignore # this is class, not var
+        """Return the stored row (password hash included) or None."""
+        result = await session.execute(
+            select(self.db_entity).where(
+                getattr(self.db_entity, ID_FIELD) == id
+            )
+        )
+        return result.scalars().one_or_none()
+
+    async def update_password(
+        self, id: UUID, hashed_password: str, session: AsyncSession
+    ) -> None:
+        await session.execute(
+            update(self.db_entity)
+            .where(getattr(self.db_entity, ID_FIELD) == id)
+            .values({PASSWORD_FIELD: hashed_password})
+        )
+
+    async def bump_token_epoch(
+        self, id: UUID, session: AsyncSession
+    ) -> Optional[int]:
+        """Increment the user's token epoch, return it (None if no user)."""
+        epoch_column = getattr(self.db_entity, TOKEN_EPOCH_FIELD)
+        result = await session.execute(
+            update(self.db_entity)
+            .where(getattr(self.db_entity, ID_FIELD) == id)
+            .values({TOKEN_EPOCH_FIELD: epoch_column + 1})
+            .returning(epoch_column)
+        )
+        return result.scalar_one_or_none()
@@ -43,6 +43,14 @@ logout_200 = {
         "application/json": {"example": {"detail": "Successfully logged out."}}
     },
 }
+logout_all_200 = {
+    "description": "Every token of the user is revoked.",
+    "content": {
+        "application/json": {
+            "example": {"detail": "Successfully logged out everywhere."}
+        }
+    },
+}
 create_response_400 = {
     "description": (
         "Bad Request. User could not be created. "
@@ -112,6 +120,31 @@ response_404 = {
     },
 }
 
+response_503 = {
+    "description": (
+        "Service Unavailable. Too many password hashing requests are "
+        "already in progress. Retry after the number of seconds "
+        "in the Retry-After header."
+    ),
+    "content": {
+        "application/json": {
+            "example": {"detail": "Service is busy, retry later."},
+        }
+    },
+}
+
+client_token_503 = {
+    "description": (
+        "Service Unavailable. No client token is configured for this "
+        "endpoint and it was not explicitly opened."
+    ),
+    "content": {
+        "application/json": {
+            "example": {"detail": "INTROSPECTION_TOKEN is not configured."},
+        }
+    },
+}
+
 response_400_general = {
     "description": (
         "Bad Request. An error occurred while processing the request. "
@@ -123,3 +156,192 @@ response_400_general = {
         }
     },
 }
+
+revoke_200 = {
+    "description": (
+        "The token is revoked, or was not a valid token in the first place."
+    ),
+    "content": {"application/json": {"example": {"detail": "Token revoked."}}},
+}
+
+revoke_user_200 = {
+    "description": "Every token issued to the user so far is revoked.",
+    "content": {
+        "application/json": {"example": {"detail": "User tokens revoked."}}
+    },
+}
+
+permission_403 = {
+    "description": (
+        "Forbidden. The roles of the user do not allow this action, or "
+        "allow it only on the user's own resources."
+    ),
+    "content": {
+        "application/json": {"example": {"detail": "Not enough permissions."}}
+    },
+}
+
+roles_200 = {
+    "description": (
+        "Roles of the user and the permissions bitset they grant, default "
+        "role included. Changes apply to the user's next access token."
+    ),
+    "content": {
+        "application/json": {
+            "example": {
+                "user_id": "3fa85f64-5717-4562-b3fc-2c963f66afa6",
+                "roles": ["admin"],
+                "permissions": 1023,
+            }
+        }
+    },
+}
+
+verify_204 = {
+    "description": (
+        "The access token is valid. The user and token claims are returned "
+        "in the headers, the body is empty."
+    ),
+    "headers": {
+        "X-User-Id": {
+            "description": "User GUID.",
+            "schema": {"type": "string"},
+        },
+        "X-Token-Id": {
+            "description": "Token id (jti).",
+            "schema": {"type": "string"},
+        },
+        "X-Token-Expires": {
+            "description": "Token expiry, unix seconds.",
+            "schema": {"type": "integer"},
+        },
+        "X-User-Permissions": {
+            "description": "Permissions bitset of the token (perm claim).",
+            "schema": {"type": "integer"},
+        },
+    },
+}
+
+verify_401 = {
+    "description": "No access token, or it is invalid, expired or revoked.",
+    "headers": {
+        "WWW-Authenticate": {
+            "description": "Bearer",
+            "schema": {"type": "string"},
+        },
+    },
+}
+
+introspect_200 = {
+    "description": "Whether the token is active and, if it is, its claims.",
+    "content": {
+        "application/json": {
+            "example": {
+                "active": True,
+                "token_type": "access_token",
+                "sub": "af926384-fa75-4da9-a5b2-1d81f2e1e5f8",
+                "id": "af926384-fa75-4da9-a5b2-1d81f2e1e5f8",
+                "ep": 0,
+                "jti": "2B1NNIJaM48aLRYzRBNaXw",
+                "iat": 1792345224,
+                "exp": 1792346124,
+            }
+        }
+    },
+}
+
+introspect_batch_200 = {
+    "description": "Introspection results in the order of the tokens.",
+    "content": {
+        "application/json": {
+            "example": {
+                "results": [
+                    {
+                        "active": True,
+                        "token_type": "access_token",
+                        "sub": "af926384-fa75-4da9-a5b2-1d81f2e1e5f8",
+                        "id": "af926384-fa75-4da9-a5b2-1d81f2e1e5f8",
+                        "ep": 0,
+                        "jti": "2B1NNIJaM48aLRYzRBNaXw",
+                        "iat": 1792345224,
+                        "exp": 1792346124,
+                    },
+                    {"active": False},
+                ]
+            }
+        }
+    },
+}
+
+revocation_list_200 = {
+    "description": (
+        "Revoked token ids with their expiry and user token epochs with "
+        "the expiry of the tokens they revoke."
+    ),
+    "content": {
+        "application/json": {
+            "example": {
+                "tokens": {"2B1NNIJaM48aLRYzRBNaXw": 1792346124},
+                "users": {
+                    "af926384-fa75-4da9-a5b2-1d81f2e1e5f8": [2, 1794937224]
+                },
+            }
+        }
+    },
+}
+
+events_200 = {
+    "description": (
+        "Event stream. snapshot: {tokens, users, keys}, token: {jti, exp}, "
+        "user: {user, epoch, exp}, keys: {keys} (fetch the JWKS again)."
+    ),
+    "content": {
+        "text/event-stream": {
+            "example": (
+                "id: 9480d523-7\nevent: token\n"
+                'data: {"jti":"2B1NNIJaM48aLRYzRBNaXw","exp":1792346124}\n\n'
+            )
+        }
+    },
+}
+
+metrics_200 = {
+    "description": "Metrics of all workers in the Prometheus text format.",
+    "content": {
+        "text/plain": {
+            "example": (
+                "# HELP http_requests_total Finished requests by route "
+                "template and status code.\n"
+                "# TYPE http_requests_total counter\n"
+                'http_requests_total{method="GET",route="/user/{user_id}",'
+                'status="200"} 42.0\n'
+            )
+        }
+    },
+}
+
+profiles_200 = {
+    "description": "Stored request profiles, newest first.",
+    "content": {
+        "application/json": {
+            "example": [
+                {
+                    "id": "1792346124512-4211-0",
+                    "method": "POST",
+                    "path": "/auth/register",
+                    "status": 200,
+                    "duration_ms": 231.4,
+                    "created": 1792346124.74,
+                }
+            ]
+        }
+    },
+}
+
+profile_200 = {
+    "description": (
+        "The profile as a pstats dump, or with format=text the functions "
+        "with the most cumulative time."
+    ),
+    "content": {"application/octet-stream": {}, "text/plain": {}},
+}
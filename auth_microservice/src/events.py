@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import secrets
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from dotenv import load_dotenv
+
+from .logger import base_logger
+from .revocation import RevocationList, revocation_list
+from .signing_keys import KeyRing, access_key_ring
+
+load_dotenv()
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "1024"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+HEARTBEAT = b": ping\n\n"
+
+
+def format_event(event_id: str, event: str, data: dict) -> bytes:
+    return (
+        f"id: {event_id}\nevent: {event}\n"
+        f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+    ).encode()
+
+
+class EventHub:
+    """Per-worker Server-Sent Events fan-out of revocations and key
+    changes for services that verify tokens locally.\n
+    Every event is serialized once and the same bytes are queued for
+    every subscriber, nothing is read from the database. Event ids are
+    ``<worker>-<sequence>``: a subscriber reconnecting with the id of its
+    last event gets the events it missed from a ring buffer of the last
+    EVENTS_BUFFER_SIZE, anybody else (new subscriber, another worker,
+    too old id) starts from a ``snapshot`` event. Subscribers that fall
+    EVENTS_QUEUE_SIZE events behind are disconnected and resume.
+    """
+
+    def __init__(
+        self,
+        revocations: RevocationList = revocation_list,
+        key_ring: KeyRing = access_key_ring,
+        buffer_size: int = EVENTS_BUFFER_SIZE,
+        queue_size: int = EVENTS_QUEUE_SIZE,
+        heartbeat: float = EVENTS_HEARTBEAT,
+    ) -> None:
+        self.revocations = revocations
+        self.key_ring = key_ring
+        self.instance = secrets.token_hex(4)
+        self.sequence = 0
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.buffer: deque[tuple[int, bytes]] = deque(maxlen=buffer_size)
+        self.subscribers: set[asyncio.Queue[Optional[bytes]]] = set()
+        self._snapshot: tuple[tuple[int, int], bytes] = ((-1, -1), b"")
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.instance}-{self.sequence}"
+
+    def publish(self, event: str, data: dict) -> None:
+        self.sequence += 1
+        message = format_event(self.last_event_id, event, data)
+        self.buffer.append((self.sequence, message))
+        for queue in list(self.subscribers):
+            if queue.qsize() < self.queue_size:
+                queue.put_nowait(message)
+                continue
+            # the spare slot ends the stream after what it already has
+            base_logger.warning("Event subscriber is too slow, dropped")
+            self.subscribers.discard(queue)
+            queue.put_nowait(None)
+
+    def snapshot(self) -> bytes:
+        """``snapshot`` event, serialized once per revocation list and
+        key ring state.
+        """
+        state = (self.revocations.version, self.key_ring.generation)
+        cached_state, message = self._snapshot
+        if cached_state != state:
+            message = format_event(
+                self.last_event_id,
+                "snapshot",
+                {**self.revocations.snapshot(), "keys": state[1]},
+            )
+            self._snapshot = (state, message)
+        return message
+
+    def backlog(self, last_event_id: str) -> Optional[list[bytes]]:
+        """Events after last_event_id, None when they are not all known."""
+        instance, _, sequence = last_event_id.partition("-")
+        if instance != self.instance or not sequence.isdigit():
+            return None
+        after = int(sequence)
+        oldest = self.buffer[0][0] if self.buffer else self.sequence + 1
+        if after > self.sequence or after < oldest - 1:
+            return None
+        return [message for number, message in self.buffer if number > after]
+
+    async def stream(self, last_event_id: str = "") -> AsyncIterator[bytes]:
+        queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(
+            self.queue_size + 1
+        )
+        self.subscribers.add(queue)
+        try:
+            backlog = self.backlog(last_event_id) if last_event_id else None
+            if backlog is None:
+                backlog = [self.snapshot()]
+            for buffered in backlog:
+                yield buffered
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.subscribers.discard(queue)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "sequence": self.sequence,
+            "buffered": len(self.buffer),
+        }
+
+
+event_hub = EventHub()
+revocation_list.listeners.append(event_hub.publish)
+
+
+def publish_key_change() -> None:
+    """Tell subscribers to fetch the JWKS again."""
+    event_hub.publish("keys", {"keys": event_hub.key_ring.generation})
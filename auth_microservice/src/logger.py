@@ -1,47 +1,284 @@
+import atexit
+import copy
+import json
 import os
+import queue
+import re
 import sys
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Union
 
 from dotenv import load_dotenv
 from loguru import logger
 
+if TYPE_CHECKING:
+    from loguru import Record
+
 load_dotenv()
 
 IS_TO_FILE = os.getenv("IS_TO_FILE", "False")
 ROTATION = os.getenv("ROTATION", "1 day")
 RETENTION = os.getenv("RETENTION", "30 days")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+# one JSON object per line instead of LOG_FORMAT
+LOG_JSON = os.getenv("LOG_JSON", "False") == "True"
+# records waiting for the writer thread, more are dropped and counted
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.2"))
+# values of these keys never reach a sink, wherever they are nested
+REDACTED_FIELDS = frozenset(
+    field.strip().lower()
+    for field in os.getenv(
+        "LOG_REDACTED_FIELDS",
+        "password,access_token,refresh_token,token,tokens,code_verifier,"
+        "authorization,cookie,set-cookie,secret,client_secret",
+    ).split(",")
+    if field.strip()
+)
+REDACTED = "[REDACTED]"
 LOG_FORMAT = (
     "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
     "<level>{level: <8}</level> | <cyan>{name}</cyan>:"
     "<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 )
+# "key": "value", key=value and key: value pairs of non-JSON text
+REDACT_PATTERN = re.compile(
+    r"(?P<key>\"?(?:"
+    + "|".join(re.escape(field) for field in sorted(REDACTED_FIELDS))
+    + r")\"?\s*[:=]\s*)(?P<value>\"(?:[^\"\\]|\\.)*\"|[^\s&;,}]+)",
+    re.IGNORECASE,
+)
 
-logger.remove()
-if IS_TO_FILE == "True":
-    logger.add(
+
+def redact(value: Any) -> Any:
+    """Copy of value with the values of REDACTED_FIELDS replaced."""
+    if isinstance(value, dict):
+        return {
+            key: (
+                REDACTED
+                if str(key).lower() in REDACTED_FIELDS
+                else redact(item)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        return redact_text(value)
+    return value
+
+
+def redact_text(text: str) -> str:
+    """Redact a JSON document, or key/value pairs of any other text."""
+    try:
+        document = json.loads(text)
+    except ValueError:
+        return REDACT_PATTERN.sub(
+            lambda match: match["key"]
+            + (f'"{REDACTED}"' if match["value"][0] == '"' else REDACTED),
+            text,
+        )
+    if not isinstance(document, (dict, list)):
+        return text
+    return json.dumps(redact(document), ensure_ascii=False)
+
+
+def redact_record(record: "Record") -> None:
+    """Patcher, runs only for records some sink's level lets through."""
+    if record["extra"]:
+        record["extra"] = redact(record["extra"])
+
+
+def json_format(record: "Record") -> str:
+    """Format of LOG_JSON sinks, the record is serialized only when it is
+    emitted.
+    """
+    document = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        exc_type, exc_value, _ = record["exception"]
+        document["exception"] = (
+            f"{getattr(exc_type, '__name__', '')}: {exc_value}"
+        )
+    record["extra"]["_json"] = json.dumps(
+        document, default=str, ensure_ascii=False
+    )
+    return "{extra[_json]}\n"
+
+
+def text_format(record: "Record") -> str:
+    """LOG_FORMAT followed by the record's fields as key=value."""
+    fields = " ".join(f"{key}={{extra[{key}]}}" for key in record["extra"])
+    line = LOG_FORMAT + (f" | {fields}" if fields else "")
+    return line + "\n{exception}"
+
+
+class BatchingSink:
+    """Loguru sink that hands formatted records to a writer thread through
+    a bounded queue.\n
+    Logging never blocks a request: when LOG_QUEUE_SIZE records are
+    waiting, new ones are dropped and counted, and the count is reported
+    with the next batch. The thread writes up to ``batch_size`` records
+    in one call, at least every ``flush_interval`` seconds. The thread
+    is a daemon, so ``close`` must run before exit (it is registered with
+    atexit) for the last records to be written; records logged after it
+    are written directly.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], None],
+        queue_size: int = LOG_QUEUE_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+    ) -> None:
+        self.target = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # None stops the thread, an Event is set once the batch before it
+        # is written
+        self.queue: queue.Queue[Union[str, threading.Event, None]] = (
+            queue.Queue(queue_size)
+        )
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self.run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        if self._closed:
+            self.write_batch([message])
+            return
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self) -> None:
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: list[str] = []
+            while True:
+                if item is None or isinstance(item, threading.Event):
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.write_batch(batch)
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def write_batch(self, batch: list[str]) -> None:
+        records = len(batch)
+        dropped = self.dropped - self._reported_dropped
+        if dropped:
+            self._reported_dropped += dropped
+            batch.append(
+                json.dumps({"level": "WARNING", "dropped_records": dropped})
+                + "\n"
+                if LOG_JSON
+                else f"WARNING | log queue full, {dropped} records dropped\n"
+            )
+        if not batch:
+            return
+        try:
+            self.target("".join(batch))
+        except Exception as e:
+            sys.stderr.write(f"Log batch of {records} records lost: {e}\n")
+            return
+        self.written += records
+
+    def drain(self, timeout: float = 5) -> bool:
+        """Wait until everything queued so far is written."""
+        if self._closed:
+            return True
+        written = threading.Event()
+        self.queue.put(written, timeout=timeout)
+        return written.wait(timeout)
+
+    def close(self, timeout: float = 5) -> None:
+        """Write everything queued so far and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            sys.stderr.write("Log writer stuck, queued records lost\n")
+            return
+        self._thread.join(timeout)
+
+    def stop(self) -> None:
+        """Called by loguru when the sink is removed."""
+        self.close()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+def write_stderr(text: str) -> None:
+    sys.stderr.write(text)
+    sys.stderr.flush()
+
+
+def file_writer() -> Callable[[str], None]:
+    """Raw writes through loguru's own file sink (rotation, retention) of
+    an independent copy of the logger.
+    """
+    writer = copy.deepcopy(logger)
+    writer.add(
         "./auth_microservice/logs/auth_microservice.log",
         rotation=ROTATION,
         retention=RETENTION,
-        format=LOG_FORMAT,
-        level="DEBUG",
-        enqueue=True,
-    )
-else:
-    logger.add(
-        sys.stderr,
-        format=LOG_FORMAT,
-        level="DEBUG",
-        enqueue=True,
+        format="{message}",
+        level=0,
     )
-base_logger = logger
-
-# logger.debug("This is a debug message.")
-
-# logger.info("This is an info message.")
+    raw = writer.opt(raw=True)
+    return lambda text: raw.log(LOG_LEVEL, text)
 
-# logger.success("This is a success message.")
 
-# logger.warning("This is a warning message.")
+logger.remove()
+logger.configure(patcher=redact_record)
+log_sink = BatchingSink(
+    file_writer() if IS_TO_FILE == "True" else write_stderr
+)
+logger.add(
+    log_sink,
+    format=json_format if LOG_JSON else text_format,
+    level=LOG_LEVEL,
+    colorize=not LOG_JSON and IS_TO_FILE != "True" and sys.stderr.isatty(),
+)
+# the writer thread is a daemon, write what is queued before exiting
+atexit.register(log_sink.close)
+MIN_LEVEL = logger.level(LOG_LEVEL).no
+base_logger = logger
 
-# logger.error("This is an error message.")
 
-# logger.critical("This is a critical message.")
+def log_enabled(level: str) -> bool:
+    """Whether records of level are emitted, to skip building them."""
+    return logger.level(level).no >= MIN_LEVEL
@@ -1,21 +1,65 @@
-import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from starlette.middleware.base import _StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 
-from .logger import base_logger
+from .access_log import AccessLogMiddleware
+from .connection import LISTEN_DSN
+from .gateway import VERIFY_PATH, VerifyMiddleware
+from .logger import log_sink
+from .metrics import MetricsMiddleware, metrics_registry
+from .password_utils import shutdown_hash_executor
+from .profiling import PROFILING, ProfilingMiddleware
+from .revocation import RevocationListener
 from .routers.auth_router import auth_router
+from .routers.events_router import events_router
+from .routers.introspection_router import introspection_router
+from .routers.metrics_router import metrics_router
 from .routers.pkce_router import pkce_router
+from .routers.profile_router import profile_router
 from .routers.reg_log_router import reg_log_router
+from .routers.revocation_router import revocation_router
+from .routers.role_router import role_router
 from .routers.ui_router import ui_router
 from .routers.user_router import user_router
+from .routers.well_known_router import well_known_router
+from .server_timing import SERVER_TIMING, ServerTimingMiddleware
+from .signing_keys import reload_signal
+from .token_utils import reload_signing_keys
+from .views.revocation_view import RevocationView
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    loop = asyncio.get_running_loop()
+    signum = reload_signal()
+    try:
+        if signum is not None:
+            loop.add_signal_handler(signum, reload_signing_keys)
+    except (ValueError, RuntimeError, NotImplementedError):
+        # not the main thread (e.g. TestClient) or no unix signals
+        signum = None
+    revocation_listener = RevocationListener(
+        LISTEN_DSN, RevocationView.load_snapshot, RevocationView.purge_expired
+    )
+    revocation_task = asyncio.create_task(revocation_listener.run())
+    metrics_registry.start()
+    yield
+    revocation_task.cancel()
+    metrics_registry.stop()
+    if signum is not None:
+        loop.remove_signal_handler(signum)
+    shutdown_hash_executor()
+    # the shutdown records above included, atexit stops the writer
+    await asyncio.to_thread(log_sink.drain)
 
 
 def get_application() -> FastAPI:
-    application = FastAPI(root_path="/auth")
+    application = FastAPI(root_path="/auth", lifespan=lifespan)
     application.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -28,51 +72,28 @@ def get_application() -> FastAPI:
     application.include_router(reg_log_router)
     application.include_router(user_router)
     application.include_router(pkce_router)
+    application.include_router(well_known_router)
+    application.include_router(revocation_router)
+    application.include_router(introspection_router)
+    application.include_router(events_router)
+    application.include_router(role_router)
+    application.include_router(metrics_router)
+    application.include_router(profile_router)
     return application
 
 
 app = get_application()
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next) -> Response:
-    log_string = ""
-    client_ip = f"user_ip: {request.client.host}" if request.client else ""
-    log_string += f"Request: {request.method} {request.url}, {client_ip}\n"
-    headers = request.headers
-    if headers:
-        log_string += f"Request Headers: {headers}\n"
-    cookies = request.cookies
-    if cookies:
-        log_string += f"Request Cookies: {cookies}\n"
-    body = await request.body()
-    if body:
-        log_string += f"Request Body: \n{body.decode()}\n"
-    query_params = request.query_params
-    if query_params:
-        log_string += f"Query Parameters: {query_params}\n"
-    start = time.monotonic()
-    response: _StreamingResponse = await call_next(request)
-    log_string += f"Response Status Code: {response.status_code}\n"
-    elapsed_time = time.monotonic() - start
-    log_string += f"Request Time: {elapsed_time:.4f} seconds\n"
-    response_body = b"".join([chunk async for chunk in response.body_iterator])
-    response.headers["Content-Length"] = str(len(response_body))
-    if not any(
-        route in request.url.path for route in ["docs", "openapi.json", "ui/"]
-    ):
-        if 200 <= response.status_code <= 399:
-            log_string += f"Response result: {response_body.decode()}\n"
-            base_logger.info(f"Info about request:\n{log_string}")
-        else:
-            log_string += f"Response result: {response_body.decode()}\n"
-            base_logger.error(f"Info about request:\n{log_string}")
-    return Response(
-        content=response_body,
-        status_code=response.status_code,
-        media_type=response.media_type,
-        headers=response.headers,
-    )
+if PROFILING:
+    app.add_middleware(ProfilingMiddleware)
+if SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(AccessLogMiddleware)
+# gateway subrequests skip the access log and routing
+app.add_middleware(VerifyMiddleware)
+# outermost, so the gateway fast path is measured too
+app.add_middleware(MetricsMiddleware, paths=(VERIFY_PATH,))
 
 
 @app.get("/docs", include_in_schema=False)
@@ -0,0 +1,602 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # not on windows, exited workers' files are kept there
+    fcntl = None  # type: ignore
+
+from .access_log import route_path
+from .logger import log_sink
+
+load_dotenv()
+# directory shared by the workers of one host, every worker writes its
+# samples there and a scrape of any worker merges them; empty keeps the
+# samples of the scraped worker only
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# totals of the exited workers of METRICS_DIR
+RETAINED_FILE = "retained.json"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+)
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        """For totals counted elsewhere, set by a collector."""
+        self.value = value
+
+    def sample(self) -> float:
+        return self.value
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramValue:
+    """Per bucket counts (not cumulative, the last one is +Inf) and sum."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def sample(self) -> list:
+        return [list(self.counts), self.sum]
+
+
+class Metric:
+    """Family of samples of one name, one child per label values."""
+
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        (registry or metrics_registry).register(self)
+
+    def new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} labels: {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self.new_child())
+        return child
+
+    def family(self) -> dict:
+        with self._lock:
+            children = list(self._children.items())
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": [
+                [list(labels), child.sample()] for labels, child in children
+            ],
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """Summed over the live workers when they are merged."""
+
+    type = "gauge"
+
+    def new_child(self) -> GaugeValue:
+        return GaugeValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        registry: Optional["MetricsRegistry"] = None,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def new_child(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def family(self) -> dict:
+        return {**super().family(), "buckets": list(self.buckets)}
+
+
+class MetricsRegistry:
+    """Metrics of this process and, with a ``directory``, of its siblings.\n
+    Every process writes a snapshot of its samples to
+    ``<pid>-<start ns>.json`` in the directory every ``flush_interval``
+    seconds (and right before it answers a scrape), so a worker reusing
+    the pid of an exited one never overwrites its file. A scrape merges
+    all snapshots: gauges only count while their worker is alive, and the
+    counters and histograms of exited workers are folded into
+    ``retained.json`` and their files removed, so totals never go down.
+    Nothing is shared while serving requests, an update is a dict lookup
+    and an addition.
+    """
+
+    def __init__(
+        self,
+        directory: str = METRICS_DIR,
+        flush_interval: float = METRICS_FLUSH_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+        self.collector_errors = 0
+        self._write_lock = threading.Lock()
+        self._instance = (0, "")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Run collector before every snapshot, to copy state kept
+        elsewhere (queue depths, cache stats) into the metrics.
+        """
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception:
+                self.collector_errors += 1
+        return {
+            "pid": os.getpid(),
+            "instance": self.instance(),
+            "metrics": {
+                name: metric.family() for name, metric in self.metrics.items()
+            },
+        }
+
+    def instance(self) -> str:
+        """Id of this process, new after a fork: ``<pid>-<start ns>``."""
+        pid = os.getpid()
+        if self._instance[0] != pid:
+            self._instance = (pid, f"{pid}-{time.time_ns()}")
+        return self._instance[1]
+
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.instance()}.json")
+
+    def write(self) -> None:
+        """Replace this process's snapshot file atomically."""
+        snapshot = self.snapshot()
+        with self._write_lock:
+            self.write_file(self.instance() + ".json", snapshot)
+
+    def read(self) -> list[dict]:
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # the file of a worker that is being replaced or removed
+                continue
+        return snapshots
+
+    def collect(self) -> dict:
+        """Merged metric families of every worker."""
+        if not self.directory:
+            return self.snapshot()["metrics"]
+        self.write()
+        if fcntl is None:
+            return merge_snapshots(self.read())
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            # one worker at a time folds, nothing is counted twice
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return merge_snapshots(self.fold_exited(self.read()))
+
+    def fold_exited(
+        self,
+        snapshots: list[dict],
+        alive: Optional[Callable[[int], bool]] = None,
+    ) -> list[dict]:
+        """Fold the counters and histograms of exited workers into the
+        retained snapshot and remove their files, return the snapshots
+        left to merge. Call it holding the directory lock.
+        """
+        exited = exited_instances(snapshots, alive or pid_alive)
+        retained: dict = next(
+            (one for one in snapshots if one.get("retained")),
+            {"retained": True, "pid": 0, "folded": [], "metrics": {}},
+        )
+        # ids of removed files are not needed anymore
+        folded = set(retained["folded"]) & {
+            one.get("instance") for one in snapshots
+        }
+        fold = [
+            one
+            for one in snapshots
+            if one.get("instance") in exited and one["instance"] not in folded
+        ]
+        if fold:
+            metrics = merge_snapshots([retained, *fold], alive=lambda _: False)
+            retained = {
+                **retained,
+                "folded": sorted(folded | {one["instance"] for one in fold}),
+                "metrics": {
+                    name: family
+                    for name, family in metrics.items()
+                    if family["type"] != "gauge"
+                },
+            }
+            # recorded as folded before the files go, a crash in between
+            # leaves files that are skipped, never counted twice
+            self.write_file(RETAINED_FILE, retained)
+        for instance in exited:
+            try:
+                os.remove(os.path.join(self.directory, instance + ".json"))
+            except FileNotFoundError:
+                continue
+        return [
+            retained,
+            *(
+                one
+                for one in snapshots
+                if not one.get("retained")
+                and one.get("instance") not in exited
+            ),
+        ]
+
+    def write_file(self, name: str, content: dict) -> None:
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "w") as file:
+            json.dump(content, file, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def render(self) -> str:
+        return render(self.collect())
+
+    def start(self) -> None:
+        """Start writing snapshots, called in every worker process."""
+        if not self.directory or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="metrics-writer", daemon=True
+        )
+        self._thread.start()
+
+    def run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.write()
+            except OSError:
+                continue
+
+    def stop(self) -> None:
+        """Stop the writer, the last totals stay for the other workers."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5)
+        self._thread = None
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+def pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def exited_instances(
+    snapshots: list[dict], alive: Callable[[int], bool] = pid_alive
+) -> set[str]:
+    """Instances of exited workers: their pid is gone, or a newer
+    instance reuses it.
+    """
+    newest: dict[int, str] = {}
+    for snapshot in snapshots:
+        instance = snapshot.get("instance")
+        if instance is None or snapshot.get("retained"):
+            continue
+        pid = snapshot["pid"]
+        if pid not in newest or start_ns(instance) > start_ns(newest[pid]):
+            newest[pid] = instance
+    return {
+        snapshot["instance"]
+        for snapshot in snapshots
+        if snapshot.get("instance") is not None
+        and not snapshot.get("retained")
+        and (
+            not alive(snapshot["pid"])
+            or newest[snapshot["pid"]] != snapshot["instance"]
+        )
+    }
+
+
+def start_ns(instance: str) -> int:
+    return int(instance.rpartition("-")[2])
+
+
+def add_samples(left: Any, right: Any) -> Any:
+    if isinstance(left, list):
+        counts = [a + b for a, b in zip(left[0], right[0])]
+        return [counts, left[1] + right[1]]
+    return left + right
+
+
+def merge_snapshots(
+    snapshots: list[dict], alive: Callable[[int], bool] = pid_alive
+) -> dict:
+    """Sum the samples with the same name and labels of all snapshots,
+    gauges only of live workers.
+    """
+    merged: dict[str, dict] = {}
+    samples: dict[str, dict[tuple, Any]] = {}
+    exited = exited_instances(snapshots, alive)
+    for snapshot in snapshots:
+        live = (
+            not snapshot.get("retained")
+            and alive(snapshot["pid"])
+            and snapshot.get("instance") not in exited
+        )
+        for name, family in snapshot["metrics"].items():
+            if name not in merged:
+                merged[name] = family
+                samples[name] = {}
+            if family["type"] == "gauge" and not live:
+                continue
+            target = samples[name]
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                previous = target.get(key)
+                target[key] = (
+                    value if previous is None else add_samples(previous, value)
+                )
+    return {
+        name: {
+            **family,
+            "samples": [
+                [list(labels), value]
+                for labels, value in samples[name].items()
+            ],
+        }
+        for name, family in merged.items()
+    }
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def format_labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (
+        (
+            name,
+            value.replace("\\", r"\\")
+            .replace('"', r"\"")
+            .replace("\n", r"\n"),
+        )
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render(metrics: dict) -> str:
+    """Prometheus text exposition format 0.0.4."""
+    lines = []
+    for name, family in sorted(metrics.items()):
+        documentation = (
+            family["help"].replace("\\", r"\\").replace("\n", r"\n")
+        )
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in sorted(family["samples"]):
+            pairs = list(zip(family["labelnames"], labels))
+            if family["type"] != "histogram":
+                lines.append(
+                    f"{name}{format_labels(pairs)} {format_value(value)}"
+                )
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(family["buckets"] + [math.inf], counts):
+                cumulative += count
+                bucket_labels = format_labels(
+                    pairs + [("le", format_value(bound))]
+                )
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{name}_sum{format_labels(pairs)} {format_value(total)}"
+            )
+            lines.append(f"{name}_count{format_labels(pairs)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+collector_errors = Counter(
+    "metrics_collector_errors_total",
+    "Collectors that failed while taking a snapshot.",
+)
+metrics_registry.on_collect(
+    lambda: collector_errors.labels().set(metrics_registry.collector_errors)
+)
+log_records = Counter(
+    "log_records_total",
+    "Log records written or dropped by the log writer thread.",
+    ("outcome",),
+)
+log_queue_depth = Gauge(
+    "log_queue_depth", "Log records waiting for the writer thread."
+)
+
+
+def collect_log_sink() -> None:
+    stats = log_sink.stats()
+    log_queue_depth.set(stats["queued"])
+    log_records.labels("written").set(stats["written"])
+    log_records.labels("dropped").set(stats["dropped"])
+
+
+metrics_registry.on_collect(collect_log_sink)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests being served."
+)
+http_requests = Counter(
+    "http_requests_total",
+    "Finished requests by route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from the request to the end of the response by route template.",
+    ("method", "route"),
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI request metrics labelled with the route template
+    (``/user/{user_id}``), never the URL, so the number of series is
+    bounded by the number of routes. Requests no route matched count as
+    ``unmatched``, except ``paths`` answered before routing (the gateway
+    fast path) which are labelled with their path.
+    """
+
+    def __init__(self, app: Callable, paths: tuple[str, ...] = ()) -> None:
+        self.app = app
+        self.paths = frozenset(paths)
+
+    def route(self, scope: dict[str, Any]) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return getattr(route, "path", "unmatched")
+        path = route_path(scope)
+        return path if path in self.paths else "unmatched"
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 0
+
+        async def send_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_status)
+        except BaseException:
+            status = status or 500
+            raise
+        finally:
+            http_requests_in_flight.dec()
+            method = scope["method"]
+            if method not in HTTP_METHODS:
+                method = "OTHER"
+            route = self.route(scope)
+            http_request_duration.labels(method, route).observe(
+                time.perf_counter() - start
+            )
+            http_requests.labels(method, route, status).inc()
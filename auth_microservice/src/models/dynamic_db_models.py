@@ -6,6 +6,7 @@ from sqlmodel import Field
 from .dynamic_models import (
     ID_FIELD,
     TABLE_NAME,
+    TOKEN_EPOCH_FIELD,
     UserCreateType,
     validate_from_db,
 )
@@ -16,6 +17,8 @@ field_definitions[ID_FIELD] = (
     uuid.UUID,
     Field(default_factory=uuid.uuid4, primary_key=True),
 )
+# bumped to revoke every token of the user at once, see revocation.py
+field_definitions[TOKEN_EPOCH_FIELD] = (int, Field(default=0))
 field_definitions["__tablename__"] = (str, TABLE_NAME)
 # UserType = create_model(
 #     "User",
@@ -6,11 +6,9 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from email_validator import EmailNotValidError, validate_email
-from pydantic import create_model, field_validator, model_validator
+from pydantic import SecretStr, create_model, field_validator, model_validator
 from sqlmodel import Field, SQLModel
 
-from ..password_utils import hash_password
-
 load_dotenv()
 USERNAME_FIELD = os.getenv("USERNAME_FIELD", "")
 EMAIL_FIELD = os.getenv("EMAIL_FIELD", "")
@@ -18,6 +16,7 @@ PHONE_FIELD = os.getenv("PHONE_FIELD", "")
 PASSWORD_FIELD = os.getenv("PASSWORD_FIELD", "")
 ID_FIELD = os.getenv("ID_FIELD", "")
 TABLE_NAME = os.getenv("TABLE_NAME", "")
+TOKEN_EPOCH_FIELD = os.getenv("TOKEN_EPOCH_FIELD", "token_epoch")
 
 
 def validate(cls, dict_values: dict) -> dict:
@@ -188,7 +187,6 @@ def _validate(cls, value: str) -> str:
 
     if not any(char.islower() for char in value):
         raise ValueError("Password should have at least one lowercase letter")
-    value = hash_password(value)
     return value
 
 
@@ -216,6 +214,56 @@ UserCreateType = create_model(
 )
 
 
+def _validate_secret(cls, value: SecretStr) -> SecretStr:
+    _validate(cls, value.get_secret_value())
+    return value
+
+
+field_definitions = {}
+field_definitions[PASSWORD_FIELD] = (
+    SecretStr,
+    Field(
+        min_length=9,
+        title="Password",
+        description=(
+            "The password of the user. Must "
+            "be greater than 8 characters long, "
+            "have at least one uppercase letter and "
+            "one lowercase letter and one number."
+        ),
+    ),
+)
+validators = {}
+validators["_validate"] = field_validator(PASSWORD_FIELD)(_validate_secret)
+# Carries the plaintext password only until CredentialView verifies or
+# hashes it, SecretStr keeps it out of reprs, logs and model_dump.
+UserCredentialsType = create_model(
+    "UserCredentials",
+    __base__=UserBaseType,
+    __validators__=validators,
+    **field_definitions,
+)
+
+
+class PasswordChange(SQLModel):
+    old_password: SecretStr = Field(
+        title="Old password",
+        description="The current password of the user.",
+    )
+    new_password: SecretStr = Field(
+        min_length=9,
+        title="New password",
+        description=(
+            "The new password of the user. Must "
+            "be greater than 8 characters long, "
+            "have at least one uppercase letter and "
+            "one lowercase letter and one number."
+        ),
+    )
+
+    _validate = field_validator("new_password")(_validate_secret)
+
+
 def validate_from_db(cls, dict_values: dict) -> dict:
     if any(
         True
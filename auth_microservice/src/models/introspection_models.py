@@ -0,0 +1,34 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlmodel import Field, SQLModel
+
+load_dotenv()
+INTROSPECTION_MAX_BATCH = int(os.getenv("INTROSPECTION_MAX_BATCH", "1000"))
+
+
+class IntrospectionRequest(SQLModel):
+    token: str = Field(
+        title="Token",
+        description="Access or refresh token to introspect.",
+    )
+    token_type_hint: Optional[str] = Field(
+        default=None,
+        title="Token type hint",
+        description="access_token or refresh_token, tried first (RFC 7662).",
+    )
+
+
+class BatchIntrospectionRequest(SQLModel):
+    tokens: list[str] = Field(
+        min_length=1,
+        max_length=INTROSPECTION_MAX_BATCH,
+        title="Tokens",
+        description="Access or refresh tokens to introspect.",
+    )
+    token_type_hint: Optional[str] = Field(
+        default=None,
+        title="Token type hint",
+        description="access_token or refresh_token, tried first (RFC 7662).",
+    )
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class RefreshFamily(SQLModel, table=True):
+    """Chain of rotated refresh tokens started by one login.\n
+    Only the refresh token whose ``jti`` is ``current_jti`` may be
+    rotated, presenting any older token of the family revokes it. The
+    one exception is ``previous_jti`` within a short grace period after
+    ``rotated_at``: a concurrent refresh with it gets the current token.
+    """
+
+    __tablename__ = "refresh_families"
+
+    family_id: str = Field(primary_key=True, max_length=32)
+    user_id: str = Field(max_length=64)
+    current_jti: str = Field(max_length=64)
+    previous_jti: Optional[str] = Field(default=None, max_length=64)
+    rotated_at: int = Field(default=0)
+    expires_at: int = Field(index=True)
+    revoked: bool = Field(default=False)
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class RevokedToken(SQLModel, table=True):
+    """Single revoked token, kept until the token itself expires."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti: str = Field(primary_key=True, max_length=64)
+    expires_at: int = Field(index=True)
+
+
+class RevokedUser(SQLModel, table=True):
+    """Latest token epoch bump of a user, every token of the user with an
+    older ``ep`` is revoked. The counter itself lives in the user row, this
+    row only tells the workers and is useless once the longest-lived of the
+    revoked tokens expires.
+    """
+
+    __tablename__ = "revoked_users"
+
+    user_id: str = Field(primary_key=True, max_length=64)
+    token_epoch: int
+    expires_at: int = Field(index=True)
+
+
+class RevocationRequest(SQLModel):
+    token: str = Field(
+        title="Token",
+        description="Access or refresh token to revoke.",
+    )
+    token_type_hint: Optional[str] = Field(
+        default=None,
+        title="Token type hint",
+        description="access_token or refresh_token, tried first (RFC 7009).",
+    )
@@ -0,0 +1,20 @@
+from sqlmodel import Field, SQLModel
+
+
+class UserRole(SQLModel, table=True):
+    """Role granted to a user, one row per role. Read when tokens are
+    issued, never when they are checked: the effective permissions travel
+    in the access token's ``perm`` claim.
+    """
+
+    __tablename__ = "user_roles"
+
+    user_id: str = Field(primary_key=True, max_length=64)
+    role: str = Field(primary_key=True, max_length=64)
+
+
+class RolesUpdate(SQLModel):
+    roles: list[str] = Field(
+        title="Roles",
+        description="Every role of the user besides the default role.",
+    )
@@ -1,20 +1,249 @@
+import asyncio
 import base64
 import binascii
 import hashlib
+import hmac
 import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field
+from typing import Optional
 
 from dotenv import load_dotenv
 
+from .server_timing import HASH, phase
+
+try:
+    from argon2.low_level import Type, hash_secret_raw
+except ImportError:  # argon2-cffi is optional, only needed for argon2id
+    hash_secret_raw = None  # type: ignore
+
 load_dotenv()
+# global salt of the legacy unversioned hashes, new hashes use per-user salts
 SALT = os.getenv("SALT", "do not use default!")
+LEGACY_ITERATIONS = 100000
+
+PBKDF2_SHA256 = "pbkdf2-sha256"
+SCRYPT = "scrypt"
+ARGON2ID = "argon2id"
+HASH_ALGORITHM = os.getenv("HASH_ALGORITHM", PBKDF2_SHA256)
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "100000"))
+SCRYPT_N = int(os.getenv("SCRYPT_N", "16384"))
+SCRYPT_R = int(os.getenv("SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("SCRYPT_P", "1"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+SALT_BYTES = 16
+DIGEST_BYTES = 32
+
+# "thread" is enough for PBKDF2 because hashlib releases the GIL,
+# "process" isolates hashing completely from the event loop process
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor: Optional[Executor] = None
+
+
+@dataclass(frozen=True)
+class HashParams:
+    """Algorithm and cost parameters of a password hash.\n
+    Encoded hashes look like ``$<algorithm>$<k=v,...>$<salt>$<digest>``
+    with unpadded base64 salt and digest, e.g.
+    ``$pbkdf2-sha256$i=100000$...$...``, ``$scrypt$n=16384,r=8,p=1$...$...``
+    or ``$argon2id$m=65536,t=3,p=4$...$...``.
+    """
+
+    algorithm: str
+    cost: dict[str, int] = field(default_factory=dict)
+
+    def encode_cost(self) -> str:
+        return ",".join(f"{key}={value}" for key, value in self.cost.items())
+
+    @classmethod
+    def from_strings(cls, algorithm: str, cost: str) -> "HashParams":
+        return cls(
+            algorithm,
+            {
+                key: int(value)
+                for key, value in (item.split("=") for item in cost.split(","))
+            },
+        )
+
+
+def configured_hash_params(algorithm: str = HASH_ALGORITHM) -> HashParams:
+    if algorithm == PBKDF2_SHA256:
+        return HashParams(PBKDF2_SHA256, {"i": PBKDF2_ITERATIONS})
+    if algorithm == SCRYPT:
+        return HashParams(
+            SCRYPT, {"n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P}
+        )
+    if algorithm == ARGON2ID:
+        if hash_secret_raw is None:
+            raise ImportError("argon2id hashing requires argon2-cffi")
+        return HashParams(
+            ARGON2ID,
+            {
+                "m": ARGON2_MEMORY_COST,
+                "t": ARGON2_TIME_COST,
+                "p": ARGON2_PARALLELISM,
+            },
+        )
+    raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+
+
+HASH_PARAMS = configured_hash_params()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def derive_key(password: str, salt: bytes, params: HashParams) -> bytes:
+    cost = params.cost
+    if params.algorithm == PBKDF2_SHA256:
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, cost["i"], DIGEST_BYTES
+        )
+    if params.algorithm == SCRYPT:
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt,
+            n=cost["n"],
+            r=cost["r"],
+            p=cost["p"],
+            maxmem=256 * cost["n"] * cost["r"] * cost["p"],
+            dklen=DIGEST_BYTES,
+        )
+    if params.algorithm == ARGON2ID and hash_secret_raw is not None:
+        return hash_secret_raw(
+            password.encode(),
+            salt,
+            time_cost=cost["t"],
+            memory_cost=cost["m"],
+            parallelism=cost["p"],
+            hash_len=DIGEST_BYTES,
+            type=Type.ID,
+        )
+    raise ValueError(f"Unsupported hash algorithm: {params.algorithm}")
 
 
-def hash_password(password: str) -> str:
-    iterations = 100000
-    dk = hashlib.pbkdf2_hmac(
-        "sha256", password.encode(), SALT.encode(), iterations
+def hash_password(password: str, params: HashParams = HASH_PARAMS) -> str:
+    salt = os.urandom(SALT_BYTES)
+    digest = derive_key(password, salt, params)
+    return (
+        f"${params.algorithm}${params.encode_cost()}"
+        f"${_b64encode(salt)}${_b64encode(digest)}"
     )
-    return binascii.hexlify(dk).decode()
+
+
+def parse_password_hash(
+    hashed_password: str,
+) -> tuple[HashParams, bytes, bytes]:
+    """Return params, salt and digest of an encoded hash.\n
+    Legacy hashes (hex PBKDF2 with the global SALT) are understood too,
+    so they keep working until they are rehashed on login.
+    """
+    if not hashed_password.startswith("$"):
+        return (
+            HashParams(PBKDF2_SHA256, {"i": LEGACY_ITERATIONS}),
+            SALT.encode(),
+            binascii.unhexlify(hashed_password),
+        )
+    _, algorithm, cost, salt, digest = hashed_password.split("$")
+    return (
+        HashParams.from_strings(algorithm, cost),
+        _b64decode(salt),
+        _b64decode(digest),
+    )
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        params, salt, digest = parse_password_hash(hashed_password)
+        return hmac.compare_digest(derive_key(password, salt, params), digest)
+    except (ValueError, KeyError, binascii.Error):
+        return False
+
+
+def needs_rehash(
+    hashed_password: str, params: HashParams = HASH_PARAMS
+) -> bool:
+    if not hashed_password.startswith("$"):
+        return True
+    try:
+        return parse_password_hash(hashed_password)[0] != params
+    except (ValueError, KeyError, binascii.Error):
+        return True
+
+
+def verify_and_update(
+    password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Verify password and, when the stored hash is outdated, return a
+    new hash made with the configured params (None otherwise).
+    """
+    if not verify_password(password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, hash_password(password)
+    return True, None
+
+
+def get_hash_executor() -> Executor:
+    """Return the executor used for password hashing.\n
+    The executor is created lazily, so importing this module in
+    a process that never hashes (or in a forked worker) costs nothing.
+    """
+    global _executor
+    if _executor is None:
+        if HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=HASH_WORKERS, thread_name_prefix="hash"
+            )
+    return _executor
+
+
+def shutdown_hash_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    with phase(HASH):
+        return await loop.run_in_executor(
+            get_hash_executor(), hash_password, password
+        )
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    with phase(HASH):
+        return await loop.run_in_executor(
+            get_hash_executor(), verify_password, password, hashed_password
+        )
+
+
+async def verify_and_update_async(
+    password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    with phase(HASH):
+        return await loop.run_in_executor(
+            get_hash_executor(), verify_and_update, password, hashed_password
+        )
 
 
 def generate_code_challenge(code_verifier: str) -> str:
@@ -0,0 +1,131 @@
+import json
+import os
+from enum import IntFlag
+from typing import Iterable, Optional
+from uuid import UUID
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Permission(IntFlag):
+    """Bits of the ``perm`` access token claim. Bits are never reused:
+    tokens issued before a change keep their meaning until they expire.
+    """
+
+    USER_READ_OWN = 1 << 0
+    USER_UPDATE_OWN = 1 << 1
+    USER_DELETE_OWN = 1 << 2
+    USER_READ = 1 << 3
+    USER_CREATE = 1 << 4
+    USER_UPDATE = 1 << 5
+    USER_DELETE = 1 << 6
+    TOKENS_REVOKE_OWN = 1 << 7
+    TOKENS_REVOKE = 1 << 8
+    ROLES_MANAGE = 1 << 9
+    PROFILES_MANAGE = 1 << 10
+    USER_LIST = 1 << 11
+
+
+ALL_PERMISSIONS = Permission(sum(Permission))
+DEFAULT_ROLES: dict[str, list[str]] = {
+    "user": [
+        "USER_READ_OWN",
+        "USER_UPDATE_OWN",
+        "USER_DELETE_OWN",
+        "USER_READ",
+        "TOKENS_REVOKE_OWN",
+    ],
+    "admin": [str(permission.name) for permission in Permission],
+}
+# role name -> list of Permission names, replaces DEFAULT_ROLES when set
+ROLES: dict[str, list[str]] = (
+    json.loads(os.getenv("ROLES", "") or "null") or DEFAULT_ROLES
+)
+# role every user has without a user_roles row
+DEFAULT_ROLE = os.getenv("DEFAULT_ROLE", "user")
+
+
+def compile_roles(roles: dict[str, list[str]]) -> dict[str, int]:
+    """Role name -> permission bitset, fails on unknown permission names."""
+    return {
+        role: int(sum((Permission[name] for name in names), Permission(0)))
+        for role, names in roles.items()
+    }
+
+
+ROLE_PERMISSIONS = compile_roles(ROLES)
+DEFAULT_PERMISSIONS = ROLE_PERMISSIONS.get(DEFAULT_ROLE, 0)
+
+
+def role_permissions(roles: Iterable[str]) -> int:
+    """Effective permissions of a user with roles, DEFAULT_ROLE included.
+    Roles no longer configured grant nothing.
+    """
+    permissions = DEFAULT_PERMISSIONS
+    for role in roles:
+        permissions |= ROLE_PERMISSIONS.get(role, 0)
+    return permissions
+
+
+def same_user(owner_id: Optional[str], user_id: str) -> bool:
+    """Whether owner_id is user_id, UUIDs compared by value so that any
+    spelling of one's own id (upper case, no dashes) matches.
+    """
+    if owner_id is None:
+        return False
+    try:
+        return UUID(owner_id) == UUID(user_id)
+    except ValueError:
+        return owner_id == user_id
+
+
+class PolicyTable:
+    """Precompiled authorization policies.\n
+    Every action maps to two masks: permissions allowing it on anybody
+    and permissions allowing it only on the caller's own resources. A
+    decision is one or two bitwise ANDs on the token's ``perm`` claim,
+    nothing is read from the database.
+    """
+
+    def __init__(
+        self, rules: dict[str, tuple[Permission, Permission]]
+    ) -> None:
+        self.rules = {
+            action: (int(any_mask), int(own_mask))
+            for action, (any_mask, own_mask) in rules.items()
+        }
+
+    def masks(self, action: str) -> tuple[int, int]:
+        return self.rules[action]
+
+    def allows(
+        self,
+        action: str,
+        permissions: int,
+        user_id: str,
+        owner_id: Optional[str] = None,
+    ) -> bool:
+        any_mask, own_mask = self.rules[action]
+        if permissions & any_mask:
+            return True
+        return bool(permissions & own_mask) and same_user(owner_id, user_id)
+
+
+NOBODY = Permission(0)
+policies = PolicyTable(
+    {
+        "user:create": (Permission.USER_CREATE, NOBODY),
+        "user:list": (Permission.USER_LIST, NOBODY),
+        "user:read": (Permission.USER_READ, Permission.USER_READ_OWN),
+        "user:update": (Permission.USER_UPDATE, Permission.USER_UPDATE_OWN),
+        "user:delete": (Permission.USER_DELETE, Permission.USER_DELETE_OWN),
+        "tokens:revoke": (
+            Permission.TOKENS_REVOKE,
+            Permission.TOKENS_REVOKE_OWN,
+        ),
+        "roles:manage": (Permission.ROLES_MANAGE, NOBODY),
+        "profiles:manage": (Permission.PROFILES_MANAGE, NOBODY),
+    }
+)
@@ -0,0 +1,51 @@
+from .models.dynamic_models import ID_FIELD
+from .permissions import DEFAULT_PERMISSIONS
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class Principal:
+    """Authenticated caller, resolved from a verified token once per
+    request. ``claims`` is the verified payload and is read-only,
+    ``permissions`` is its ``perm`` bitset (DEFAULT_ROLE's for tokens
+    issued without one).
+    """
+
+    __slots__ = (
+        "user_id",
+        "token_type",
+        "expires_at",
+        "permissions",
+        "claims",
+    )
+
+    def __init__(
+        self,
+        user_id: str,
+        token_type: str,
+        expires_at: int,
+        claims: dict,
+        permissions: int = DEFAULT_PERMISSIONS,
+    ) -> None:
+        self.user_id = user_id
+        self.token_type = token_type
+        self.expires_at = expires_at
+        self.permissions = permissions
+        self.claims = claims
+
+    @classmethod
+    def from_claims(cls, claims: dict, token_type: str) -> "Principal":
+        return cls(
+            str(claims[ID_FIELD]),
+            token_type,
+            int(claims["exp"]),
+            claims,
+            int(claims.get("perm", DEFAULT_PERMISSIONS)),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Principal(user_id={self.user_id!r}, "
+            f"token_type={self.token_type!r}, expires_at={self.expires_at})"
+        )
@@ -0,0 +1,229 @@
+import asyncio
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from .access_log import RouteSampler, route_path
+from .gateway import gateway_token
+from .logger import base_logger
+from .models.dynamic_models import ID_FIELD
+from .permissions import DEFAULT_PERMISSIONS, policies
+from .token_utils import verify_access_token
+
+load_dotenv()
+# profiling middleware installed: requests with an X-Profile header of a
+# caller with the PROFILES_MANAGE permission, and a share of the others
+# per PROFILE_SAMPLE_RATES, are profiled
+PROFILING = os.getenv("PROFILING", "False") == "True"
+# JSON route path prefix -> share of its requests profiled, e.g.
+# {"/register": 0.001}
+PROFILE_SAMPLE_RATES: dict[str, float] = json.loads(
+    os.getenv("PROFILE_SAMPLE_RATES", "") or "{}"
+)
+# directory shared by the workers, the oldest profiles beyond
+# PROFILE_MAX_FILES are removed; outside the source tree by default
+PROFILE_DIR = os.getenv("PROFILE_DIR", "") or os.path.join(
+    tempfile.gettempdir(), "auth_microservice_profiles"
+)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID = re.compile(r"^\d+-\d+-\d+$")
+
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of request profiles.\n
+    Every profile is a ``pstats`` dump (``<id>.prof``, open it with
+    ``python -m pstats`` or snakeviz) next to its request summary
+    (``<id>.json``). Ids are ``<unix ms>-<pid>-<sequence>``, so workers
+    sharing the directory never collide and ids sort by age.
+    """
+
+    def __init__(
+        self,
+        directory: str = PROFILE_DIR,
+        max_profiles: int = PROFILE_MAX_FILES,
+    ) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._sequence = itertools.count()
+
+    def new_id(self) -> str:
+        milliseconds = time.time_ns() // 1_000_000
+        return f"{milliseconds}-{os.getpid()}-{next(self._sequence)}"
+
+    def path(self, profile_id: str, suffix: str) -> Optional[str]:
+        """Path of an existing file of the profile, None for unknown ids."""
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + suffix)
+        return path if os.path.isfile(path) else None
+
+    def ids(self) -> list[str]:
+        """Ids of the stored profiles, oldest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = [
+            name[: -len(".json")]
+            for name in names
+            if name.endswith(".json")
+            and PROFILE_ID.match(name[: -len(".json")])
+        ]
+        return sorted(
+            ids, key=lambda profile_id: tuple(map(int, profile_id.split("-")))
+        )
+
+    def save(
+        self, profile_id: str, profile: cProfile.Profile, info: dict
+    ) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+        profile.dump_stats(base + ".prof")
+        # the summary is written last, a profile is listed once complete
+        with open(base + ".json", "w") as file:
+            json.dump({"id": profile_id, **info}, file)
+        self.prune()
+
+    def prune(self) -> None:
+        ids = self.ids()
+        for profile_id in ids[: max(len(ids) - self.max_profiles, 0)]:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.remove(
+                        os.path.join(self.directory, profile_id + suffix)
+                    )
+                except FileNotFoundError:
+                    # removed by another worker
+                    continue
+
+    def list(self) -> list[dict]:
+        """Summaries of the stored profiles, newest first."""
+        profiles = []
+        for profile_id in reversed(self.ids()):
+            path = os.path.join(self.directory, profile_id + ".json")
+            try:
+                with open(path) as file:
+                    profiles.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def text(self, profile_id: str, limit: int = 50) -> Optional[str]:
+        """The ``limit`` functions of a profile with the most cumulative
+        time, as ``pstats`` prints them.
+        """
+        path = self.path(profile_id, ".prof")
+        if path is None:
+            return None
+        stream = io.StringIO()
+        stats = pstats.Stats(path, stream=stream)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running cProfile for selected requests.\n
+    A request is profiled when it carries an ``X-Profile`` header and the
+    access token (cookie or bearer) of a caller allowed
+    ``profiles:manage``, or when it is sampled per ``sample_rates``. Its
+    response gets an ``X-Profile-Id`` header, and the profile is saved to
+    the ``store`` once the response is sent. One request per worker is
+    profiled at a time. The profiler sees the event loop thread, so other
+    requests served meanwhile show up too, and work in executors (password
+    hashing) shows up as waiting. Added only when PROFILING is on; other
+    requests only pay for a header scan.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        store: ProfileStore = profile_store,
+        sample_rates: dict[str, float] = PROFILE_SAMPLE_RATES,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sampler = RouteSampler(sample_rates, default=0.0)
+        self.profiling = False
+
+    def selected(self, scope: dict[str, Any]) -> bool:
+        requested = False
+        cookie = authorization = ""
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                requested = True
+            elif name == b"cookie":
+                cookie = value.decode("latin-1")
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+        if requested:
+            token = gateway_token(cookie, authorization)
+            payload = verify_access_token(token) if token else None
+            if payload is not None and policies.allows(
+                "profiles:manage",
+                payload.get("perm", DEFAULT_PERMISSIONS),
+                str(payload.get(ID_FIELD, "")),
+            ):
+                return True
+        return self.sampler.sampled(route_path(scope))
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if (
+            scope["type"] != "http"
+            or self.profiling
+            or not self.selected(scope)
+        ):
+            return await self.app(scope, receive, send)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler (a debugger, coverage) owns the thread
+            return await self.app(scope, receive, send)
+        self.profiling = True
+        profile_id = self.store.new_id()
+        start = time.perf_counter()
+        status = 0
+
+        async def send_profile_id(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_profile_id)
+        finally:
+            profile.disable()
+            self.profiling = False
+            info = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "created": time.time(),
+            }
+            try:
+                await asyncio.to_thread(
+                    self.store.save, profile_id, profile, info
+                )
+            except OSError as e:
+                base_logger.warning(f"Profile {profile_id} not saved: {e}")
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import secrets
+import time
+from typing import Any, Callable, Optional
+
+import asyncpg
+from dotenv import load_dotenv
+
+from .logger import base_logger
+from .models.dynamic_models import ID_FIELD
+
+load_dotenv()
+REVOCATION_CHANNEL = os.getenv("REVOCATION_CHANNEL", "token_revocations")
+REVOCATION_PURGE_INTERVAL = int(os.getenv("REVOCATION_PURGE_INTERVAL", "60"))
+REVOCATION_RETRY_INTERVAL = 1
+
+
+class RevocationList:
+    """Per-worker view of the revoked tokens and user token epochs.\n
+    Checking a token is one dict lookup by ``jti`` plus one by user id,
+    no database round trip. A user's tokens are revoked all at once by
+    bumping the user's epoch: tokens whose ``ep`` claim is older than the
+    epoch in ``users`` are rejected. Entries carry the time the revoked
+    tokens expire and are purged after it, so the size is bounded by the
+    revocations within one token lifetime.
+    """
+
+    def __init__(self) -> None:
+        self.tokens: dict[str, int] = {}
+        self.users: dict[str, tuple[int, int]] = {}
+        # changes with every update, tags snapshots of this worker's list
+        self.instance = secrets.token_hex(4)
+        self.version = 0
+        # called with the event name and data of every change
+        self.listeners: list[Callable[[str, dict], None]] = []
+
+    def revoke_token(self, jti: str, expires_at: int) -> None:
+        if self.tokens.get(jti, 0) >= expires_at:
+            return
+        self.tokens[jti] = expires_at
+        self.changed("token", {"jti": jti, "exp": expires_at})
+
+    def revoke_user(self, user_id: str, epoch: int, expires_at: int) -> None:
+        current = self.users.get(user_id)
+        if current is None or current[0] < epoch:
+            self.users[user_id] = (epoch, expires_at)
+            self.changed(
+                "user", {"user": user_id, "epoch": epoch, "exp": expires_at}
+            )
+
+    def changed(self, event: str, data: dict) -> None:
+        self.version += 1
+        for listener in self.listeners:
+            listener(event, data)
+
+    def token_epoch(self, user_id: str) -> int:
+        """Epoch new tokens of the user are issued with."""
+        user = self.users.get(user_id)
+        return 0 if user is None else user[0]
+
+    def is_revoked(self, claims: dict) -> bool:
+        if claims.get("jti") in self.tokens:
+            return True
+        if self.users:
+            user = self.users.get(str(claims.get(ID_FIELD)))
+            if user is not None and claims.get("ep", 0) < user[0]:
+                return True
+        return False
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Forget entries whose tokens have expired, return their count."""
+        now = time.time() if now is None else now
+        tokens = [jti for jti, exp in self.tokens.items() if exp <= now]
+        for jti in tokens:
+            del self.tokens[jti]
+        users = [uid for uid, (_, exp) in self.users.items() if exp <= now]
+        for user_id in users:
+            del self.users[user_id]
+        if tokens or users:
+            self.version += 1
+        return len(tokens) + len(users)
+
+    def merge(
+        self,
+        tokens: dict[str, int],
+        users: dict[str, tuple[int, int]],
+    ) -> None:
+        """Add a snapshot, merging keeps events that raced with loading it."""
+        for jti, expires_at in tokens.items():
+            self.revoke_token(jti, expires_at)
+        for user_id, (epoch, expires_at) in users.items():
+            self.revoke_user(user_id, epoch, expires_at)
+
+    def apply(self, event: dict) -> None:
+        """Apply a revocation event, see ``token_event``/``user_event``."""
+        if "jti" in event:
+            self.revoke_token(event["jti"], event["exp"])
+        else:
+            self.revoke_user(event["user"], event["epoch"], event["exp"])
+
+    def etag(self) -> str:
+        return f'"{self.instance}-{self.version}"'
+
+    def snapshot(self) -> dict:
+        """Everything revoked, in the shape ``merge`` takes."""
+        return {"tokens": self.tokens, "users": self.users}
+
+    def stats(self) -> dict[str, int]:
+        return {"tokens": len(self.tokens), "users": len(self.users)}
+
+
+def token_event(jti: str, expires_at: int) -> str:
+    return json.dumps({"jti": jti, "exp": expires_at}, separators=(",", ":"))
+
+
+def user_event(user_id: str, epoch: int, expires_at: int) -> str:
+    return json.dumps(
+        {"user": user_id, "epoch": epoch, "exp": expires_at},
+        separators=(",", ":"),
+    )
+
+
+revocation_list = RevocationList()
+
+
+class RevocationListener:
+    """Keeps revocation_list of this worker in sync with Postgres.\n
+    LISTENs on REVOCATION_CHANNEL, where every revocation is NOTIFYed in
+    its own transaction, and loads a snapshot of the tables after each
+    (re)connect so nothing sent while disconnected is missed. Expired
+    entries are purged from memory and from the tables periodically.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        load_snapshot: Callable[[], Any],
+        purge_expired: Callable[[], Any],
+        revocations: RevocationList = revocation_list,
+    ) -> None:
+        self.dsn = dsn
+        self.load_snapshot = load_snapshot
+        self.purge_expired = purge_expired
+        self.revocations = revocations
+
+    def on_notification(
+        self, connection: Any, pid: int, channel: str, payload: str
+    ) -> None:
+        try:
+            self.revocations.apply(json.loads(payload))
+        except (ValueError, KeyError, TypeError) as e:
+            base_logger.error(f"Invalid revocation event {payload!r}: {e}")
+
+    async def listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        terminated = asyncio.Event()
+        connection.add_termination_listener(lambda _: terminated.set())
+        try:
+            await connection.add_listener(
+                REVOCATION_CHANNEL, self.on_notification
+            )
+            tokens, users = await self.load_snapshot()
+            self.revocations.merge(tokens, users)
+            base_logger.info(
+                f"Revocation list loaded: {self.revocations.stats()}"
+            )
+            while not terminated.is_set():
+                try:
+                    await asyncio.wait_for(
+                        terminated.wait(), REVOCATION_PURGE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    self.revocations.purge()
+                    await self.purge_expired()
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                base_logger.error(f"Revocation listener failed: {e}")
+            self.revocations.purge()
+            await asyncio.sleep(REVOCATION_RETRY_INTERVAL)
@@ -5,16 +5,21 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..connection import connect_db_data
-from ..docs.responses import auth_200, auth_403, response_401
-from ..models.dynamic_models import ID_FIELD
+from ..dependencies.auth_dependency import resolve_principal
+from ..docs.responses import (
+    auth_200,
+    auth_403,
+    response_401,
+    verify_204,
+    verify_401,
+)
+from ..gateway import claim_headers, gateway_token
 from ..password_utils import generate_code_challenge
+from ..principal import REFRESH, Principal
 from ..routers.pkce_router import pkce_by_host, post_pkce
 from ..schemes.pkce_sheme import PKCE_scheme
-from ..token_utils import (
-    refresh_access_token,
-    verify_access_token,
-    verify_refresh_token,
-)
+from ..token_utils import set_refresh_token_cookie
+from ..views.refresh_view import RefreshView
 
 auth_router = APIRouter(tags=["Auth"])
 
@@ -45,8 +50,9 @@ async def auth(
     1. Checks if the `access_token` is present in the cookies and validates it.
     2. If the `access_token` is invalid or expired, it checks for a
     `refresh_token`.
-    3. If the `refresh_token` is valid, a new `access_token` is generated
-    and returned.
+    3. If the `refresh_token` is valid, a new `access_token` and the next
+    `refresh_token` of its family are returned. Reusing a rotated
+    `refresh_token` revokes the family.
     4. If neither token is valid, an HTTP 401 Unauthorized error is returned.
 
     ### Parameters:
@@ -67,32 +73,61 @@ async def auth(
             raise HTTPException(403, "Send true code_verifier")
     else:
         await post_pkce(request, pkce_sheme, session)
-    cookies = request.cookies
-    payload = (
-        verify_access_token(cookies["access_token"])
-        if cookies.get("access_token")
-        else None
-    )
-    if not payload:
+    principal = resolve_principal(request)
+    if principal is None:
         try:
-            refresh_token = (
-                cookies["refresh_token"]
-                if cookies.get("refresh_token")
-                else None
-            )
+            refresh_token = request.cookies.get("refresh_token")
             if not refresh_token:
                 raise HTTPException(
                     status_code=401, detail="Not authenticated"
                 )
-            payload = verify_refresh_token(refresh_token)
-            if not payload:
-                raise HTTPException(
-                    status_code=401, detail="Not authenticated"
-                )
-            response = JSONResponse(content=payload[ID_FIELD], status_code=200)
-            refresh_access_token(response, cookies["refresh_token"])
+            payload, access_token, new_refresh_token = (
+                await RefreshView.rotate(refresh_token, session)
+            )
+            principal = Principal.from_claims(payload, REFRESH)
+            request.state.principal = principal
+            response = JSONResponse(content=principal.user_id, status_code=200)
+            response.set_cookie(key="access_token", value=access_token)
+            set_refresh_token_cookie(response, new_refresh_token)
             return response
         except Exception as e:
             raise HTTPException(status_code=401, detail=f"Error: {e}")
     else:
-        return JSONResponse(content=payload[ID_FIELD], status_code=200)
+        return JSONResponse(content=principal.user_id, status_code=200)
+
+
+@auth_router.get(
+    "/verify",
+    status_code=204,
+    summary="Verify Access Token",
+    description=(
+        "Stateless check of the access token for reverse proxy subrequests "
+        "(nginx auth_request, envoy ext_authz). No body, no database."
+    ),
+    responses={204: verify_204, 401: verify_401},
+)
+async def verify(request: Request) -> Response:
+    """
+    Verifies the access token of the request for a gateway.
+
+    The token is checked against the verification cache and the in-memory
+    revocation list only, so a valid token never costs a database round
+    trip. Nothing is refreshed here: on 401 the client calls `/auth`.
+    Served by VerifyMiddleware ahead of routing, this route documents it
+    and answers only when the middleware is not installed.
+
+    ### Returns:
+    - **204**: `X-User-Id`, `X-Token-Id` and `X-Token-Expires` headers.
+    - **401**: the token is missing, invalid, expired or revoked.
+    """
+    headers = claim_headers(
+        gateway_token(
+            request.headers.get("cookie", ""),
+            request.headers.get("authorization", ""),
+        )
+    )
+    if headers is None:
+        return Response(
+            status_code=401, headers={"WWW-Authenticate": "Bearer"}
+        )
+    return Response(status_code=204, headers=headers)
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+
+from ..docs.responses import client_token_503, events_200, response_401
+from ..events import event_hub
+from .introspection_router import introspection_client
+
+events_router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@events_router.get(
+    "",
+    summary="Revocation and Key Events",
+    description=(
+        "Server-Sent Events stream of revocations, token epoch bumps and "
+        "signing key changes for services that verify tokens locally. "
+        "Starts with a snapshot unless resumed with Last-Event-ID."
+    ),
+    responses={
+        200: events_200,
+        401: response_401,
+        503: client_token_503,
+    },
+    dependencies=[Depends(introspection_client)],
+)
+async def stream_events(
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(
+        default=None, alias="Last-Event-ID"
+    ),
+) -> StreamingResponse:
+    return StreamingResponse(
+        event_hub.stream(last_event_id_header or last_event_id or ""),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
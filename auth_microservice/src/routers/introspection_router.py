@@ -0,0 +1,119 @@
+import hmac
+import json
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..connection import connect_db_data
+from ..docs.responses import (
+    client_token_503,
+    introspect_200,
+    introspect_batch_200,
+    response_401,
+)
+from ..models.introspection_models import (
+    BatchIntrospectionRequest,
+    IntrospectionRequest,
+)
+from ..views.introspection_view import IntrospectionView
+
+load_dotenv()
+# shared secret of the resource servers for /introspect, /events and
+# /revoke/list; without it they answer 503 unless INTROSPECTION_OPEN=True
+INTROSPECTION_TOKEN = os.getenv("INTROSPECTION_TOKEN", "")
+INTROSPECTION_OPEN = os.getenv("INTROSPECTION_OPEN", "False") == "True"
+
+introspection_router = APIRouter(prefix="/introspect", tags=["Introspection"])
+
+
+def require_bearer(
+    request: Request, secret: str, open_access: bool, setting: str
+) -> None:
+    """Let the request through if it carries ``secret`` as bearer token.\n
+    Without a ``secret`` the endpoint is closed (503) unless
+    ``open_access`` was opted into, a missing setting never exposes it.
+    """
+    if not secret:
+        if open_access:
+            return
+        raise HTTPException(
+            status_code=503, detail=f"{setting} is not configured."
+        )
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), secret.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail=f"{setting} is required as bearer token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def introspection_client(request: Request) -> None:
+    require_bearer(
+        request, INTROSPECTION_TOKEN, INTROSPECTION_OPEN, "INTROSPECTION_TOKEN"
+    )
+
+
+def json_response(content: object) -> Response:
+    """Serialize the whole result once, skipping response model handling."""
+    return Response(
+        content=json.dumps(content, separators=(",", ":")),
+        media_type="application/json",
+    )
+
+
+@introspection_router.post(
+    "",
+    summary="Introspect a Token",
+    description=(
+        "Returns whether an access or refresh token is active and its "
+        "claims (RFC 7662)."
+    ),
+    responses={
+        200: introspect_200,
+        401: response_401,
+        503: client_token_503,
+    },
+    dependencies=[Depends(introspection_client)],
+)
+async def introspect_token(
+    introspection: IntrospectionRequest,
+    session: AsyncSession = Depends(connect_db_data),
+) -> Response:
+    result = IntrospectionView.introspect(
+        introspection.token,
+        IntrospectionView.ordered_verifiers(introspection.token_type_hint),
+    )
+    results = await IntrospectionView.current_families([result], session)
+    return json_response(results[0])
+
+
+@introspection_router.post(
+    "/batch",
+    summary="Introspect Tokens",
+    description=(
+        "Introspects many tokens in one round trip, results come in the "
+        "order of the tokens."
+    ),
+    responses={
+        200: introspect_batch_200,
+        401: response_401,
+        503: client_token_503,
+    },
+    dependencies=[Depends(introspection_client)],
+)
+async def introspect_tokens(
+    introspection: BatchIntrospectionRequest,
+    session: AsyncSession = Depends(connect_db_data),
+) -> Response:
+    return json_response(
+        {
+            "results": await IntrospectionView.introspect_batch(
+                introspection.tokens, introspection.token_type_hint, session
+            )
+        }
+    )
@@ -0,0 +1,40 @@
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, Request, Response
+
+from ..docs.responses import client_token_503, metrics_200, response_401
+from ..metrics import CONTENT_TYPE, metrics_registry
+from .introspection_router import require_bearer
+
+load_dotenv()
+# bearer token of the Prometheus scraper; without it /metrics answers 503
+# unless METRICS_OPEN=True
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_OPEN = os.getenv("METRICS_OPEN", "False") == "True"
+
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+def metrics_scraper(request: Request) -> None:
+    require_bearer(request, METRICS_TOKEN, METRICS_OPEN, "METRICS_TOKEN")
+
+
+@metrics_router.get(
+    "",
+    summary="Prometheus Metrics",
+    description=(
+        "Request latency, status codes and in-flight requests per route, "
+        "hashing queue, token, cache, database pool and log metrics, "
+        "merged over the workers sharing METRICS_DIR."
+    ),
+    responses={
+        200: metrics_200,
+        401: response_401,
+        503: client_token_503,
+    },
+    dependencies=[Depends(metrics_scraper)],
+)
+def get_metrics() -> Response:
+    # not async: merging reads the snapshot files of the other workers
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
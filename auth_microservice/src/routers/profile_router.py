@@ -0,0 +1,62 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+
+from ..dependencies.auth_dependency import require
+from ..docs.responses import (
+    permission_403,
+    profile_200,
+    profiles_200,
+    response_401,
+    response_404,
+)
+from ..profiling import profile_store
+
+profile_router = APIRouter(
+    prefix="/profiles",
+    tags=["Profiles"],
+    dependencies=[Depends(require("profiles:manage"))],
+    responses={401: response_401, 403: permission_403},
+)
+
+
+@profile_router.get(
+    "",
+    summary="List Request Profiles",
+    description=(
+        "Profiles of the requests selected with the X-Profile header or "
+        "PROFILE_SAMPLE_RATES, newest first."
+    ),
+    responses={200: profiles_200},
+)
+def get_profiles() -> JSONResponse:
+    return JSONResponse(content=profile_store.list(), status_code=200)
+
+
+@profile_router.get(
+    "/{profile_id}",
+    summary="Download a Request Profile",
+    description=(
+        "The pstats dump of a profile (python -m pstats, snakeviz), or its "
+        "most expensive functions with format=text."
+    ),
+    responses={200: profile_200, 404: response_404},
+)
+def get_profile(
+    profile_id: str,
+    output: Literal["pstats", "text"] = Query("pstats", alias="format"),
+) -> Response:
+    if output == "text":
+        text = profile_store.text(profile_id)
+        if text is not None:
+            return PlainTextResponse(text)
+    else:
+        path = profile_store.path(profile_id, ".prof")
+        if path is not None:
+            return FileResponse(
+                path,
+                media_type="application/octet-stream",
+                filename=f"{profile_id}.prof",
+            )
+    raise HTTPException(status_code=404, detail="Profile not found")
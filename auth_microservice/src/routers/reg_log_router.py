@@ -1,30 +1,36 @@
-from typing import Sequence
+from typing import Optional, Sequence
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy.exc import IntegrityError, NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
 from ..connection import connect_db_data
+from ..dependencies.auth_dependency import auth_dependency
 from ..docs.responses import (
     logout_200,
+    logout_all_200,
     reg_response_400,
     response_400_general,
     response_401,
     response_403,
     response_404,
+    response_503,
 )
 from ..logger import base_logger
-from ..models.dynamic_db_models import UserDBType
 from ..models.dynamic_models import (
     ID_FIELD,
-    PASSWORD_FIELD,
-    UserCreateType,
+    PasswordChange,
+    UserCredentialsType,
     UserPublicDBType,
 )
+from ..principal import Principal
 from ..routers.user_router import get_my_user
-from ..token_utils import delete_cookie_tokens, set_cookie_tokens
+from ..token_utils import delete_cookie_tokens, evict_tokens, set_cookie_tokens
+from ..views.credential_view import CredentialView
+from ..views.refresh_view import RefreshView
+from ..views.revocation_view import RevocationView
+from ..views.role_view import RoleView
 
 reg_log_router = APIRouter(tags=["Registration/Login"])
 
@@ -40,31 +46,20 @@ reg_log_router = APIRouter(tags=["Registration/Login"])
     responses={
         401: response_401,
         400: reg_response_400,
+        503: response_503,
     },
 )
 async def register_user(
     request: Request,
-    user: UserCreateType,  # type: ignore # this is class, not var
+    user: UserCredentialsType,  # type: ignore # this is class, not var
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:  # type: ignore # this is class, not var
     try:
-        return await get_my_user(request, session)
+        return await get_session_user(request, session)
     except HTTPException:
         pass
-    try:
-        async with session.begin():
-            db_user = UserDBType(**user.model_dump())
-            session.add(db_user)
-    except IntegrityError as e:
-        try:
-            return await login_user(request, user, session)
-        except BaseException:
-            pass
-        base_logger.error(e)
-        raise HTTPException(
-            status_code=400, detail="User could not be registered."
-        )
-    return await login_user(request, user, session)
+    rsp_body, epoch = await CredentialView.register(user, session)
+    return await create_login_response(rsp_body, session, epoch)
 
 
 @reg_log_router.post(
@@ -80,56 +75,129 @@ async def register_user(
         400: response_400_general,
         403: response_403,
         404: response_404,
+        503: response_503,
     },
 )
 async def login_user(
     request: Request,
-    user: UserCreateType,  # type: ignore # this is class, not var
+    user: UserCredentialsType,  # type: ignore # this is class, not var
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:  # type: ignore # this is class, not var
     try:
-        return await get_my_user(request, session)
+        return await get_session_user(request, session)
     except HTTPException:
         pass
     try:
-        field, text = user.get_valid_field
-        result = await session.execute(
-            select(UserDBType).where(getattr(UserDBType, field) == text)
-        )
-        result = result.scalars().one()
-        if getattr(result, PASSWORD_FIELD) != getattr(user, PASSWORD_FIELD):
-            raise HTTPException(
-                status_code=403, detail="User provided incorrect data."
-            )
-        rsp_body = UserPublicDBType(**result.model_dump())
-    except IntegrityError as e:
-        base_logger.error(e)
-        raise HTTPException(status_code=404, detail="User not found.")
-    except NoResultFound as e:
-        base_logger.error(e)
-        raise HTTPException(status_code=404, detail="User not found.")
+        rsp_body, epoch = await CredentialView.authenticate(user, session)
     except HTTPException as e:
         base_logger.error(e)
         raise e
     except BaseException as e:
         base_logger.error(e)
         raise HTTPException(status_code=400, detail=f"Error: {e}")
+    return await create_login_response(rsp_body, session, epoch)
+
+
+async def get_session_user(
+    request: Request, session: AsyncSession
+) -> JSONResponse:
+    """Short-circuit register/login for a caller that already has a full
+    session: a valid access token plus a refresh token cookie.
+    """
+    if not request.cookies.get("refresh_token"):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return await get_my_user(request, session)
+
+
+async def create_login_response(
+    rsp_body: UserPublicDBType,  # type: ignore # this is class, not var
+    session: AsyncSession,
+    epoch: Optional[int] = None,
+) -> JSONResponse:
+    """Response with the user and a new session. epoch is the token epoch
+    of the user's row, the in-memory revocation list is only a fallback
+    for callers that did not load the row.
+    """
     model_dict = rsp_body.model_dump(exclude_none=True)
     model_dict[ID_FIELD] = str(model_dict[ID_FIELD])
     response = JSONResponse(content=model_dict, status_code=200)
-    set_cookie_tokens(response, rsp_body)
+    async with session.begin():
+        permissions = await RoleView.permissions(model_dict[ID_FIELD], session)
+    refresh_token = await RefreshView.start_family(
+        model_dict[ID_FIELD], session, epoch
+    )
+    set_cookie_tokens(response, rsp_body, refresh_token, permissions, epoch)
     return response
 
 
 @reg_log_router.post(
     "/logout",
     summary="Log Out a User",
-    description="Logs out a user by clearing their authentication cookies.",
+    description=(
+        "Logs out a user by revoking their tokens and clearing their "
+        "authentication cookies."
+    ),
     responses={200: logout_200},
 )
-async def logout_user() -> JSONResponse:
+async def logout_user(
+    request: Request, session: AsyncSession = Depends(connect_db_data)
+) -> JSONResponse:
+    await RevocationView.revoke_cookies(request.cookies, session)
+    evict_tokens(request.cookies)
     resp = JSONResponse(
         content={"detail": "Successfully logged out."}, status_code=200
     )
     delete_cookie_tokens(resp)
     return resp
+
+
+@reg_log_router.post(
+    "/logout/all",
+    summary="Log Out Everywhere",
+    description=(
+        "Revokes every token of the user, on all devices, and clears the "
+        "authentication cookies."
+    ),
+    responses={200: logout_all_200, 401: response_401, 404: response_404},
+)
+async def logout_everywhere(
+    request: Request,
+    principal: Principal = Depends(auth_dependency),
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    await RevocationView.revoke_user(UUID(principal.user_id), session)
+    evict_tokens(request.cookies)
+    resp = JSONResponse(
+        content={"detail": "Successfully logged out everywhere."},
+        status_code=200,
+    )
+    delete_cookie_tokens(resp)
+    return resp
+
+
+@reg_log_router.post(
+    "/password",
+    summary="Change Password",
+    description=(
+        "Changes the password of the user and revokes every token issued "
+        "with the old one. The caller gets fresh tokens."
+    ),
+    response_model=UserPublicDBType,
+    responses={
+        401: response_401,
+        403: response_403,
+        404: response_404,
+        503: response_503,
+    },
+)
+async def change_password(
+    request: Request,
+    change: PasswordChange,
+    principal: Principal = Depends(auth_dependency),
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    rsp_body, epoch = await CredentialView.change_password(
+        UUID(principal.user_id), change, session
+    )
+    evict_tokens(request.cookies)
+    return await create_login_response(rsp_body, session, epoch)
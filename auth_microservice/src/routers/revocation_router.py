@@ -0,0 +1,96 @@
+import json
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..connection import connect_db_data
+from ..dependencies.auth_dependency import auth_dependency, authorize
+from ..docs.responses import (
+    client_token_503,
+    permission_403,
+    response_401,
+    response_404,
+    revocation_list_200,
+    revoke_200,
+    revoke_user_200,
+)
+from ..models.revocation_models import RevocationRequest
+from ..principal import Principal
+from ..revocation import revocation_list
+from ..views.revocation_view import RevocationView
+from .introspection_router import introspection_client
+
+revocation_router = APIRouter(prefix="/revoke", tags=["Revocation"])
+
+
+@revocation_router.post(
+    "",
+    summary="Revoke a Token",
+    description=(
+        "Revokes an access or refresh token (RFC 7009). Holding the token "
+        "is enough to revoke it, invalid tokens are ignored."
+    ),
+    responses={200: revoke_200},
+)
+async def revoke_token(
+    revocation: RevocationRequest,
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    await RevocationView.revoke_token(
+        revocation.token, revocation.token_type_hint, session
+    )
+    return JSONResponse(content={"detail": "Token revoked."}, status_code=200)
+
+
+@revocation_router.post(
+    "/user/{id}",
+    summary="Revoke All Tokens of a User",
+    description=(
+        "Revokes every token issued to the user so far. Users may revoke "
+        "their own tokens, TOKENS_REVOKE allows revoking anybody's."
+    ),
+    responses={
+        200: revoke_user_200,
+        401: response_401,
+        403: permission_403,
+        404: response_404,
+    },
+)
+async def revoke_user(
+    id: UUID,
+    principal: Principal = Depends(auth_dependency),
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    authorize(principal, "tokens:revoke", str(id))
+    await RevocationView.revoke_user(id, session)
+    return JSONResponse(
+        content={"detail": "User tokens revoked."}, status_code=200
+    )
+
+
+@revocation_router.get(
+    "/list",
+    summary="Revoked Tokens and Users",
+    description=(
+        "Snapshot of the revocation list for services that verify tokens "
+        "locally. Poll it with If-None-Match, unchanged lists answer 304."
+    ),
+    responses={
+        200: revocation_list_200,
+        401: response_401,
+        503: client_token_503,
+    },
+    dependencies=[Depends(introspection_client)],
+)
+async def revocation_snapshot(request: Request) -> Response:
+    etag = revocation_list.etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=json.dumps(revocation_list.snapshot(), separators=(",", ":")),
+        media_type="application/json",
+        headers=headers,
+    )
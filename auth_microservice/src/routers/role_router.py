@@ -0,0 +1,56 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..connection import connect_db_data
+from ..dependencies.auth_dependency import require
+from ..docs.responses import (
+    permission_403,
+    response_400_general,
+    response_401,
+    response_404,
+    roles_200,
+)
+from ..models.role_models import RolesUpdate
+from ..views.role_view import RoleView
+
+role_router = APIRouter(
+    prefix="/roles",
+    tags=["Roles"],
+    dependencies=[Depends(require("roles:manage"))],
+    responses={401: response_401, 403: permission_403, 404: response_404},
+)
+
+
+@role_router.get(
+    "/{user_id}",
+    summary="Get User Roles",
+    description="Retrieves the roles of a user and their permissions.",
+    responses={200: roles_200},
+)
+async def get_roles(
+    user_id: UUID,
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    res = await RoleView.read(user_id, session)
+    return JSONResponse(content=res, status_code=200)
+
+
+@role_router.put(
+    "/{user_id}",
+    summary="Set User Roles",
+    description=(
+        "Replaces the roles of a user. They apply to the user's next access "
+        "token, revoke the user's tokens to apply them at once."
+    ),
+    responses={200: roles_200, 400: response_400_general},
+)
+async def put_roles(
+    user_id: UUID,
+    update: RolesUpdate,
+    session: AsyncSession = Depends(connect_db_data),
+) -> JSONResponse:
+    res = await RoleView.replace(user_id, update.roles, session)
+    return JSONResponse(content=res, status_code=200)
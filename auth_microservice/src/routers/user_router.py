@@ -1,17 +1,19 @@
 from typing import Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..connection import connect_db_data
-from ..dependencies.auth_dependency import auth_dependency
+from ..dependencies.auth_dependency import auth_dependency, authorize, require
 from ..docs.responses import (
     create_response_400,
     delete_response_400,
+    permission_403,
     response_401,
     response_404,
+    response_503,
     update_response_400,
 )
 from ..models.dynamic_models import (
@@ -20,14 +22,13 @@ from ..models.dynamic_models import (
     UserCreateType,
     UserPublicDBType,
 )
-from ..token_utils import verify_refresh_token
 from ..views.user_view import UserView
 
 user_router = APIRouter(
     prefix="/user",
     tags=["User"],
     dependencies=[Depends(auth_dependency)],
-    responses={401: response_401},
+    responses={401: response_401, 403: permission_403},
 )
 
 
@@ -35,10 +36,12 @@ user_router = APIRouter(
     "",
     summary="Create a New User",
     description="Creates a new user in the system.",
+    dependencies=[Depends(require("user:create"))],
     response_model=UserPublicDBType,
     response_model_exclude_none=True,
     responses={
         400: create_response_400,
+        503: response_503,
     },
 )
 async def post_user(
@@ -46,9 +49,6 @@ async def post_user(
     user: UserCreateType,  # type: ignore # this is class, not var
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
     res = await UserView.create(user, session)
     return JSONResponse(content=res, status_code=200)
 
@@ -57,6 +57,7 @@ async def post_user(
     "",
     summary="Get All Users",
     description="Retrieves a list of all users in the system.",
+    dependencies=[Depends(require("user:list"))],
     response_model=Sequence[UserPublicDBType],
     response_model_exclude_none=True,
 )
@@ -64,9 +65,6 @@ async def get_users(
     request: Request,
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
     res = await UserView.read_all(session)
     return JSONResponse(content=res, status_code=200)
 
@@ -85,15 +83,8 @@ async def get_my_user(
     request: Request,
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
-    if not request.cookies.get("refresh_token"):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    payload = verify_refresh_token(request.cookies["refresh_token"])
-    if not payload:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    res = await UserView.read(UUID(payload[ID_FIELD]), session)
+    principal = await auth_dependency(request)
+    res = await UserView.read(UUID(principal.user_id), session)
     return JSONResponse(content=res, status_code=200)
 
 
@@ -101,6 +92,7 @@ async def get_my_user(
     "/{user_id}",
     summary="Get User by ID",
     description="Retrieves a user by their unique ID.",
+    dependencies=[Depends(require("user:read", owner="user_id"))],
     response_model=UserPublicDBType,
     response_model_exclude_none=True,
     responses={
@@ -112,9 +104,6 @@ async def get_user(
     user_id: str,
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
     res = await UserView.read(UUID(user_id), session)
     return JSONResponse(content=res, status_code=200)
 
@@ -123,6 +112,7 @@ async def get_user(
     "/user_by_field",
     summary="Get Users by Field",
     description="Retrieves users based on a specific field.",
+    dependencies=[Depends(require("user:list"))],
     response_model=Sequence[UserPublicDBType],
     response_model_exclude_none=True,
 )
@@ -131,9 +121,6 @@ async def get_users_by_field(
     user: UserBaseNotValidateType,  # type: ignore # this is class, not var
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
     res = await UserView.get_users_by_field(user, session)
     return JSONResponse(content=res, status_code=200)
 
@@ -154,9 +141,8 @@ async def update_user(
     user: UserPublicDBType,  # type: ignore # this is class, not var
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
+    principal = await auth_dependency(request)
+    authorize(principal, "user:update", str(getattr(user, ID_FIELD)))
     res = await UserView.update(user, session)
     return JSONResponse(content=res, status_code=200)
 
@@ -165,6 +151,7 @@ async def update_user(
     "/user/{user_id}",
     summary="Delete User",
     description="Deletes a user from the system by their unique ID.",
+    dependencies=[Depends(require("user:delete", owner="user_id"))],
     response_model=UserPublicDBType,
     response_model_exclude_none=True,
     responses={
@@ -177,8 +164,5 @@ async def delete_user(
     user_id: str,
     session: AsyncSession = Depends(connect_db_data),
 ) -> JSONResponse:
-    is_auth = await auth_dependency(request)
-    if not is_auth:
-        raise HTTPException(status_code=401, detail="You should be authorized")
     res = await UserView.delete(UUID(user_id), session)
     return JSONResponse(content=res, status_code=200)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Request, Response
+
+from ..signing_keys import access_key_ring, jwks
+
+load_dotenv()
+ISSUER = os.getenv("ISSUER", "http://localhost:8090/auth").rstrip("/")
+WELL_KNOWN_MAX_AGE = int(os.getenv("WELL_KNOWN_MAX_AGE", "3600"))
+
+well_known_router = APIRouter(
+    prefix="/.well-known",
+    tags=["Well-known"],
+)
+
+
+class StaticDocument:
+    """JSON document serialized once, served with ETag and Cache-Control.\n
+    The body, its ETag and the headers are computed at startup, a request
+    only compares If-None-Match and writes the prepared bytes.
+    """
+
+    def __init__(self, content: dict, max_age: int = WELL_KNOWN_MAX_AGE):
+        self.body = json.dumps(content, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+
+    def response(self, request: Request) -> Response:
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=self.headers)
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers=self.headers,
+        )
+
+
+def authorization_server_metadata() -> dict:
+    """RFC 8414 metadata of this service.\n
+    Only endpoints that speak the OAuth protocols are listed. /login and
+    /register take JSON and set cookies, they are neither a token endpoint
+    (no form-encoded grant_type) nor client registration (RFC 7591), and
+    there is no authorization endpoint, hence no response types.
+    """
+    return {
+        "issuer": ISSUER,
+        "jwks_uri": f"{ISSUER}/.well-known/jwks.json",
+        "revocation_endpoint": f"{ISSUER}/revoke",
+        "revocation_endpoint_auth_methods_supported": ["none"],
+        "introspection_endpoint": f"{ISSUER}/introspect",
+        "response_types_supported": [],
+        "code_challenge_methods_supported": ["S256"],
+        "service_documentation": f"{ISSUER}/docs",
+    }
+
+
+metadata_document = StaticDocument(authorization_server_metadata())
+_jwks_document = (access_key_ring.generation, StaticDocument(jwks()))
+
+
+def get_jwks_document() -> StaticDocument:
+    """JWKS document, rebuilt once after each key ring reload."""
+    global _jwks_document
+    generation, document = _jwks_document
+    if generation != access_key_ring.generation:
+        document = StaticDocument(jwks())
+        _jwks_document = (access_key_ring.generation, document)
+    return document
+
+
+@well_known_router.get(
+    "/jwks.json",
+    summary="JSON Web Key Set",
+    description="Public keys to verify access tokens locally.",
+)
+async def get_jwks(request: Request) -> Response:
+    return get_jwks_document().response(request)
+
+
+@well_known_router.get(
+    "/oauth-authorization-server",
+    summary="Authorization server metadata",
+    description="RFC 8414 metadata of the service.",
+)
+async def get_authorization_server_metadata(request: Request) -> Response:
+    return metadata_document.response(request)
@@ -0,0 +1,168 @@
+import os
+import time
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import Histogram
+
+load_dotenv()
+# phase timers of hashing, database and JWT work, reported in the
+# Server-Timing header and the phase_duration_seconds metric
+SERVER_TIMING = os.getenv("SERVER_TIMING", "False") == "True"
+PHASE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+HASH = "hash"
+DB = "db"
+JWT_SIGN = "jwt_sign"
+JWT_VERIFY = "jwt_verify"
+
+phase_duration = Histogram(
+    "phase_duration_seconds",
+    "Time of every hashing, database and JWT phase.",
+    ("phase",),
+    buckets=PHASE_BUCKETS,
+)
+
+
+class Timings:
+    """Total time and count of every phase of one request."""
+
+    __slots__ = ("phases",)
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self, total: float) -> str:
+        metrics = [
+            f'{name};dur={seconds * 1000:.2f};desc="{count:.0f}x"'
+            for name, (seconds, count) in self.phases.items()
+        ]
+        metrics.append(f"app;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+current_timings: ContextVar[Optional[Timings]] = ContextVar(
+    "server_timings", default=None
+)
+
+
+def record(name: str, seconds: float) -> None:
+    phase_duration.labels(name).observe(seconds)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+class Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        record(self.name, time.perf_counter() - self.start)
+
+
+NO_PHASE: AbstractContextManager = nullcontext()
+
+
+def phase(name: str) -> AbstractContextManager:
+    """Time the block as phase name, a shared no-op when SERVER_TIMING is
+    off.
+    """
+    return Phase(name) if SERVER_TIMING else NO_PHASE
+
+
+def before_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if context is not None:
+        context.phase_start = time.perf_counter()
+
+
+def after_cursor_execute(
+    conn: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    start = getattr(context, "phase_start", None)
+    if start is not None:
+        record(DB, time.perf_counter() - start)
+
+
+def time_queries(enabled: bool = True) -> None:
+    """Time every statement of every engine (all CRUD classes, flushes
+    included) as the db phase, or stop timing them.
+    """
+    for name, listener in (
+        ("before_cursor_execute", before_cursor_execute),
+        ("after_cursor_execute", after_cursor_execute),
+    ):
+        if enabled and not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+        elif not enabled and event.contains(Engine, name, listener):
+            event.remove(Engine, name, listener)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware collecting the phases of a request and adding
+    them to its ``Server-Timing`` header, e.g.
+    ``hash;dur=212.41;desc="1x", db;dur=3.10;desc="2x", app;dur=220.02``.
+    Phases after the response started (streaming bodies) are only
+    counted in the metrics. Added only when SERVER_TIMING is on.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: dict[str, Any], receive: Callable, send: Callable
+    ) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        timings = Timings()
+        token = current_timings.set(timings)
+
+        async def send_timings(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                header = timings.header(time.perf_counter() - start)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timings)
+        finally:
+            current_timings.reset(token)
+
+
+if SERVER_TIMING:
+    time_queries()
@@ -0,0 +1,306 @@
+import base64
+import hashlib
+import json
+import os
+import signal
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+from jwt.algorithms import get_default_algorithms
+
+from .logger import base_logger
+
+load_dotenv()
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_SECRET_KEY = os.getenv("ACCESS_SECRET_KEY", "do not use default!")
+ACCESS_PRIVATE_KEY_FILE = os.getenv("ACCESS_PRIVATE_KEY_FILE", "")
+SYMMETRIC_ALGORITHMS = ("HS256", "HS384", "HS512")
+# refresh tokens are only ever verified by this service, so with an
+# asymmetric access algorithm they stay on a shared secret by default
+REFRESH_ALGORITHM = os.getenv("REFRESH_ALGORITHM") or (
+    ALGORITHM if ALGORITHM in SYMMETRIC_ALGORITHMS else "HS256"
+)
+REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY", "do not use default!")
+REFRESH_PRIVATE_KEY_FILE = os.getenv("REFRESH_PRIVATE_KEY_FILE", "")
+# json manifest of the key rings, overrides the single key settings above
+KEY_RING_FILE = os.getenv("KEY_RING_FILE", "")
+KEY_RING_RELOAD_SIGNAL = os.getenv("KEY_RING_RELOAD_SIGNAL", "SIGHUP")
+
+ACTIVE = "active"
+VERIFY = "verify"
+RETIRED = "retired"
+KEY_STATUSES = (ACTIVE, VERIFY, RETIRED)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+class SigningKey:
+    """A JWT signing key with its parsed key objects.\n
+    Symmetric (HS*) keys sign and verify with the same secret, asymmetric
+    (RS*, PS*, ES*, EdDSA) keys sign with the private key and publish the
+    public one as a JWK so other services can verify tokens locally.
+    Key objects are built once here, never per encode/decode.
+    """
+
+    __slots__ = ("kid", "algorithm", "signing_key", "verifying_key", "status")
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Any,
+        verifying_key: Any,
+        kid: str,
+        status: str = ACTIVE,
+    ) -> None:
+        if status not in KEY_STATUSES:
+            raise ValueError(f"Unknown key status {status}")
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+        self.kid = kid
+        self.status = status
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.algorithm not in SYMMETRIC_ALGORITHMS
+
+    @classmethod
+    def from_secret(
+        cls,
+        secret: str,
+        algorithm: str,
+        kid: Optional[str] = None,
+        status: str = ACTIVE,
+    ) -> "SigningKey":
+        secret_bytes = secret.encode()
+        kid = kid or hashlib.sha256(secret_bytes).hexdigest()[:16]
+        return cls(algorithm, secret_bytes, secret_bytes, kid, status)
+
+    @classmethod
+    def from_pem(
+        cls,
+        pem: bytes,
+        algorithm: str,
+        kid: Optional[str] = None,
+        status: str = ACTIVE,
+    ) -> "SigningKey":
+        try:
+            algorithm_obj = get_default_algorithms()[algorithm]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported algorithm {algorithm}, asymmetric "
+                "algorithms require the cryptography package"
+            )
+        private_key = algorithm_obj.prepare_key(pem)
+        public_key = private_key.public_key()
+        public_jwk = algorithm_obj.to_jwk(public_key, as_dict=True)
+        return cls(
+            algorithm,
+            private_key,
+            public_key,
+            kid or jwk_thumbprint(public_jwk),
+            status,
+        )
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        algorithm: str,
+        kid: Optional[str] = None,
+        status: str = ACTIVE,
+    ) -> "SigningKey":
+        with open(path, "rb") as key_file:
+            content = key_file.read()
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            return cls.from_secret(
+                content.decode().strip(), algorithm, kid, status
+            )
+        return cls.from_pem(content, algorithm, kid, status)
+
+    def public_jwk(self) -> Optional[dict]:
+        """Return the public JWK of an asymmetric key (None for secrets)."""
+        if not self.is_asymmetric:
+            return None
+        algorithm_obj = get_default_algorithms()[self.algorithm]
+        jwk = algorithm_obj.to_jwk(self.verifying_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+    def __repr__(self) -> str:
+        return (
+            f"SigningKey(kid={self.kid!r}, algorithm={self.algorithm!r}, "
+            f"status={self.status!r})"
+        )
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    """RFC 7638 thumbprint of a public JWK."""
+    required = {
+        "RSA": ("e", "kty", "n"),
+        "EC": ("crv", "kty", "x", "y"),
+        "OKP": ("crv", "kty", "x"),
+    }[jwk["kty"]]
+    canonical = json.dumps(
+        {key: jwk[key] for key in required}, separators=(",", ":")
+    )
+    return _b64encode(hashlib.sha256(canonical.encode()).digest())
+
+
+def load_signing_key(
+    algorithm: str, secret: str, private_key_file: str
+) -> SigningKey:
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        return SigningKey.from_secret(secret, algorithm)
+    if not private_key_file:
+        raise ValueError(f"{algorithm} requires a private key file")
+    return SigningKey.from_file(private_key_file, algorithm)
+
+
+class KeyRing:
+    """Active, verify-only and retired keys of one token type.\n
+    New tokens are signed by the single active key, tokens are verified
+    by the key their ``kid`` header names (a dict lookup), so a rotated
+    out key keeps verifying its outstanding tokens while it is
+    ``verify`` and rejects them once it is ``retired``.
+    """
+
+    def __init__(self, name: str, keys: list[SigningKey]) -> None:
+        self.name = name
+        self.generation = 0
+        self.set_keys(keys)
+
+    @staticmethod
+    def index(name: str, keys: list[SigningKey]) -> dict[str, SigningKey]:
+        """Validate keys and return the verifying ones by kid."""
+        active = [key for key in keys if key.status == ACTIVE]
+        if len(active) != 1:
+            raise ValueError(
+                f"{name} key ring needs exactly one active key, "
+                f"got {len(active)}"
+            )
+        verifying: dict[str, SigningKey] = {}
+        for key in keys:
+            if key.status == RETIRED:
+                continue
+            if key.kid in verifying:
+                raise ValueError(
+                    f"{name} key ring has duplicate kid {key.kid}"
+                )
+            verifying[key.kid] = key
+        return verifying
+
+    def set_keys(
+        self,
+        keys: list[SigningKey],
+        verifying: Optional[dict[str, SigningKey]] = None,
+    ) -> None:
+        if verifying is None:
+            verifying = self.index(self.name, keys)
+        active = next(key for key in keys if key.status == ACTIVE)
+        # swapped as a whole, readers never see a half loaded ring
+        self.active, self.verifying, self.keys = active, verifying, keys
+        self.generation += 1
+
+    def verifying_key(self, kid: Optional[str]) -> SigningKey:
+        """Key to verify a token with the given ``kid`` header.\n
+        Tokens without ``kid`` (issued before key rings) are checked
+        against the active key. Raises KeyError for unknown or retired kids.
+        """
+        if kid is None:
+            return self.active
+        return self.verifying[kid]
+
+    def public_jwks(self) -> list[dict]:
+        return [
+            jwk
+            for jwk in (key.public_jwk() for key in self.verifying.values())
+            if jwk is not None
+        ]
+
+
+def _manifest_key(entry: dict, base_dir: str) -> SigningKey:
+    algorithm = entry["algorithm"]
+    kid = entry.get("kid")
+    status = entry.get("status", ACTIVE)
+    if "secret" in entry:
+        return SigningKey.from_secret(entry["secret"], algorithm, kid, status)
+    path = os.path.join(base_dir, entry["key_file"])
+    return SigningKey.from_file(path, algorithm, kid, status)
+
+
+def load_key_ring_manifest(path: str) -> dict[str, list[SigningKey]]:
+    """Read the keys of a manifest like::
+
+        {
+            "access": [
+                {"algorithm": "EdDSA", "key_file": "access-2.pem"},
+                {"algorithm": "EdDSA", "key_file": "access-1.pem",
+                 "status": "verify"}
+            ],
+            "refresh": [{"algorithm": "HS256", "key_file": "refresh.key"}]
+        }
+
+    ``key_file`` paths are relative to the manifest, HS* keys may give
+    the ``secret`` inline and any key may pin its ``kid``.
+    """
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return {
+        name: [_manifest_key(entry, base_dir) for entry in manifest[name]]
+        for name in ("access", "refresh")
+    }
+
+
+def configured_keys() -> dict[str, list[SigningKey]]:
+    if KEY_RING_FILE:
+        return load_key_ring_manifest(KEY_RING_FILE)
+    return {
+        "access": [
+            load_signing_key(
+                ALGORITHM, ACCESS_SECRET_KEY, ACCESS_PRIVATE_KEY_FILE
+            )
+        ],
+        "refresh": [
+            load_signing_key(
+                REFRESH_ALGORITHM, REFRESH_SECRET_KEY, REFRESH_PRIVATE_KEY_FILE
+            )
+        ],
+    }
+
+
+_keys = configured_keys()
+access_key_ring = KeyRing("access", _keys["access"])
+refresh_key_ring = KeyRing("refresh", _keys["refresh"])
+
+
+def reload_key_rings() -> bool:
+    """Re-read the keys from disk, a broken manifest keeps the old rings."""
+    try:
+        keys = configured_keys()
+        access = KeyRing.index("access", keys["access"])
+        refresh = KeyRing.index("refresh", keys["refresh"])
+    except (OSError, ValueError, KeyError) as e:
+        base_logger.error(f"Key rings were not reloaded: {e}")
+        return False
+    access_key_ring.set_keys(keys["access"], access)
+    refresh_key_ring.set_keys(keys["refresh"], refresh)
+    base_logger.info(
+        f"Key rings reloaded, access: {access_key_ring.active}, "
+        f"refresh: {refresh_key_ring.active}"
+    )
+    return True
+
+
+def reload_signal() -> Optional[signal.Signals]:
+    """Signal that reloads the key rings, None when disabled or unknown."""
+    return getattr(signal, KEY_RING_RELOAD_SIGNAL, None)
+
+
+def jwks() -> dict:
+    """JWK set of the public access token keys, refresh keys and shared
+    secrets are never published.
+    """
+    return {"keys": access_key_ring.public_jwks()}
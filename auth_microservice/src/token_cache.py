@@ -0,0 +1,97 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from .metrics import Counter, Gauge, metrics_registry
+
+load_dotenv()
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+class TokenCache:
+    """LRU cache of verified token payloads, each entry lives until the
+    token's ``exp``.\n
+    Keys are digests of the tokens, so the cache never holds the tokens
+    themselves. Returned payloads are shared between callers and must
+    be treated as read-only.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        if self.max_size <= 0 or "exp" not in payload:
+            return
+        key = self.key(token)
+        self._entries[key] = (payload, float(payload["exp"]))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(self.key(token), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+access_token_cache = TokenCache()
+refresh_token_cache = TokenCache()
+token_cache_lookups = Counter(
+    "token_cache_lookups_total",
+    "Verified token cache lookups, hit ratio = hit / (hit + miss).",
+    ("cache", "result"),
+)
+token_cache_size = Gauge(
+    "token_cache_size", "Tokens in the verified token cache.", ("cache",)
+)
+
+
+def collect_token_caches() -> None:
+    for name, cache in (
+        ("access", access_token_cache),
+        ("refresh", refresh_token_cache),
+    ):
+        token_cache_lookups.labels(name, "hit").set(cache.hits)
+        token_cache_lookups.labels(name, "miss").set(cache.misses)
+        token_cache_size.labels(name).set(len(cache))
+
+
+metrics_registry.on_collect(collect_token_caches)
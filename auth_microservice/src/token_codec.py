@@ -0,0 +1,184 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Optional
+
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import (
+    DecodeError,
+    ExpiredSignatureError,
+    ImmatureSignatureError,
+    InvalidAlgorithmError,
+    InvalidSignatureError,
+)
+
+from .signing_keys import KeyRing, SigningKey
+
+HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class KeyCodec:
+    """Signer and verifier of one signing key.\n
+    The encoded header is the one PyJWT writes for
+    ``headers={"kid": ...}`` (sorted ``alg``, ``kid``, ``typ``), so tokens
+    are byte-identical to ``jwt.encode``. HMAC keys are keyed once and
+    copied per token, other keys reuse the prepared key object.
+    """
+
+    __slots__ = ("key", "header", "_mac", "_algorithm")
+
+    def __init__(self, key: SigningKey) -> None:
+        self.key = key
+        header = {"alg": key.algorithm, "kid": key.kid, "typ": "JWT"}
+        self.header = b64encode(
+            json.dumps(header, separators=(",", ":"), sort_keys=True).encode()
+        )
+        self._mac: Optional[Any] = None
+        self._algorithm: Any = None
+        if key.algorithm in HMAC_DIGESTS:
+            self._mac = hmac.new(
+                key.signing_key, digestmod=HMAC_DIGESTS[key.algorithm]
+            )
+        else:
+            self._algorithm = get_default_algorithms()[key.algorithm]
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if self._mac is not None:
+            mac = self._mac.copy()
+            mac.update(signing_input)
+            return mac.digest()
+        return self._algorithm.sign(signing_input, self.key.signing_key)
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if self._mac is not None:
+            return hmac.compare_digest(self.sign(signing_input), signature)
+        return self._algorithm.verify(
+            signing_input, self.key.verifying_key, signature
+        )
+
+
+class TokenCodec:
+    """Fast-path JWT encoder/decoder over a key ring.\n
+    Tokens signed by ring keys are recognised by their header segment, so
+    decoding skips header parsing and finds the key with one dict lookup.
+    Other headers (e.g. tokens issued before ``kid``) are parsed and
+    looked up by ``kid`` like ``jwt.decode`` would. Codecs are rebuilt
+    when the ring is reloaded.\n
+    Only HMAC keys get markedly faster: the skipped PyJWT work is most of
+    an HS256 token's cost but noise next to an ES256, EdDSA or RS256
+    signature, which still runs in PyJWT's algorithm objects (see
+    ``python -m auth_microservice.bench jwt_codec``, roughly 0.9-1.3x).
+    """
+
+    def __init__(self, key_ring: KeyRing) -> None:
+        self.key_ring = key_ring
+        self.generation = -1
+        self.build()
+
+    def build(self) -> None:
+        self.active = KeyCodec(self.key_ring.active)
+        self.by_kid = {
+            kid: KeyCodec(key) for kid, key in self.key_ring.verifying.items()
+        }
+        self.by_header = {
+            codec.header: codec for codec in self.by_kid.values()
+        }
+        self.generation = self.key_ring.generation
+
+    def _current(self) -> None:
+        if self.generation != self.key_ring.generation:
+            self.build()
+
+    def encode(self, claims: dict) -> str:
+        self._current()
+        codec = self.active
+        signing_input = (
+            codec.header
+            + b"."
+            + b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        )
+        return (
+            signing_input + b"." + b64encode(codec.sign(signing_input))
+        ).decode()
+
+    def _codec_for_header(self, header: bytes) -> KeyCodec:
+        codec = self.by_header.get(header)
+        if codec is not None:
+            return codec
+        try:
+            header_data = json.loads(b64decode(header))
+        except ValueError:
+            raise DecodeError("Invalid header padding or json")
+        if not isinstance(header_data, dict):
+            raise DecodeError("Invalid header string: must be a json object")
+        kid = header_data.get("kid")
+        if kid is None:
+            codec = self.active
+        else:
+            try:
+                codec = self.by_kid[kid]
+            except (KeyError, TypeError):
+                raise InvalidSignatureError(f"Unknown key id {kid}")
+        if header_data.get("alg") != codec.key.algorithm:
+            raise InvalidAlgorithmError(
+                "The specified alg value is not allowed"
+            )
+        return codec
+
+    def decode(self, token: str, now: Optional[float] = None) -> dict:
+        """Verify signature, exp and nbf like ``jwt.decode`` with the ring
+        key's algorithm, raising the same ``jwt`` exceptions.
+        """
+        self._current()
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header, payload = signing_input.split(b".", 1)
+        except ValueError:
+            raise DecodeError("Not enough segments")
+        codec = self._codec_for_header(header)
+        try:
+            verified = codec.verify(signing_input, b64decode(signature))
+        except ValueError:
+            raise DecodeError("Invalid crypto padding")
+        if not verified:
+            raise InvalidSignatureError("Signature verification failed")
+        try:
+            claims = json.loads(b64decode(payload))
+        except ValueError:
+            raise DecodeError("Invalid payload padding or json")
+        if not isinstance(claims, dict):
+            raise DecodeError("Invalid payload string: must be a json object")
+        now = time.time() if now is None else now
+        if "exp" in claims:
+            try:
+                exp = int(claims["exp"])
+            except (ValueError, TypeError, OverflowError):
+                raise DecodeError(
+                    "Expiration Time claim (exp) must be an integer."
+                )
+            if exp <= now:
+                raise ExpiredSignatureError("Signature has expired")
+        if "nbf" in claims:
+            try:
+                nbf = int(claims["nbf"])
+            except (ValueError, TypeError, OverflowError):
+                raise DecodeError("Not Before claim (nbf) must be an integer.")
+            if nbf > now:
+                raise ImmatureSignatureError(
+                    "The token is not yet valid (nbf)"
+                )
+        return claims
@@ -1,110 +1,182 @@
-import datetime
 import os
+import secrets
+import time
 from typing import Optional
 
-import jwt
 from dotenv import load_dotenv
 from fastapi import Response
 
+from .events import publish_key_change
 from .logger import base_logger
+from .metrics import Counter
 from .models.dynamic_models import UserPublicType
+from .permissions import DEFAULT_PERMISSIONS
+from .revocation import revocation_list
+from .server_timing import JWT_SIGN, JWT_VERIFY, phase
+from .signing_keys import access_key_ring, refresh_key_ring, reload_key_rings
+from .token_cache import access_token_cache, refresh_token_cache
+from .token_codec import TokenCodec
 
 load_dotenv()
 ID_FIELD = os.getenv("ID_FIELD", "")
 ACCESS_TOKEN_EXP = int(os.getenv("ACCESS_TOKEN_EXP", "15"))
-ACCESS_SECRET_KEY = os.getenv("ACCESS_SECRET_KEY", "do not use default!")
 REFRESH_TOKEN_EXP = int(os.getenv("REFRESH_TOKEN_EXP", "30"))
-REFRESH_SECRET_KEY = os.getenv("REFRESH_SECRET_KEY", "do not use default!")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
+
+
+access_token_codec = TokenCodec(access_key_ring)
+refresh_token_codec = TokenCodec(refresh_key_ring)
+tokens_issued = Counter("jwt_issued_total", "Signed tokens.", ("token",))
+tokens_verified = Counter(
+    "jwt_verified_total",
+    "Token verifications, cached or decoded, by result.",
+    ("token", "result"),
+)
+
+
+def reload_signing_keys() -> None:
+    """Reload the key rings, forget tokens verified by the old ones and
+    tell the event subscribers.
+    """
+    if reload_key_rings():
+        access_token_cache.clear()
+        refresh_token_cache.clear()
+        publish_key_change()
+
+
+def token_claims(data: dict, lifetime: int) -> dict:
+    """Copy of data with a new ``jti``, ``iat`` and ``exp`` in lifetime
+    seconds, a string id and the user's token epoch ``ep``.
+
+    Callers that loaded the user's row pass its epoch in data, as do
+    refresh token claims. The in-memory revocation list is only the
+    fallback: a worker that has not loaded or has purged an epoch bump
+    would issue tokens that workers in sync reject.
+    """
+    now = int(time.time())
+    claims = {
+        **data,
+        "jti": secrets.token_urlsafe(16),
+        "iat": now,
+        "exp": now + lifetime,
+    }
+    if claims.get(ID_FIELD):
+        claims[ID_FIELD] = str(claims[ID_FIELD])
+    if "ep" not in claims:
+        claims["ep"] = revocation_list.token_epoch(claims.get(ID_FIELD, ""))
+    return claims
 
 
 def create_access_token(
     data: dict, expiration_minutes: int = ACCESS_TOKEN_EXP
 ) -> str:
-    expiration = datetime.datetime.now(
-        datetime.timezone.utc
-    ) + datetime.timedelta(minutes=expiration_minutes)
-    data["exp"] = expiration
-    if data.get(ID_FIELD):
-        data[ID_FIELD] = str(data[ID_FIELD])
-    token = jwt.encode(data, ACCESS_SECRET_KEY, algorithm=ALGORITHM)
-    return token
+    tokens_issued.labels("access").inc()
+    claims = token_claims(data, expiration_minutes * 60)
+    with phase(JWT_SIGN):
+        return access_token_codec.encode(claims)
 
 
 def create_refresh_token(
     data: dict, expiration_days: int = REFRESH_TOKEN_EXP
 ) -> str:
-    expiration = datetime.datetime.now(
-        datetime.timezone.utc
-    ) + datetime.timedelta(days=expiration_days)
-    data["exp"] = expiration
-    if data.get(ID_FIELD):
-        data[ID_FIELD] = str(data[ID_FIELD])
-    token = jwt.encode(data, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
-    return token
-
-
-def verify_access_token(token: str) -> Optional[dict]:
-    try:
-        payload = jwt.decode(token, ACCESS_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except BaseException as e:
-        base_logger.error(e)
+    tokens_issued.labels("refresh").inc()
+    claims = token_claims(data, expiration_days * 24 * 60 * 60)
+    with phase(JWT_SIGN):
+        return refresh_token_codec.encode(claims)
+
+
+def verify_access_token(
+    token: str, log_level: str = "ERROR"
+) -> Optional[dict]:
+    """Claims of a valid, unrevoked access token, else None. Tokens that do
+    not verify are logged at log_level.
+    """
+    payload = access_token_cache.get(token)
+    if payload is None:
+        try:
+            with phase(JWT_VERIFY):
+                payload = access_token_codec.decode(token)
+        except BaseException as e:
+            base_logger.log(log_level, e)
+            tokens_verified.labels("access", "invalid").inc()
+            return None
+        access_token_cache.put(token, payload)
+    if revocation_list.is_revoked(payload):
+        tokens_verified.labels("access", "revoked").inc()
         return None
-
-
-def verify_refresh_token(token: str) -> Optional[dict]:
-    try:
-        payload = jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except BaseException as e:
-        base_logger.error(e)
+    tokens_verified.labels("access", "valid").inc()
+    return payload
+
+
+def verify_refresh_token(
+    token: str, log_level: str = "ERROR"
+) -> Optional[dict]:
+    """Claims of a valid, unrevoked refresh token, else None. Tokens that do
+    not verify are logged at log_level.
+    """
+    payload = refresh_token_cache.get(token)
+    if payload is None:
+        try:
+            with phase(JWT_VERIFY):
+                payload = refresh_token_codec.decode(token)
+        except BaseException as e:
+            base_logger.log(log_level, e)
+            tokens_verified.labels("refresh", "invalid").inc()
+            return None
+        refresh_token_cache.put(token, payload)
+    if revocation_list.is_revoked(payload):
+        tokens_verified.labels("refresh", "revoked").inc()
         return None
-
-
-def refresh_access_token(response: Response, refresh_token: str) -> None:
-    payload = verify_refresh_token(refresh_token)
-    if not payload:
-        raise Exception("Invalid refresh token.")
-    new_access_token = create_access_token(data=payload)
-    response.set_cookie(
-        key="access_token",
-        value=new_access_token,
-    )
+    tokens_verified.labels("refresh", "valid").inc()
+    return payload
 
 
 def set_cookie_tokens(
     response: Response,
     rsp_body: UserPublicType,  # type: ignore # this is class, not var
+    refresh_token: str,
+    permissions: int = DEFAULT_PERMISSIONS,
+    epoch: Optional[int] = None,
 ):
-    set_access_token_cookie(response, rsp_body)
-    set_refresh_token_cookie(response, rsp_body)
+    """Set a new access token of the user and the given refresh token,
+    refresh tokens are issued with their family, see RefreshView.
+    """
+    set_access_token_cookie(response, rsp_body, permissions, epoch)
+    set_refresh_token_cookie(response, refresh_token)
 
 
 def set_access_token_cookie(
     response: Response,
     rsp_body: UserPublicType,  # type: ignore # this is class, not var
+    permissions: int = DEFAULT_PERMISSIONS,
+    epoch: Optional[int] = None,
 ):
-    access_token = create_access_token({ID_FIELD: getattr(rsp_body, ID_FIELD)})
+    """Set a new access token of the user, epoch is the token epoch of the
+    user's row when it was loaded (see token_claims).
+    """
+    data = {ID_FIELD: getattr(rsp_body, ID_FIELD), "perm": permissions}
+    if epoch is not None:
+        data["ep"] = epoch
+    access_token = create_access_token(data)
     response.set_cookie(
         key="access_token",
         value=access_token,
     )
 
 
-def set_refresh_token_cookie(
-    response: Response,
-    rsp_body: UserPublicType,  # type: ignore # this is class, not var
-):
-    refresh_token = create_refresh_token(
-        {ID_FIELD: getattr(rsp_body, ID_FIELD)}
-    )
+def set_refresh_token_cookie(response: Response, refresh_token: str):
     response.set_cookie(
         key="refresh_token",
         value=refresh_token,
     )
 
 
+def evict_tokens(cookies: dict[str, str]) -> None:
+    if cookies.get("access_token"):
+        access_token_cache.discard(cookies["access_token"])
+    if cookies.get("refresh_token"):
+        refresh_token_cache.discard(cookies["refresh_token"])
+
+
 def delete_cookie_tokens(response: Response):
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
@@ -0,0 +1,166 @@
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..admission import hash_limiter
+from ..crud.user_crud import UserCRUD
+from ..logger import base_logger
+from ..models.dynamic_db_models import UserDBType
+from ..models.dynamic_models import (
+    ID_FIELD,
+    PASSWORD_FIELD,
+    TOKEN_EPOCH_FIELD,
+    PasswordChange,
+    UserCreateType,
+    UserCredentialsType,
+    UserPublicDBType,
+)
+from ..password_utils import (
+    hash_password_async,
+    verify_and_update_async,
+    verify_password_async,
+)
+from ..revocation import revocation_list
+from .revocation_view import RevocationView
+
+
+class CredentialView:
+    """Verification stage for plaintext credentials.\n
+    Every method does the cheap user lookup first and hashes the password
+    at most once. Only a login of an unknown user skips PBKDF2; a taken
+    login, like any known user, costs one hash-and-compare even when the
+    password is wrong. Hashing itself waits for a hash_limiter slot.
+    Methods return the user and the token epoch of its row, the ``ep``
+    claim of the tokens issued next.
+    """
+
+    user_crud: UserCRUD = UserCRUD(
+        UserPublicDBType, UserCreateType, UserDBType
+    )
+
+    @classmethod
+    async def authenticate(
+        cls,
+        credentials: UserCredentialsType,  # type: ignore # this is class
+        session: AsyncSession,
+    ) -> tuple[UserPublicDBType, int]:  # type: ignore # this is class
+        async with session.begin():
+            db_user = await CredentialView.user_crud.read_db_by_valid_field(
+                credentials, session
+            )
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found.")
+        return await CredentialView.verify(credentials, db_user, session)
+
+    @classmethod
+    async def verify(
+        cls,
+        credentials: UserCredentialsType,  # type: ignore # this is class
+        db_user: UserDBType,  # type: ignore # this is class, not var
+        session: AsyncSession,
+    ) -> tuple[UserPublicDBType, int]:  # type: ignore # this is class
+        """Compare the password with the stored hash and transparently
+        rehash it when the stored params are outdated.
+        """
+        async with hash_limiter.slot():
+            is_valid, new_hash = await verify_and_update_async(
+                getattr(credentials, PASSWORD_FIELD).get_secret_value(),
+                getattr(db_user, PASSWORD_FIELD),
+            )
+        if not is_valid:
+            raise HTTPException(
+                status_code=403, detail="User provided incorrect data."
+            )
+        if new_hash:
+            async with session.begin():
+                await CredentialView.user_crud.update_password(
+                    getattr(db_user, ID_FIELD), new_hash, session
+                )
+        return (
+            UserPublicDBType(**db_user.model_dump()),
+            getattr(db_user, TOKEN_EPOCH_FIELD),
+        )
+
+    @classmethod
+    async def register(
+        cls,
+        credentials: UserCredentialsType,  # type: ignore # this is class
+        session: AsyncSession,
+    ) -> tuple[UserPublicDBType, int]:  # type: ignore # this is class
+        """Create a user or, if the login is already taken, authenticate
+        against the existing user.
+        """
+        async with session.begin():
+            db_user = await CredentialView.user_crud.read_db_by_valid_field(
+                credentials, session
+            )
+        if db_user is not None:
+            try:
+                return await CredentialView.verify(
+                    credentials, db_user, session
+                )
+            except HTTPException as e:
+                if e.status_code != 403:
+                    raise
+                base_logger.error(e)
+                raise HTTPException(
+                    status_code=400, detail="User could not be registered."
+                )
+        async with hash_limiter.slot():
+            hashed_password = await hash_password_async(
+                getattr(credentials, PASSWORD_FIELD).get_secret_value()
+            )
+        try:
+            async with session.begin():
+                db_user = UserDBType(
+                    **{
+                        **credentials.model_dump(),
+                        PASSWORD_FIELD: hashed_password,
+                    }
+                )
+                session.add(db_user)
+        except IntegrityError as e:
+            base_logger.error(e)
+            raise HTTPException(
+                status_code=400, detail="User could not be registered."
+            )
+        return (
+            UserPublicDBType(**db_user.model_dump()),
+            getattr(db_user, TOKEN_EPOCH_FIELD),
+        )
+
+    @classmethod
+    async def change_password(
+        cls, user_id: UUID, change: PasswordChange, session: AsyncSession
+    ) -> tuple[UserPublicDBType, int]:  # type: ignore # this is class
+        """Replace the password and bump the token epoch in the same
+        transaction, so every session of the user ends with the old one.
+        """
+        async with session.begin():
+            db_user = await CredentialView.user_crud.read_db(user_id, session)
+        if db_user is None:
+            raise HTTPException(status_code=404, detail="User not found.")
+        async with hash_limiter.slot():
+            is_valid = await verify_password_async(
+                change.old_password.get_secret_value(),
+                getattr(db_user, PASSWORD_FIELD),
+            )
+        if not is_valid:
+            raise HTTPException(
+                status_code=403, detail="User provided incorrect data."
+            )
+        async with hash_limiter.slot():
+            hashed_password = await hash_password_async(
+                change.new_password.get_secret_value()
+            )
+        async with session.begin():
+            await CredentialView.user_crud.update_password(
+                user_id, hashed_password, session
+            )
+            epoch, expires_at = await RevocationView.bump_token_epoch(
+                user_id, session
+            )
+        revocation_list.revoke_user(str(user_id), epoch, expires_at)
+        return UserPublicDBType(**db_user.model_dump()), epoch
@@ -0,0 +1,100 @@
+import time
+from functools import partial
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.refresh_family_crud import RefreshFamilyCRUD
+from ..models.dynamic_models import ID_FIELD
+from ..token_utils import verify_access_token, verify_refresh_token
+
+INACTIVE = {"active": False}
+
+
+class IntrospectionView:
+    """Token introspection (RFC 7662) on the verification caches and the
+    in-memory revocation list. Only refresh tokens of a family take a
+    database round trip, one per request, since rotating one out does not
+    revoke it.
+    """
+
+    refresh_family_crud: RefreshFamilyCRUD = RefreshFamilyCRUD()
+
+    # an inactive result is an answer, not an error: tokens of the other
+    # type, expired and forged ones are only logged at debug level
+    verifiers: list[tuple[str, Callable[[str], Optional[dict]]]] = [
+        ("access_token", partial(verify_access_token, log_level="DEBUG")),
+        ("refresh_token", partial(verify_refresh_token, log_level="DEBUG")),
+    ]
+
+    @classmethod
+    def ordered_verifiers(
+        cls, token_type_hint: Optional[str]
+    ) -> list[tuple[str, Callable[[str], Optional[dict]]]]:
+        if token_type_hint == "refresh_token":
+            return IntrospectionView.verifiers[::-1]
+        return IntrospectionView.verifiers
+
+    @classmethod
+    def introspect(
+        cls,
+        token: str,
+        verifiers: list[tuple[str, Callable[[str], Optional[dict]]]],
+    ) -> dict:
+        for token_type, verify in verifiers:
+            claims = verify(token)
+            if claims is not None:
+                return {
+                    "active": True,
+                    "token_type": token_type,
+                    "sub": str(claims.get(ID_FIELD, "")),
+                    **claims,
+                }
+        return INACTIVE
+
+    @classmethod
+    async def current_families(
+        cls, results: list[dict], session: AsyncSession
+    ) -> list[dict]:
+        """Results with the refresh tokens that are not the current token
+        of a live family (rotated out, or the family revoked or expired)
+        made inactive.
+        """
+        family_ids = {result["fam"] for result in results if "fam" in result}
+        if not family_ids:
+            return results
+        async with session.begin():
+            current = await IntrospectionView.refresh_family_crud.read_current(
+                family_ids, int(time.time()), session
+            )
+        return [
+            (
+                INACTIVE
+                if "fam" in result
+                and current.get(result["fam"]) != result["jti"]
+                else result
+            )
+            for result in results
+        ]
+
+    @classmethod
+    async def introspect_batch(
+        cls,
+        tokens: list[str],
+        token_type_hint: Optional[str],
+        session: AsyncSession,
+    ) -> list[dict]:
+        """Results in the order of tokens, a token repeated in the batch is
+        verified once.
+        """
+        verifiers = IntrospectionView.ordered_verifiers(token_type_hint)
+        seen: dict[str, dict] = {}
+        results = []
+        for token in tokens:
+            result = seen.get(token)
+            if result is None:
+                result = seen[token] = IntrospectionView.introspect(
+                    token, verifiers
+                )
+            results.append(result)
+        return await IntrospectionView.current_families(results, session)
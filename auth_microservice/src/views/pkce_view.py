@@ -44,7 +44,8 @@ class PKCEView:
 
     @classmethod
     async def read_by_host(cls, host: str, session: AsyncSession) -> dict:
-        pkce = await PKCEView.pkce_crud.read_by_host(host, session)
+        async with session.begin():
+            pkce = await PKCEView.pkce_crud.read_by_host(host, session)
         return PKCEView.create_rsp(pkce)
 
     @classmethod
@@ -0,0 +1,160 @@
+import os
+import secrets
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.refresh_family_crud import RefreshFamilyCRUD
+from ..logger import base_logger
+from ..revocation import revocation_list
+from ..single_flight import SingleFlight
+from ..token_utils import (
+    ID_FIELD,
+    REFRESH_TOKEN_EXP,
+    create_access_token,
+    refresh_token_codec,
+    token_claims,
+    verify_refresh_token,
+)
+from .revocation_view import RevocationView
+from .role_view import RoleView
+
+load_dotenv()
+REFRESH_GRACE_PERIOD = int(os.getenv("REFRESH_GRACE_PERIOD", "10"))
+REFRESH_LIFETIME = REFRESH_TOKEN_EXP * 24 * 60 * 60
+
+
+class RefreshView:
+    """Rotating refresh tokens.\n
+    Every login starts a family, its ``fam`` claim is the family id, and
+    every refresh swaps the family's current ``jti`` for a new token's in
+    one UPDATE ... RETURNING. A refresh token that is not current anymore
+    has been used already, so presenting it revokes the whole family,
+    including the token that replaced it. Refresh bursts are not reuse:
+    concurrent refreshes in one worker are coalesced by refresh_flight,
+    and within REFRESH_GRACE_PERIOD seconds of a rotation its previous
+    token gets the same next token, rebuilt from the family row.
+    """
+
+    refresh_family_crud: RefreshFamilyCRUD = RefreshFamilyCRUD()
+    refresh_flight: SingleFlight[tuple[dict, str, str]] = SingleFlight(
+        "Refresh"
+    )
+
+    @classmethod
+    async def start_family(
+        cls, user_id: str, session: AsyncSession, epoch: Optional[int] = None
+    ) -> str:
+        """Start a refresh token family for the user, return its token.
+        epoch is the token epoch of the user's row when it was loaded.
+        """
+        data: dict = {ID_FIELD: str(user_id), "fam": secrets.token_urlsafe(16)}
+        if epoch is not None:
+            data["ep"] = epoch
+        claims = token_claims(data, REFRESH_LIFETIME)
+        async with session.begin():
+            await RefreshView.refresh_family_crud.create(
+                claims["fam"],
+                claims[ID_FIELD],
+                claims["jti"],
+                claims["exp"],
+                session,
+            )
+        return refresh_token_codec.encode(claims)
+
+    @classmethod
+    async def rotate(
+        cls, refresh_token: str, session: AsyncSession
+    ) -> tuple[dict, str, str]:
+        """Exchange a refresh token for the claims it carried, a new access
+        token and the next refresh token of its family. Concurrent calls
+        with the same token in this worker share one exchange. It runs on
+        its own session of the same engine, as it may outlive the request
+        that started it.
+        """
+        bind = session.bind
+
+        async def exchange() -> tuple[dict, str, str]:
+            async with AsyncSession(bind, expire_on_commit=False) as own:
+                return await RefreshView.exchange(refresh_token, own)
+
+        return await RefreshView.refresh_flight.do(refresh_token, exchange)
+
+    @classmethod
+    async def exchange(
+        cls, refresh_token: str, session: AsyncSession
+    ) -> tuple[dict, str, str]:
+        claims = verify_refresh_token(refresh_token)
+        if claims is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        user_id = claims[ID_FIELD]
+        epoch = claims.get("ep", 0)
+        family_id = claims.get("fam")
+        if family_id is None:
+            # issued before families existed, retire it for a family
+            async with session.begin():
+                permissions = await RoleView.permissions(user_id, session)
+            access_token = RefreshView.access_token(
+                user_id, epoch, permissions
+            )
+            await RevocationView.revoke_claims([claims], session)
+            new_refresh_token = await RefreshView.start_family(
+                user_id, session, epoch
+            )
+            return claims, access_token, new_refresh_token
+        new_claims = token_claims(
+            {ID_FIELD: user_id, "ep": epoch, "fam": family_id},
+            REFRESH_LIFETIME,
+        )
+        current = replacement = None
+        async with session.begin():
+            rotated = await RefreshView.refresh_family_crud.rotate(
+                family_id,
+                claims["jti"],
+                new_claims["jti"],
+                new_claims["exp"],
+                new_claims["iat"],
+                session,
+            )
+            if rotated is None:
+                # another worker may have rotated it a moment ago
+                replacement = (
+                    await RefreshView.refresh_family_crud.read_rotated(
+                        family_id,
+                        claims["jti"],
+                        new_claims["iat"] - REFRESH_GRACE_PERIOD,
+                        session,
+                    )
+                )
+            if rotated is None and replacement is None:
+                current = await RevocationView.revoke_family(
+                    family_id, session
+                )
+                if current is not None:
+                    await RevocationView.revocation_crud.revoke_token(
+                        *current, session
+                    )
+            else:
+                permissions = await RoleView.permissions(user_id, session)
+        if replacement is not None:
+            jti, expires_at, rotated_at = replacement
+            new_claims.update(jti=jti, iat=rotated_at, exp=expires_at)
+        elif rotated is None:
+            if current is not None:
+                revocation_list.revoke_token(*current)
+            base_logger.warning(
+                f"Refresh token reuse in family {family_id} of {user_id}"
+            )
+            raise HTTPException(
+                status_code=401, detail="Refresh token reuse detected."
+            )
+        access_token = RefreshView.access_token(user_id, epoch, permissions)
+        return claims, access_token, refresh_token_codec.encode(new_claims)
+
+    @classmethod
+    def access_token(cls, user_id: str, epoch: int, permissions: int) -> str:
+        return create_access_token(
+            {ID_FIELD: user_id, "ep": epoch, "perm": permissions}
+        )
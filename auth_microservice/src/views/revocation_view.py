@@ -0,0 +1,158 @@
+import time
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..connection import async_session
+from ..crud.refresh_family_crud import RefreshFamilyCRUD
+from ..crud.revocation_crud import RevocationCRUD
+from ..crud.user_crud import UserCRUD
+from ..models.dynamic_db_models import UserDBType
+from ..models.dynamic_models import UserCreateType, UserPublicDBType
+from ..revocation import revocation_list
+from ..token_utils import (
+    REFRESH_TOKEN_EXP,
+    verify_access_token,
+    verify_refresh_token,
+)
+
+
+class RevocationView:
+    """Revocations are committed (and NOTIFYed) first and then applied to
+    this worker's revocation_list right away, other workers apply them
+    when the notification arrives.
+    """
+
+    revocation_crud: RevocationCRUD = RevocationCRUD()
+    refresh_family_crud: RefreshFamilyCRUD = RefreshFamilyCRUD()
+    user_crud: UserCRUD = UserCRUD(
+        UserPublicDBType, UserCreateType, UserDBType
+    )
+
+    @classmethod
+    async def revoke_claims(
+        cls, claims_list: list[dict], session: AsyncSession
+    ) -> int:
+        """Revoke verified tokens by their ``jti``, along with the refresh
+        token families they belong to, return the count of revoked tokens.
+        """
+        revoked = {
+            claims["jti"]: int(claims["exp"])
+            for claims in claims_list
+            if claims.get("jti")
+        }
+        families = {
+            claims["fam"] for claims in claims_list if claims.get("fam")
+        }
+        if not revoked and not families:
+            return 0
+        async with session.begin():
+            for family_id in families:
+                current = await RevocationView.revoke_family(
+                    family_id, session
+                )
+                if current is not None:
+                    revoked[current[0]] = current[1]
+            for jti, expires_at in revoked.items():
+                await RevocationView.revocation_crud.revoke_token(
+                    jti, expires_at, session
+                )
+        for jti, expires_at in revoked.items():
+            revocation_list.revoke_token(jti, expires_at)
+        return len(revoked)
+
+    @classmethod
+    async def revoke_family(
+        cls, family_id: str, session: AsyncSession
+    ) -> Optional[tuple[str, int]]:
+        """Revoke a refresh token family inside the caller's transaction,
+        return the jti and expiry of its current token to revoke as well.
+        """
+        return await RevocationView.refresh_family_crud.revoke(
+            family_id, session
+        )
+
+    @classmethod
+    async def revoke_token(
+        cls,
+        token: str,
+        token_type_hint: Optional[str],
+        session: AsyncSession,
+    ) -> int:
+        """Revoke an access or refresh token. Invalid, expired or already
+        revoked tokens are ignored, as RFC 7009 asks.
+        """
+        verifiers = [verify_access_token, verify_refresh_token]
+        if token_type_hint == "refresh_token":
+            verifiers.reverse()
+        for verify in verifiers:
+            claims = verify(token)
+            if claims is not None:
+                return await RevocationView.revoke_claims([claims], session)
+        return 0
+
+    @classmethod
+    async def revoke_cookies(
+        cls, cookies: dict[str, str], session: AsyncSession
+    ) -> int:
+        """Revoke the access and refresh tokens of a session's cookies."""
+        claims_list = []
+        for name, verify in (
+            ("access_token", verify_access_token),
+            ("refresh_token", verify_refresh_token),
+        ):
+            claims = verify(cookies[name]) if cookies.get(name) else None
+            if claims is not None:
+                claims_list.append(claims)
+        return await RevocationView.revoke_claims(claims_list, session)
+
+    @classmethod
+    async def bump_token_epoch(
+        cls, user_id: UUID, session: AsyncSession
+    ) -> tuple[int, int]:
+        """Bump the user's token epoch inside the caller's transaction and
+        record it for the workers, return the epoch and when the tokens
+        it revokes have all expired.
+        """
+        epoch = await RevocationView.user_crud.bump_token_epoch(
+            user_id, session
+        )
+        if epoch is None:
+            raise HTTPException(status_code=404, detail="User not found.")
+        expires_at = int(time.time()) + REFRESH_TOKEN_EXP * 24 * 60 * 60
+        await RevocationView.revocation_crud.revoke_user(
+            str(user_id), epoch, expires_at, session
+        )
+        return epoch, expires_at
+
+    @classmethod
+    async def revoke_user(cls, user_id: UUID, session: AsyncSession) -> None:
+        """Revoke every token issued to the user so far."""
+        async with session.begin():
+            epoch, expires_at = await RevocationView.bump_token_epoch(
+                user_id, session
+            )
+        revocation_list.revoke_user(str(user_id), epoch, expires_at)
+
+    @classmethod
+    async def load_snapshot(
+        cls,
+    ) -> tuple[dict[str, int], dict[str, tuple[int, int]]]:
+        async with async_session() as session:
+            return await RevocationView.revocation_crud.read_active(
+                int(time.time()), session
+            )
+
+    @classmethod
+    async def purge_expired(cls) -> None:
+        async with async_session() as session:
+            async with session.begin():
+                now = int(time.time())
+                await RevocationView.revocation_crud.delete_expired(
+                    now, session
+                )
+                await RevocationView.refresh_family_crud.delete_expired(
+                    now, session
+                )
@@ -0,0 +1,60 @@
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..crud.role_crud import RoleCRUD
+from ..crud.user_crud import UserCRUD
+from ..models.dynamic_db_models import UserDBType
+from ..models.dynamic_models import UserCreateType, UserPublicDBType
+from ..permissions import ROLE_PERMISSIONS, role_permissions
+
+
+class RoleView:
+    """Roles are read when tokens are issued (login, register, refresh),
+    a change applies to the user's next access token.
+    """
+
+    role_crud: RoleCRUD = RoleCRUD()
+    user_crud: UserCRUD = UserCRUD(
+        UserPublicDBType, UserCreateType, UserDBType
+    )
+
+    @classmethod
+    def create_rsp(cls, user_id: str, roles: list[str]) -> dict:
+        return {
+            "user_id": user_id,
+            "roles": roles,
+            "permissions": role_permissions(roles),
+        }
+
+    @classmethod
+    async def permissions(cls, user_id: str, session: AsyncSession) -> int:
+        """``perm`` claim of the user's next access token, inside the
+        caller's transaction.
+        """
+        return role_permissions(
+            await RoleView.role_crud.read(str(user_id), session)
+        )
+
+    @classmethod
+    async def read(cls, user_id: UUID, session: AsyncSession) -> dict:
+        async with session.begin():
+            await RoleView.user_crud.read(user_id, session)
+            roles = await RoleView.role_crud.read(str(user_id), session)
+        return RoleView.create_rsp(str(user_id), roles)
+
+    @classmethod
+    async def replace(
+        cls, user_id: UUID, roles: list[str], session: AsyncSession
+    ) -> dict:
+        unknown = sorted(set(roles) - ROLE_PERMISSIONS.keys())
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown roles: {', '.join(unknown)}"
+            )
+        roles = sorted(set(roles))
+        async with session.begin():
+            await RoleView.user_crud.read(user_id, session)
+            await RoleView.role_crud.replace(str(user_id), roles, session)
+        return RoleView.create_rsp(str(user_id), roles)
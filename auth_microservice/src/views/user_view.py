@@ -3,14 +3,17 @@ from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..admission import hash_limiter
 from ..crud.user_crud import UserCRUD
 from ..models.dynamic_db_models import UserDBType
 from ..models.dynamic_models import (
+    PASSWORD_FIELD,
     UserBase,
     UserBaseNotValidateType,
     UserCreateType,
     UserPublicDBType,
 )
+from ..password_utils import hash_password_async
 
 
 class UserView:
@@ -34,6 +37,11 @@ class UserView:
         obj: UserCreateType,  # type: ignore # this is class, not var
         session: AsyncSession,
     ) -> dict:
+        async with hash_limiter.slot():
+            hashed_password = await hash_password_async(
+                getattr(obj, PASSWORD_FIELD)
+            )
+        obj = obj.model_copy(update={PASSWORD_FIELD: hashed_password})
         user = await UserView.user_crud.create(obj, session)
         return UserView.create_rsp(user)
 
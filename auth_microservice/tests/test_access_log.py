@@ -0,0 +1,117 @@
+import pytest
+from src.access_log import AccessLogMiddleware, BodySample, RouteSampler
+from src.logger import base_logger
+
+
+@pytest.fixture
+def records():
+    records: list[dict] = []
+    sink = base_logger.add(
+        lambda message: records.append(message.record), level="INFO"
+    )
+    yield records
+    base_logger.remove(sink)
+
+
+async def streaming_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    for chunk in (b"first ", b"second ", b"third"):
+        await send(
+            {"type": "http.response.body", "body": chunk, "more_body": True}
+        )
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def call(app, path: str = "/user", body: bytes = b"{}") -> list[dict]:
+    sent: list[dict] = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "query_string": b"a=1",
+        "headers": [],
+        "client": ("10.0.0.1", 1234),
+        "root_path": "/auth",
+    }
+    await app(scope, receive, send)
+    return sent
+
+
+async def test_chunks_pass_through_and_are_counted(records):
+    sent = await call(AccessLogMiddleware(streaming_app), body=b"abc")
+    # every chunk is forwarded as it is, nothing is joined or rebuilt
+    assert [message.get("body") for message in sent[1:]] == [
+        b"first ",
+        b"second ",
+        b"third",
+        b"",
+    ]
+    assert len(records) == 1
+    assert records[0]["message"] == "POST /user 201"
+    fields = records[0]["extra"]
+    assert fields["client"] == "10.0.0.1"
+    assert fields["query"] == "a=1"
+    assert (fields["status"], fields["bytes_in"], fields["bytes_out"]) == (
+        201,
+        3,
+        18,
+    )
+    assert "request_body" not in fields
+
+
+async def test_body_capture_is_capped_and_redacted(records):
+    app = AccessLogMiddleware(
+        streaming_app, capture_bodies=True, body_limit=40, sample_rate=1
+    )
+    await call(app, body=b'{"password": "secret", "email": "a@b.c"}')
+    await call(app, path="/docs")
+    fields = records[0]["extra"]
+    assert "secret" not in fields["request_body"]
+    assert fields["request_body"] == (
+        '{"password": "[REDACTED]", "email": "a@b.c"}'
+    )
+    assert fields["response_body"] == "first second third"
+    assert "request_body" not in records[1]["extra"]
+    app.body_limit = 8
+    await call(app)
+    assert records[2]["extra"]["response_body"] == "first se... (18 bytes)"
+
+
+async def test_sampling_per_route(records):
+    app = AccessLogMiddleware(streaming_app, sample_rates={"/verify": 0})
+    for _ in range(3):
+        await call(app, path="/auth/verify")
+    await call(app, path="/user")
+    assert [record["extra"]["path"] for record in records] == ["/user"]
+    sampler = RouteSampler({"/user": 0.5, "/user/me": 1, "/": 0})
+    assert sampler.rate("/user/me") == 1
+    assert sampler.rate("/user/1") == 0.5
+    assert sampler.rate("/login") == 0
+    assert RouteSampler({}).rate("/login") == 1
+
+
+async def test_failures_are_always_logged(records):
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    app = AccessLogMiddleware(failing_app, sample_rates={"/": 0})
+    with pytest.raises(RuntimeError):
+        await call(app)
+    assert records[0]["level"].name == "ERROR"
+    assert records[0]["extra"]["status"] == 500
+
+
+def test_body_sample():
+    sample = BodySample(4)
+    sample.add(b"ab")
+    sample.add(b"cdef")
+    sample.add(b"g")
+    assert sample.text() == "abcd... (7 bytes)"
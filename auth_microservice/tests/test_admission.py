@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from src.admission import AdmissionLimiter
+
+
+async def test_admission_queue_and_reject():
+    limiter = AdmissionLimiter(
+        "test", max_in_flight=1, max_queue=1, retry_after=3
+    )
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    with pytest.raises(HTTPException) as exc_info:
+        await limiter.acquire()
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "3"}
+    limiter.release()
+    await waiter
+    assert limiter.in_flight == 1
+    limiter.release()
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == 1
+    assert stats["queue_time_max"] > 0
+
+
+async def test_admission_cancelled_waiter_leaves_queue():
+    limiter = AdmissionLimiter(
+        "test", max_in_flight=1, max_queue=1, retry_after=1
+    )
+    async with limiter.slot():
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queued == 0
+    assert limiter.in_flight == 0
+
+
+async def test_login_rejected_when_hash_queue_is_full(
+    client, override_db_dependency, monkeypatch: pytest.MonkeyPatch
+):
+    limiter = AdmissionLimiter(
+        "test", max_in_flight=0, max_queue=0, retry_after=5
+    )
+    monkeypatch.setattr("src.views.credential_view.hash_limiter", limiter)
+    response = client.post(
+        "/register",
+        json={"email": "test@example.com", "password": "asdASD123!@#"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -2,6 +2,7 @@ import os
 
 from dotenv import load_dotenv
 from fastapi.testclient import TestClient
+from src.permissions import DEFAULT_PERMISSIONS
 from src.token_utils import create_access_token, create_refresh_token
 
 load_dotenv()
@@ -102,3 +103,35 @@ def test_auth_with_expired_refresh_token(
     response = client.post("/auth/auth", json=AUTH_DATA)
     assert response.status_code == 401
     assert "Not authenticated" in response.json()["detail"]
+
+
+def test_verify_with_valid_access_token(client: TestClient):
+    access_token = generate_valid_access_token()
+    client.cookies.set("access_token", access_token)
+    response = client.get("/auth/verify")
+    assert response.status_code == 204
+    assert response.headers["X-User-Id"] == TEST_USER_ID
+    assert response.headers["X-Token-Id"]
+    assert int(response.headers["X-Token-Expires"]) > 0
+    assert int(response.headers["X-User-Permissions"]) == DEFAULT_PERMISSIONS
+    client.cookies.clear()
+    response = client.get(
+        "/auth/verify", headers={"Authorization": f"Bearer {access_token}"}
+    )
+    assert response.status_code == 204
+    assert response.headers["X-User-Id"] == TEST_USER_ID
+
+
+def test_verify_with_invalid_tokens(client: TestClient):
+    client.cookies.clear()
+    response = client.get("/auth/verify")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    client.cookies.set("access_token", generate_expired_access_token())
+    assert client.get("/auth/verify").status_code == 401
+    client.cookies.clear()
+    response = client.get(
+        "/auth/verify",
+        headers={"Authorization": f"Basic {generate_valid_access_token()}"},
+    )
+    assert response.status_code == 401
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# the benchmarks import the service as auth_microservice.src, so they run
+# in their own interpreter from the repository root, logging to stderr
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+SMOKE_ARGS = {
+    "auth_latency": [
+        "--requests=2",
+        "--concurrency=1",
+        "--flood-concurrency=1",
+    ],
+    "authorization": ["--seconds=0.01", "--users=50"],
+    "client_verify": ["--requests=2", "--seconds=0.01"],
+    "hashing": ["--repeat=1", "--workers=1", "--algorithm=pbkdf2-sha256"],
+    "jwt_codec": ["--seconds=0.01"],
+    "verify": ["--seconds=0.01", "--requests=2", "--concurrency=1"],
+}
+
+
+@pytest.mark.parametrize("benchmark", sorted(SMOKE_ARGS))
+def test_benchmark_runs(benchmark: str):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "auth_microservice.bench",
+            benchmark,
+            *SMOKE_ARGS[benchmark],
+        ],
+        cwd=ROOT,
+        env={**os.environ, "IS_TO_FILE": "False"},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout
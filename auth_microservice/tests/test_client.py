@@ -0,0 +1,210 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from client import (
+    AuthMiddleware,
+    TokenVerifier,
+    UserClient,
+    principal_dependency,
+)
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from src.main import app
+from src.permissions import ALL_PERMISSIONS
+from src.revocation import revocation_list
+from src.routers import introspection_router
+from src.signing_keys import ACCESS_SECRET_KEY, KeyRing, SigningKey
+from src.token_codec import TokenCodec
+from src.token_utils import create_access_token
+
+load_dotenv()
+ID_FIELD = os.getenv("ID_FIELD", "")
+USER_ID = "af926384-fa75-4da9-a5b2-1d81f2e1e5f8"
+
+
+@pytest.fixture(autouse=True)
+def clear_revocation_list():
+    yield
+    revocation_list.tokens.clear()
+    revocation_list.users.clear()
+
+
+def shared_key_verifier(**kwargs) -> TokenVerifier:
+    return TokenVerifier(
+        "http://testserver/auth",
+        secret=ACCESS_SECRET_KEY,
+        id_field=ID_FIELD,
+        **kwargs,
+    )
+
+
+def test_verify_with_shared_secret():
+    verifier = shared_key_verifier()
+    token = create_access_token({ID_FIELD: USER_ID})
+    payload = verifier.verify(token)
+    assert payload is not None and payload[ID_FIELD] == USER_ID
+    assert verifier.verify(token[:-4] + "AAAA") is None
+    assert verifier.verify("not a token") is None
+    expired = create_access_token({ID_FIELD: USER_ID}, expiration_minutes=-1)
+    assert verifier.verify(expired) is None
+
+
+async def test_verify_with_jwks():
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    key = SigningKey.from_pem(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+        "EdDSA",
+    )
+    token = TokenCodec(KeyRing("access", [key])).encode(
+        {ID_FIELD: USER_ID, "exp": 2**32}
+    )
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200, json={"keys": [key.public_jwk()]})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    verifier = TokenVerifier("http://auth/auth", http_client=http_client)
+    assert verifier.verify(token) is None
+    await verifier.refresh_keys()
+    assert requests == ["/auth/.well-known/jwks.json"]
+    principal = verifier.principal(token)
+    assert principal is not None and principal.user_id == USER_ID
+
+
+async def test_revocations_from_service(override_db_dependency, monkeypatch):
+    monkeypatch.setattr(
+        introspection_router, "INTROSPECTION_TOKEN", "service secret"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        verifier = shared_key_verifier(
+            http_client=http_client, client_token="service secret"
+        )
+        token = create_access_token({ID_FIELD: USER_ID})
+        payload = verifier.verify(token)
+        assert payload is not None
+        assert await verifier.refresh_revocations()
+        assert not await verifier.refresh_revocations()
+        revocation_list.revoke_token(payload["jti"], payload["exp"])
+        assert await verifier.refresh_revocations()
+        assert verifier.verify(token) is None
+        revocation_list.revoke_user(USER_ID, 1, payload["exp"])
+        await verifier.refresh_revocations()
+        old_epoch = create_access_token({ID_FIELD: USER_ID, "ep": 0})
+        assert verifier.verify(old_epoch) is None
+        assert verifier.verify(create_access_token({ID_FIELD: USER_ID}))
+
+
+async def test_start_and_close():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("jwks.json"):
+            return httpx.Response(200, json={"keys": []})
+        return httpx.Response(200, json={"tokens": {"jti": 2**32}})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    async with TokenVerifier("http://auth", http_client=http_client) as v:
+        assert v.revocations.tokens == {"jti": 2**32}
+        assert len(v._tasks) == 2
+    assert not v._tasks
+
+
+async def test_follow_events():
+    requests = []
+    body = (
+        'id: w-1\nevent: snapshot\ndata: {"tokens": {"a": 4294967296}, '
+        '"users": {}, "keys": 1}\n\n: ping\n\n'
+        'id: w-2\nevent: token\ndata: {"jti": "b", "exp": 4294967296}\n\n'
+        "id: w-3\nevent: user\n"
+        'data: {"user": "u", "epoch": 2, "exp": 4294967296}\n\n'
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200, text=body, headers={"content-type": "text/event-stream"}
+        )
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    verifier = TokenVerifier("http://auth", http_client=http_client)
+    assert await verifier.follow_events() == 3
+    assert verifier.revocations.tokens == {"a": 2**32, "b": 2**32}
+    assert verifier.revocations.users == {"u": (2, 2**32)}
+    assert verifier.last_event_id == "w-3"
+    assert verifier._keys_wanted.is_set()
+    await verifier.follow_events()
+    assert requests[0].url.path == "/events"
+    assert "last-event-id" not in requests[0].headers
+    assert requests[1].headers["last-event-id"] == "w-3"
+    verifier.revocations.purge(2**33)
+    assert not verifier.revocations.tokens and not verifier.revocations.users
+
+
+def test_middleware_and_dependency():
+    verifier = shared_key_verifier()
+    service = FastAPI()
+    require_user = principal_dependency(verifier)
+
+    @service.get("/me")
+    async def me(principal=Depends(require_user)) -> str:
+        return principal.user_id
+
+    token = create_access_token({ID_FIELD: USER_ID})
+    for application in (service, AuthMiddleware(service, verifier)):
+        client = TestClient(application)
+        assert client.get("/me").status_code == 401
+        response = client.get(
+            "/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.json() == USER_ID
+        client.cookies.set("access_token", token)
+        assert client.get("/me").json() == USER_ID
+
+
+async def test_user_client(override_db_dependency):
+    transport = httpx.ASGITransport(app=app)
+    http_client = httpx.AsyncClient(transport=transport)
+    users = UserClient("http://testserver/auth", http_client=http_client)
+    users.cache.ttl = 60
+    user = await users.register(
+        email="test_user_client@example.com", password="asdASD123!@#"
+    )
+    user_id = user[ID_FIELD]
+    fetched = await asyncio.gather(
+        *(users.get_user(user_id) for _ in range(5))
+    )
+    assert all(one[ID_FIELD] == user_id for one in fetched)
+    assert users.stats() == {"in_flight": 0, "calls": 1, "coalesced": 4}
+    assert await users.get_user(user_id) == fetched[0]
+    assert users.flight.calls == 1
+    with pytest.raises(httpx.HTTPStatusError):
+        await users.users_by_field(email="test_user_client@example.com")
+    # searching users takes USER_LIST, which only admins have
+    domain = next(iter(http_client.cookies.jar)).domain
+    http_client.cookies.set(
+        "access_token",
+        create_access_token({ID_FIELD: user_id, "perm": int(ALL_PERMISSIONS)}),
+        domain=domain,
+    )
+    found = await users.users_by_field(email="test_user_client@example.com")
+    assert [one[ID_FIELD] for one in found] == [user_id]
+    # an expired access token is refreshed once and the request retried
+    http_client.cookies.set("access_token", "expired", domain=domain)
+    users.cache.clear()
+    fetched = await asyncio.gather(
+        *(users.get_user(user_id) for _ in range(3))
+    )
+    assert fetched[0][ID_FIELD] == user_id
+    assert http_client.cookies["access_token"] != "expired"
+    assert users.flight.calls == 3
+    await users.close()
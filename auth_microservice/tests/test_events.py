@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+from src.events import HEARTBEAT, EventHub
+from src.revocation import RevocationList
+from src.signing_keys import access_key_ring
+
+
+def new_hub(**kwargs) -> EventHub:
+    hub = EventHub(RevocationList(), access_key_ring, **kwargs)
+    hub.revocations.listeners.append(hub.publish)
+    return hub
+
+
+def parse(message: bytes) -> tuple[str, str, dict]:
+    fields = dict(
+        line.split(": ", 1) for line in message.decode().strip().split("\n")
+    )
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+async def test_snapshot_then_events():
+    hub = new_hub()
+    hub.revocations.revoke_token("old", 2**32)
+    stream = hub.stream()
+    event_id, event, data = parse(await anext(stream))
+    assert event == "snapshot" and event_id == hub.last_event_id
+    assert data["tokens"] == {"old": 2**32}
+    hub.revocations.revoke_token("jti", 2**32)
+    hub.revocations.revoke_token("jti", 2**32)
+    hub.revocations.revoke_user("user", 2, 2**32)
+    assert parse(await anext(stream))[1:] == (
+        "token",
+        {"jti": "jti", "exp": 2**32},
+    )
+    assert parse(await anext(stream))[1:] == (
+        "user",
+        {"user": "user", "epoch": 2, "exp": 2**32},
+    )
+    assert hub.stats()["subscribers"] == 1
+    await stream.aclose()
+    assert hub.stats() == {"subscribers": 0, "sequence": 3, "buffered": 3}
+
+
+async def test_resume_from_last_event_id():
+    hub = new_hub(buffer_size=2)
+    hub.revocations.revoke_token("a", 2**32)
+    resume_from = hub.last_event_id
+    hub.revocations.revoke_token("b", 2**32)
+    stream = hub.stream(resume_from)
+    assert parse(await anext(stream))[2]["jti"] == "b"
+    await stream.aclose()
+    # fell out of the buffer, from another worker or garbage
+    hub.revocations.revoke_token("c", 2**32)
+    hub.revocations.revoke_token("d", 2**32)
+    for last_event_id in (resume_from, "other-1", "nonsense"):
+        stream = hub.stream(last_event_id)
+        event_id, event, data = parse(await anext(stream))
+        assert event == "snapshot" and set(data["tokens"]) == set("abcd")
+        await stream.aclose()
+
+
+async def test_slow_subscriber_dropped():
+    hub = new_hub(queue_size=2)
+    stream = hub.stream()
+    await anext(stream)
+    for jti in "abc":
+        hub.revocations.revoke_token(jti, 2**32)
+    assert hub.stats()["subscribers"] == 0
+    received = [parse(message)[2]["jti"] async for message in stream]
+    assert received == ["a", "b"]
+
+
+async def test_heartbeat():
+    hub = new_hub(heartbeat=0.01)
+    stream = hub.stream()
+    await anext(stream)
+    assert await asyncio.wait_for(anext(stream), 1) == HEARTBEAT
+    await stream.aclose()
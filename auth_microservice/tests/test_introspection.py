@@ -0,0 +1,131 @@
+import os
+
+import pytest
+from dotenv import load_dotenv
+from fastapi.testclient import TestClient
+from src.logger import base_logger
+from src.revocation import revocation_list
+from src.routers import introspection_router
+from src.token_utils import create_access_token, create_refresh_token
+from src.views.refresh_view import RefreshView
+
+load_dotenv()
+ID_FIELD = os.getenv("ID_FIELD", "")
+USER_ID = "af926384-fa75-4da9-a5b2-1d81f2e1e5f8"
+
+
+@pytest.fixture(autouse=True)
+def clear_revocation_list():
+    yield
+    revocation_list.tokens.clear()
+
+
+@pytest.fixture(autouse=True)
+def open_introspection(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(introspection_router, "INTROSPECTION_OPEN", True)
+
+
+def test_introspect_token(client: TestClient):
+    access_token = create_access_token({ID_FIELD: USER_ID})
+    response = client.post("/introspect", json={"token": access_token})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["active"] is True
+    assert result["token_type"] == "access_token"
+    assert result["sub"] == USER_ID
+    assert result[ID_FIELD] == USER_ID
+    response = client.post("/introspect", json={"token": "not a token"})
+    assert response.json() == {"active": False}
+
+
+def test_introspect_batch(client: TestClient):
+    access_token = create_access_token({ID_FIELD: USER_ID})
+    refresh_token = create_refresh_token({ID_FIELD: USER_ID})
+    revoked_token = create_access_token({ID_FIELD: USER_ID})
+    claims = client.post("/introspect", json={"token": revoked_token}).json()
+    revocation_list.revoke_token(claims["jti"], claims["exp"])
+    tokens = [access_token, "not a token", refresh_token, revoked_token]
+    response = client.post(
+        "/introspect/batch",
+        json={"tokens": tokens * 2, "token_type_hint": "refresh_token"},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["active"] for result in results] == [
+        True,
+        False,
+        True,
+        False,
+    ] * 2
+    assert results[0]["token_type"] == "access_token"
+    assert results[2]["token_type"] == "refresh_token"
+    response = client.post("/introspect/batch", json={"tokens": []})
+    assert response.status_code == 422
+
+
+def test_introspect_requires_client_token(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        introspection_router, "INTROSPECTION_TOKEN", "gateway secret"
+    )
+    access_token = create_access_token({ID_FIELD: USER_ID})
+    response = client.post("/introspect", json={"token": access_token})
+    assert response.status_code == 401
+    response = client.post(
+        "/introspect",
+        json={"token": access_token},
+        headers={"Authorization": "Bearer gateway secret"},
+    )
+    assert response.json()["active"] is True
+
+
+def test_unconfigured_client_token_closes_endpoints(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(introspection_router, "INTROSPECTION_TOKEN", "")
+    monkeypatch.setattr(introspection_router, "INTROSPECTION_OPEN", False)
+    access_token = create_access_token({ID_FIELD: USER_ID})
+    response = client.post("/introspect", json={"token": access_token})
+    assert response.status_code == 503
+    response = client.post("/introspect/batch", json={"tokens": ["a"]})
+    assert response.status_code == 503
+    assert client.get("/events").status_code == 503
+    assert client.get("/revoke/list").status_code == 503
+
+
+async def test_rotated_refresh_token_is_inactive(
+    client: TestClient, async_session_factory
+):
+    async with async_session_factory() as session:
+        refresh_token = await RefreshView.start_family(USER_ID, session)
+        _, _, rotated_token = await RefreshView.rotate(refresh_token, session)
+    response = client.post("/introspect", json={"token": refresh_token})
+    assert response.json() == {"active": False}
+    response = client.post(
+        "/introspect/batch", json={"tokens": [refresh_token, rotated_token]}
+    )
+    results = response.json()["results"]
+    assert [result["active"] for result in results] == [False, True]
+    async with async_session_factory() as session:
+        await RefreshView.refresh_family_crud.revoke(
+            results[1]["fam"], session
+        )
+        await session.commit()
+    response = client.post("/introspect", json={"token": rotated_token})
+    assert response.json() == {"active": False}
+
+
+def test_inactive_tokens_are_not_errors(client: TestClient):
+    errors: list[str] = []
+    sink = base_logger.add(errors.append, level="ERROR")
+    try:
+        tokens = [create_refresh_token({ID_FIELD: USER_ID}), "not a token"]
+        response = client.post("/introspect/batch", json={"tokens": tokens})
+    finally:
+        base_logger.remove(sink)
+    assert [result["active"] for result in response.json()["results"]] == [
+        True,
+        False,
+    ]
+    assert errors == []
@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+
+from src.logger import BatchingSink, json_format, redact, redact_text
+
+
+def test_redact_nested_fields():
+    record = {
+        "user": {"email": "a@b.c", "Password": "p"},
+        "cookies": [{"access_token": "a", "other": 1}],
+        "body": '{"refresh_token": "r", "ok": true}',
+    }
+    assert redact(record) == {
+        "user": {"email": "a@b.c", "Password": "[REDACTED]"},
+        "cookies": [{"access_token": "[REDACTED]", "other": 1}],
+        "body": '{"refresh_token": "[REDACTED]", "ok": true}',
+    }
+
+
+def test_redact_text():
+    assert redact_text("password=hunter2&user=bob") == (
+        "password=[REDACTED]&user=bob"
+    )
+    assert redact_text('code_verifier: "a b", x') == (
+        'code_verifier: "[REDACTED]", x'
+    )
+    assert redact_text("nothing to hide") == "nothing to hide"
+
+
+def test_batching_sink_batches_and_counts_drops():
+    batches: list[str] = []
+    release = threading.Event()
+
+    def write(text: str) -> None:
+        release.wait(5)
+        batches.append(text)
+
+    sink = BatchingSink(write, queue_size=3, batch_size=2, flush_interval=0.01)
+    sink.write("blocked\n")
+    deadline = time.monotonic() + 5
+    while sink.queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    for number in range(5):
+        sink.write(f"{number}\n")
+    assert sink.dropped == 2
+    release.set()
+    assert sink.drain()
+    assert batches[0] == "blocked\n"
+    assert batches[1].startswith("0\n1\n")
+    assert "2 records dropped" in batches[1]
+    assert batches[2] == "2\n"
+    assert sink.stats() == {"queued": 0, "written": 4, "dropped": 2}
+    sink.stop()
+
+
+def test_batching_sink_close_writes_queued_records():
+    batches: list[str] = []
+
+    def write(text: str) -> None:
+        time.sleep(0.01)
+        batches.append(text)
+
+    sink = BatchingSink(write, batch_size=2, flush_interval=0.01)
+    for number in range(5):
+        sink.write(f"{number}\n")
+    sink.close()
+    assert "".join(batches) == "0\n1\n2\n3\n4\n"
+    assert not sink._thread.is_alive()
+    sink.write("late\n")
+    assert batches[-1] == "late\n"
+    sink.stop()
+
+
+def test_json_format():
+    from datetime import datetime
+
+    class Level:
+        name = "INFO"
+
+    record = {
+        "time": datetime(2026, 1, 1),
+        "level": Level(),
+        "name": "src.access_log",
+        "function": "f",
+        "line": 1,
+        "message": "GET /user 200",
+        "extra": {"status": 200},
+        "exception": None,
+    }
+    assert json_format(record) == "{extra[_json]}\n"
+    document = json.loads(record["extra"]["_json"])
+    assert document["status"] == 200
+    assert document["message"] == "GET /user 200"
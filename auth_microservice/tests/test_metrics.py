@@ -0,0 +1,157 @@
+import json
+import os
+
+from src.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    merge_snapshots,
+    metrics_registry,
+)
+from src.routers import metrics_router
+
+# above the kernel's pid_max, never a live process
+DEAD_PID = 2**22 + 1
+
+
+def test_render_text_format():
+    registry = MetricsRegistry(directory="")
+    requests = Counter("requests_total", "Requests.", ("route",), registry)
+    latency = Histogram(
+        "latency_seconds", "Latency.", buckets=(0.1, 1), registry=registry
+    )
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a\\"b"} 3.0' in text
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 3.65" in text
+
+
+def test_collectors_run_before_snapshot():
+    registry = MetricsRegistry(directory="")
+    depth = Gauge("depth", "Depth.", registry=registry)
+    queue = [1, 2, 3]
+    registry.on_collect(lambda: depth.set(len(queue)))
+    registry.on_collect(lambda: 1 / 0)
+    assert registry.collect()["depth"]["samples"] == [[[], 3]]
+    assert registry.collector_errors == 1
+
+
+def test_merge_keeps_totals_of_exited_workers():
+    def snapshot(pid: int, requests: float, in_flight: float) -> dict:
+        return {
+            "pid": pid,
+            "metrics": {
+                "requests_total": {
+                    "type": "counter",
+                    "help": "",
+                    "labelnames": ["route"],
+                    "samples": [[["/user"], requests]],
+                },
+                "in_flight": {
+                    "type": "gauge",
+                    "help": "",
+                    "labelnames": [],
+                    "samples": [[[], in_flight]],
+                },
+                "latency": {
+                    "type": "histogram",
+                    "help": "",
+                    "labelnames": [],
+                    "buckets": [1.0],
+                    "samples": [[[], [[requests, 0], requests / 10]]],
+                },
+            },
+        }
+
+    merged = merge_snapshots(
+        [snapshot(1, 5, 2), snapshot(2, 7, 3)], alive=lambda pid: pid == 1
+    )
+    assert merged["requests_total"]["samples"] == [[["/user"], 12]]
+    assert merged["in_flight"]["samples"] == [[[], 2]]
+    assert merged["latency"]["samples"] == [[[], [[12, 0], 1.2]]]
+
+
+def test_workers_share_a_directory(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    requests = Counter("requests_total", "Requests.", registry=registry)
+    in_flight = Gauge("in_flight", "In flight.", registry=registry)
+    requests.inc(2)
+    in_flight.inc()
+    registry.write()
+    other = registry.snapshot()
+    other.update(pid=DEAD_PID, instance=f"{DEAD_PID}-1")
+    (tmp_path / f"{DEAD_PID}-1.json").write_text(json.dumps(other))
+    (tmp_path / "partial.json.tmp").write_text("{")
+
+    requests.inc()
+    metrics = registry.collect()
+    assert metrics["requests_total"]["samples"] == [[[], 5.0]]
+    assert metrics["in_flight"]["samples"] == [[[], 1.0]]
+    # the exited worker's counters are retained, its file is gone
+    assert sorted(name for name in os.listdir(tmp_path) if name[0] != ".") == [
+        f"{registry.instance()}.json",
+        "partial.json.tmp",
+        "retained.json",
+    ]
+    assert registry.collect()["requests_total"]["samples"] == [[[], 5.0]]
+
+
+def test_reused_pid_keeps_totals(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path))
+    requests = Counter("requests_total", "Requests.", registry=registry)
+    in_flight = Gauge("in_flight", "In flight.", registry=registry)
+    requests.inc(4)
+    in_flight.inc()
+    registry.write()
+    # a new worker with the same pid starts with fresh samples
+    registry._instance = (os.getpid(), f"{os.getpid()}-{2**62}")
+    requests.labels().set(1)
+    metrics = registry.collect()
+    assert metrics["requests_total"]["samples"] == [[[], 5.0]]
+    assert metrics["in_flight"]["samples"] == [[[], 1.0]]
+    assert registry.collect()["requests_total"]["samples"] == [[[], 5.0]]
+
+
+def test_requests_are_labelled_with_route_templates(client, monkeypatch):
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "scraper secret")
+    client.base_url = "http://testserver/auth"
+    client.get("/user/3fa85f64-5717-4562-b3fc-2c963f66afa6")
+    client.get("/user/6f0b2a51-4f39-4c31-9a35-3b0b9c1d2e10")
+    client.get("/verify")
+    client.get("/no/such/route")
+    assert client.get("/metrics").status_code == 401
+    response = client.get(
+        "/metrics", headers={"Authorization": "Bearer scraper secret"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = {
+        tuple(labels): value
+        for labels, value in metrics_registry.collect()["http_requests_total"][
+            "samples"
+        ]
+    }
+    assert samples[("GET", "/user/{user_id}", "401")] >= 2
+    assert samples[("GET", "/verify", "401")] >= 1
+    assert samples[("GET", "unmatched", "404")] >= 1
+    assert not any("3fa85f64" in labels[1] for labels in samples)
+    assert "jwt_verified_total" in response.text
+    assert "token_cache_lookups_total" in response.text
+    assert "admission_queue_depth" in response.text
+
+
+def test_metrics_are_closed_without_token(client, monkeypatch):
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "")
+    client.base_url = "http://testserver/auth"
+    assert client.get("/metrics").status_code == 503
+    monkeypatch.setattr(metrics_router, "METRICS_OPEN", True)
+    assert client.get("/metrics").status_code == 200
@@ -7,8 +7,8 @@ from src.models.dynamic_models import (
     UserBaseDBType,
     UserBaseType,
     UserCreateType,
+    UserCredentialsType,
 )
-from src.password_utils import hash_password
 
 
 # UserBaseType
@@ -121,9 +121,7 @@ def test_user_create_with_username_and_password():
         **{USERNAME_FIELD: "asd", PASSWORD_FIELD: "asdASD123!@#"}
     )
     assert getattr(user_create, USERNAME_FIELD) == "asd"
-    assert getattr(user_create, PASSWORD_FIELD) == hash_password(
-        "asdASD123!@#"
-    )
+    assert getattr(user_create, PASSWORD_FIELD) == "asdASD123!@#"
     assert user_create.get_valid_field == ("username", "asd")
 
 
@@ -135,9 +133,7 @@ def test_user_create_with_email_and_password():
         }
     )
     assert getattr(user_create, EMAIL_FIELD) == "mama_ya_sozdal_pochty@mail.ru"
-    assert getattr(user_create, PASSWORD_FIELD) == hash_password(
-        "asdASD123!@#"
-    )
+    assert getattr(user_create, PASSWORD_FIELD) == "asdASD123!@#"
     assert user_create.get_valid_field == (
         EMAIL_FIELD,
         "mama_ya_sozdal_pochty@mail.ru",
@@ -149,9 +145,7 @@ def test_user_create_with_phone_and_password():
         **{PHONE_FIELD: "+71234567890", PASSWORD_FIELD: "asdASD123!@#"}
     )
     assert getattr(user_create, PHONE_FIELD) == "+71234567890"
-    assert getattr(user_create, PASSWORD_FIELD) == hash_password(
-        "asdASD123!@#"
-    )
+    assert getattr(user_create, PASSWORD_FIELD) == "asdASD123!@#"
     assert user_create.get_valid_field == (PHONE_FIELD, "+71234567890")
 
 
@@ -171,3 +165,22 @@ def test_user_create_with_incorrect_password():
     for password in ["as", "asdasdasdasd", "asdasdasd123", "ASDASDASD123"]:
         with pytest.raises(ValueError):
             UserCreateType(**{USERNAME_FIELD: "asd", PASSWORD_FIELD: password})
+
+
+# UserCredentialsType
+def test_user_credentials_keeps_password_secret():
+    credentials = UserCredentialsType(
+        **{USERNAME_FIELD: "asd", PASSWORD_FIELD: "asdASD123!@#"}
+    )
+    password = getattr(credentials, PASSWORD_FIELD)
+    assert password.get_secret_value() == "asdASD123!@#"
+    assert "asdASD123!@#" not in repr(credentials)
+    assert credentials.get_valid_field == ("username", "asd")
+
+
+def test_user_credentials_with_incorrect_password():
+    for password in ["as", "asdasdasdasd", "asdasdasd123", "ASDASDASD123"]:
+        with pytest.raises(ValueError):
+            UserCredentialsType(
+                **{USERNAME_FIELD: "asd", PASSWORD_FIELD: password}
+            )
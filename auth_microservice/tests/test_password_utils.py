@@ -0,0 +1,100 @@
+import binascii
+import hashlib
+
+import pytest
+from src.password_utils import (
+    ARGON2ID,
+    PBKDF2_SHA256,
+    SALT,
+    SCRYPT,
+    HashParams,
+    configured_hash_params,
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    parse_password_hash,
+    verify_and_update,
+    verify_password,
+    verify_password_async,
+)
+
+PASSWORD = "asdASD123!@#"
+CHEAP_PARAMS = [
+    HashParams(PBKDF2_SHA256, {"i": 1000}),
+    HashParams(SCRYPT, {"n": 1024, "r": 8, "p": 1}),
+    HashParams(ARGON2ID, {"m": 1024, "t": 1, "p": 1}),
+]
+
+
+def legacy_hash(password: str) -> str:
+    dk = hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), SALT.encode(), 100000
+    )
+    return binascii.hexlify(dk).decode()
+
+
+def test_verify_password():
+    hashed_password = hash_password(PASSWORD)
+    assert hashed_password != PASSWORD
+    assert verify_password(PASSWORD, hashed_password)
+    assert not verify_password(PASSWORD + "wrong", hashed_password)
+
+
+def test_hash_password_uses_per_user_salt():
+    first, second = hash_password(PASSWORD), hash_password(PASSWORD)
+    assert first != second
+    assert parse_password_hash(first)[1] != parse_password_hash(second)[1]
+
+
+@pytest.mark.parametrize("params", CHEAP_PARAMS, ids=lambda p: p.algorithm)
+def test_hash_password_algorithms(params: HashParams):
+    if params.algorithm == ARGON2ID:
+        pytest.importorskip("argon2")
+    hashed_password = hash_password(PASSWORD, params)
+    assert hashed_password.startswith(f"${params.algorithm}$")
+    assert parse_password_hash(hashed_password)[0] == params
+    assert verify_password(PASSWORD, hashed_password)
+    assert not verify_password(PASSWORD + "wrong", hashed_password)
+
+
+def test_verify_malformed_hash():
+    assert not verify_password(PASSWORD, "$unknown$x=1$AAAA$AAAA")
+    assert not verify_password(PASSWORD, "not a hash")
+
+
+def test_legacy_hash_is_verified_and_rehashed():
+    hashed_password = legacy_hash(PASSWORD)
+    assert verify_password(PASSWORD, hashed_password)
+    assert needs_rehash(hashed_password)
+    is_valid, new_hash = verify_and_update(PASSWORD, hashed_password)
+    assert is_valid
+    assert new_hash and new_hash.startswith("$")
+    assert not needs_rehash(new_hash)
+
+
+def test_needs_rehash_on_changed_cost():
+    old_params = HashParams(PBKDF2_SHA256, {"i": 1000})
+    hashed_password = hash_password(PASSWORD, old_params)
+    assert needs_rehash(hashed_password)
+    assert not needs_rehash(hashed_password, old_params)
+    assert verify_and_update(PASSWORD + "wrong", hashed_password) == (
+        False,
+        None,
+    )
+
+
+def test_configured_hash_params():
+    assert configured_hash_params(SCRYPT).algorithm == SCRYPT
+    with pytest.raises(ValueError):
+        configured_hash_params("md5")
+
+
+async def test_hash_password_async():
+    hashed_password = await hash_password_async(PASSWORD)
+    assert verify_password(PASSWORD, hashed_password)
+
+
+async def test_verify_password_async():
+    hashed_password = await hash_password_async(PASSWORD)
+    assert await verify_password_async(PASSWORD, hashed_password)
+    assert not await verify_password_async(PASSWORD + "wrong", hashed_password)
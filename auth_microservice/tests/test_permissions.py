@@ -0,0 +1,96 @@
+import jwt
+from fastapi.testclient import TestClient
+from src.permissions import (
+    ALL_PERMISSIONS,
+    DEFAULT_PERMISSIONS,
+    Permission,
+    PolicyTable,
+    role_permissions,
+)
+from src.token_utils import create_access_token
+
+OWNER = {"email": "test_owner@example.com", "password": "asdASD123!@#"}
+OTHER = {"email": "test_other@example.com", "password": "asdASD123!@#"}
+AUTH_DATA = {
+    "code_challenge": "LY1pMXesRIlfwCwAnsP2rzLlHrAHg8FwANcFHRZiuTo",
+    "code_challenge_method": "string",
+}
+
+
+def register(client: TestClient, user: dict) -> str:
+    client.cookies.clear()
+    response = client.post("/register", json=user)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def perm_claim(client: TestClient) -> int:
+    token = client.cookies["access_token"]
+    return jwt.decode(token, options={"verify_signature": False})["perm"]
+
+
+def use_admin_token(client: TestClient, user_id: str) -> None:
+    client.cookies.clear()
+    client.cookies.set(
+        "access_token",
+        create_access_token({"id": user_id, "perm": int(ALL_PERMISSIONS)}),
+    )
+
+
+def test_policy_table():
+    policies = PolicyTable(
+        {"edit": (Permission.USER_UPDATE, Permission.USER_UPDATE_OWN)}
+    )
+    own = int(Permission.USER_UPDATE_OWN)
+    assert policies.allows("edit", own, "me", "me")
+    assert not policies.allows("edit", own, "me", "other")
+    me = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+    assert policies.allows("edit", own, me, me.upper().replace("-", ""))
+    assert policies.allows("edit", int(Permission.USER_UPDATE), "me", "other")
+    assert not policies.allows("edit", 0, "me", "me")
+    assert role_permissions([]) == DEFAULT_PERMISSIONS
+    assert role_permissions(["admin", "gone"]) == ALL_PERMISSIONS
+
+
+def test_default_role_own_resources_only(client: TestClient):
+    other_id = register(client, OTHER)
+    owner_id = register(client, OWNER)
+    assert perm_claim(client) == DEFAULT_PERMISSIONS
+    assert client.post("/user", json=OTHER).status_code == 403
+    assert client.get(f"/user/{other_id}").status_code == 200
+    assert client.get("/user").status_code == 403
+    search = {"email": OTHER["email"]}
+    assert client.post("/user/user_by_field", json=search).status_code == 403
+    update = {"id": other_id, "username": "renamed"}
+    assert client.put(f"/user/{other_id}", json=update).status_code == 403
+    assert client.delete(f"/user/user/{other_id}").status_code == 403
+    assert client.post(f"/revoke/user/{other_id}").status_code == 403
+    update = {"id": owner_id, "username": "renamed"}
+    # the body's id is the updated user, whatever the path says
+    assert client.put(f"/user/{other_id}", json=update).status_code == 200
+    assert client.get(f"/roles/{owner_id}").status_code == 403
+    # one's own id matches however the uuid is spelled
+    assert client.post(f"/revoke/user/{owner_id.upper()}").status_code == 200
+
+
+def test_roles_apply_to_next_access_token(client: TestClient):
+    user_id = register(client, OWNER)
+    refresh_token = client.cookies["refresh_token"]
+    use_admin_token(client, user_id)
+    response = client.put(f"/roles/{user_id}", json={"roles": ["nobody"]})
+    assert response.status_code == 400
+    response = client.put(f"/roles/{user_id}", json={"roles": ["admin"]})
+    assert response.json() == {
+        "user_id": user_id,
+        "roles": ["admin"],
+        "permissions": int(ALL_PERMISSIONS),
+    }
+    assert client.get(f"/roles/{user_id}").json()["roles"] == ["admin"]
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token)
+    assert client.post("/auth/auth", json=AUTH_DATA).status_code == 200
+    assert perm_claim(client) == ALL_PERMISSIONS
+    client.cookies.clear()
+    assert client.post("/login", json=OWNER).status_code == 200
+    assert perm_claim(client) == ALL_PERMISSIONS
+    assert client.post("/user", json=OTHER).status_code == 200
@@ -0,0 +1,94 @@
+import cProfile
+
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.permissions import ALL_PERMISSIONS, DEFAULT_PERMISSIONS
+from src.profiling import ProfileStore, ProfilingMiddleware, profile_store
+from src.token_utils import create_access_token
+
+USER_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def token(permissions: int) -> str:
+    return create_access_token({"id": USER_ID, "perm": int(permissions)})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(profile_store, "directory", str(tmp_path))
+    return profile_store
+
+
+@pytest.fixture
+def profiled(store, override_db_dependency):
+    return TestClient(
+        ProfilingMiddleware(app, store), base_url="http://testserver/auth"
+    )
+
+
+def test_store_is_a_ring_buffer(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [store.new_id() for _ in range(3)]
+    for number, profile_id in enumerate(ids):
+        store.save(profile_id, cProfile.Profile(), {"number": number})
+    assert [info["id"] for info in store.list()] == [ids[2], ids[1]]
+    assert store.path(ids[0], ".prof") is None
+    assert store.path(ids[2], ".prof") is not None
+    assert store.path("../" + ids[2], ".prof") is None
+
+
+def test_header_needs_profiles_permission(profiled, store):
+    response = profiled.get(
+        "/.well-known/jwks.json",
+        headers={
+            "X-Profile": "1",
+            "Authorization": f"Bearer {token(DEFAULT_PERMISSIONS)}",
+        },
+    )
+    assert "x-profile-id" not in response.headers
+    response = profiled.get(
+        "/.well-known/jwks.json", headers={"X-Profile": "1"}
+    )
+    assert "x-profile-id" not in response.headers
+    assert store.list() == []
+
+
+def test_admin_profiles_and_downloads(profiled, store):
+    profiled.cookies.set("access_token", token(ALL_PERMISSIONS))
+    response = profiled.post(
+        "/register",
+        json={"email": "profiled@example.com", "password": "asdASD123!@#"},
+        headers={"X-Profile": "1"},
+    )
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    profiled.cookies.clear()
+    profiled.cookies.set("access_token", token(ALL_PERMISSIONS))
+
+    profiles = profiled.get("/profiles").json()
+    assert profiles[0]["id"] == profile_id
+    assert profiles[0]["path"] == "/auth/register"
+    assert profiles[0]["status"] == 200
+    download = profiled.get(f"/profiles/{profile_id}")
+    assert download.status_code == 200
+    assert download.headers["content-type"] == "application/octet-stream"
+    text = profiled.get(f"/profiles/{profile_id}", params={"format": "text"})
+    assert "cumulative" in text.text
+    assert profiled.get("/profiles/1-2-3").status_code == 404
+
+
+def test_sampled_routes(store, override_db_dependency):
+    client = TestClient(
+        ProfilingMiddleware(app, store, {"/.well-known/": 1.0}),
+        base_url="http://testserver/auth",
+        root_path="/auth",
+    )
+    assert "x-profile-id" in client.get("/.well-known/jwks.json").headers
+    assert "x-profile-id" not in client.get("/verify").headers
+    assert len(store.list()) == 1
+
+
+def test_profiles_need_permission(client):
+    client.cookies.set("access_token", token(DEFAULT_PERMISSIONS))
+    assert client.get("/profiles").status_code == 403
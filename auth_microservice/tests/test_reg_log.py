@@ -1,4 +1,10 @@
+import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import select
+from src.models.dynamic_db_models import UserDBType
+from src.password_utils import needs_rehash
+
+from .test_password_utils import legacy_hash
 
 TEST_USER = {
     "email": "test@example.com",
@@ -136,3 +142,36 @@ async def test_login_incorrect_user(
     rsp = response.json()
     assert isinstance(rsp, dict)
     assert "User not found" in rsp["detail"]
+
+
+async def test_login_incorrect_user_does_not_hash(
+    client: TestClient, override_db_dependency, monkeypatch: pytest.MonkeyPatch
+):
+    async def fail(*args):
+        raise AssertionError("password must not be hashed")
+
+    monkeypatch.setattr(
+        "src.views.credential_view.verify_and_update_async", fail
+    )
+    monkeypatch.setattr("src.views.credential_view.hash_password_async", fail)
+    response = client.post("/login", json=TEST_USER_NOT_EXISTS)
+    assert response.status_code == 404
+
+
+async def test_login_rehashes_legacy_password(
+    client: TestClient, override_db_dependency, async_session
+):
+    async with async_session.begin():
+        async_session.add(
+            UserDBType(
+                email=TEST_USER["email"],
+                password=legacy_hash(TEST_USER["password"]),
+            )
+        )
+    response = client.post("/login", json=TEST_USER)
+    assert response.status_code == 200
+    async_session.expire_all()
+    result = await async_session.execute(
+        select(UserDBType).where(UserDBType.email == TEST_USER["email"])
+    )
+    assert not needs_rehash(result.scalars().one().password)
@@ -0,0 +1,273 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from src.revocation import (
+    RevocationList,
+    RevocationListener,
+    revocation_list,
+    token_event,
+    user_event,
+)
+from src.views.refresh_view import RefreshView
+
+TEST_USER = {
+    "email": "test_revocation@example.com",
+    "password": "asdASD123!@#",
+}
+AUTH_DATA = {
+    "code_challenge": "LY1pMXesRIlfwCwAnsP2rzLlHrAHg8FwANcFHRZiuTo",
+    "code_challenge_method": "string",
+}
+USER_ID = "6f0b2a51-4f39-4c31-9a35-3b0b9c1d2e10"
+VERIFY_DATA = {"code_verifier": "front"}
+NOW = int(time.time())
+
+
+@pytest.fixture(autouse=True)
+def clear_revocation_list():
+    yield
+    revocation_list.tokens.clear()
+    revocation_list.users.clear()
+
+
+def login(client: TestClient) -> tuple[str, str]:
+    client.post("/register", json=TEST_USER)
+    access_token = client.cookies["access_token"]
+    refresh_token = client.cookies["refresh_token"]
+    assert client.get("/user/me").status_code == 200
+    return access_token, refresh_token
+
+
+def use_tokens(client: TestClient, access_token: str, refresh_token: str):
+    client.cookies.clear()
+    client.cookies.set("access_token", access_token)
+    client.cookies.set("refresh_token", refresh_token)
+
+
+def refresh(client: TestClient, refresh_token: str, data=VERIFY_DATA):
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token)
+    response = client.post("/auth/auth", json=data)
+    client.cookies.clear()
+    return response
+
+
+def test_revocation_list_token_and_user():
+    revocations = RevocationList()
+    revocations.revoke_token("jti", NOW + 60)
+    revocations.revoke_user("user", 2, NOW + 60)
+    assert revocations.token_epoch("user") == 2
+    assert revocations.token_epoch("other") == 0
+    assert revocations.is_revoked({"jti": "jti", "id": "other", "ep": 0})
+    assert revocations.is_revoked({"jti": "new", "id": "user", "ep": 1})
+    assert revocations.is_revoked({"jti": "new", "id": "user"})
+    assert not revocations.is_revoked({"jti": "new", "id": "user", "ep": 2})
+    assert not revocations.is_revoked({"jti": "new", "id": "other"})
+
+
+def test_revocation_list_purge():
+    revocations = RevocationList()
+    revocations.revoke_token("expired", NOW - 1)
+    revocations.revoke_token("live", NOW + 60)
+    revocations.revoke_user("user", 1, NOW - 1)
+    assert revocations.purge(NOW) == 2
+    assert revocations.stats() == {"tokens": 1, "users": 0}
+
+
+def test_listener_applies_notifications():
+    revocations = RevocationList()
+    listener = RevocationListener("", None, None, revocations)
+    listener.on_notification(None, 0, "", token_event("jti", NOW + 60))
+    listener.on_notification(None, 0, "", user_event("user", 2, NOW + 60))
+    listener.on_notification(None, 0, "", "broken")
+    revocations.merge({"other": NOW + 60}, {"user": (1, NOW + 60)})
+    assert revocations.tokens == {"jti": NOW + 60, "other": NOW + 60}
+    assert revocations.users == {"user": (2, NOW + 60)}
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_tokens(
+    client: TestClient, override_db_dependency
+):
+    access_token, refresh_token = login(client)
+    client.post("/logout")
+    use_tokens(client, access_token, refresh_token)
+    assert client.get("/user/me").status_code == 401
+    client.cookies.delete("access_token")
+    assert client.post("/auth/auth", json=AUTH_DATA).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revoke_token(client: TestClient, override_db_dependency):
+    access_token, refresh_token = login(client)
+    response = client.post("/revoke", json={"token": access_token})
+    assert response.status_code == 200
+    assert client.get("/user/me").status_code == 401
+    response = client.post("/revoke", json={"token": "not a token"})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_revoke_user(client: TestClient, override_db_dependency):
+    login(client)
+    user_id = client.get("/user/me").json()["id"]
+    other_id = "af926384-fa75-4da9-a5b2-1d81f2e1e5f8"
+    assert client.post(f"/revoke/user/{other_id}").status_code == 403
+    assert client.post(f"/revoke/user/{user_id}").status_code == 200
+    assert client.get("/user/me").status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_everywhere(client: TestClient, override_db_dependency):
+    first_session = login(client)
+    client.cookies.clear()
+    client.post("/login", json=TEST_USER)
+    assert client.post("/logout/all").status_code == 200
+    assert not client.cookies.get("access_token")
+    use_tokens(client, *first_session)
+    assert client.get("/user/me").status_code == 401
+    client.cookies.clear()
+    client.post("/login", json=TEST_USER)
+    assert client.get("/user/me").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_login_epoch_comes_from_user_row(
+    client: TestClient, override_db_dependency
+):
+    login(client)
+    assert client.post("/logout/all").status_code == 200
+    user_id, epoch = next(iter(revocation_list.users.items()))
+    # a worker that has not seen the bump yet
+    revocation_list.users.clear()
+    client.cookies.clear()
+    client.post("/login", json=TEST_USER)
+    for name in ("access_token", "refresh_token"):
+        claims = jwt.decode(
+            client.cookies[name], options={"verify_signature": False}
+        )
+        assert claims["ep"] == epoch[0] >= 1
+    # a worker in sync accepts the token
+    revocation_list.revoke_user(user_id, *epoch)
+    assert client.get("/user/me").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_change_password(client: TestClient, override_db_dependency):
+    old_session = login(client)
+    new_password = "qweQWE123!@#"
+    response = client.post(
+        "/password",
+        json={"old_password": "wrongWRONG1", "new_password": new_password},
+    )
+    assert response.status_code == 403
+    response = client.post(
+        "/password",
+        json={
+            "old_password": TEST_USER["password"],
+            "new_password": new_password,
+        },
+    )
+    assert response.status_code == 200
+    assert client.get("/user/me").status_code == 200
+    new_session = (
+        client.cookies["access_token"],
+        client.cookies["refresh_token"],
+    )
+    use_tokens(client, *old_session)
+    assert client.get("/user/me").status_code == 401
+    use_tokens(client, *new_session)
+    client.post("/logout")
+    assert client.post("/login", json=TEST_USER).status_code == 403
+    response = client.post(
+        "/login", json={**TEST_USER, "password": new_password}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotation(client: TestClient, override_db_dependency):
+    _, refresh_token = login(client)
+    response = refresh(client, refresh_token, AUTH_DATA)
+    assert response.status_code == 200
+    rotated_token = response.cookies["refresh_token"]
+    assert rotated_token != refresh_token
+    response = refresh(client, rotated_token)
+    assert response.status_code == 200
+    latest_token = response.cookies["refresh_token"]
+    # within the grace period the previous token gets the same next one
+    response = refresh(client, rotated_token)
+    assert response.status_code == 200
+    assert response.cookies["refresh_token"] == latest_token
+    assert refresh(client, refresh_token).status_code == 401
+    assert refresh(client, latest_token).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refresh(async_session_factory):
+    async with async_session_factory() as session:
+        refresh_token = await RefreshView.start_family(USER_ID, session)
+    calls = RefreshView.refresh_flight.calls
+    async with async_session_factory() as session:
+        results = await asyncio.gather(
+            *(RefreshView.rotate(refresh_token, session) for _ in range(5))
+        )
+    assert RefreshView.refresh_flight.calls == calls + 1
+    assert len({new_refresh_token for _, _, new_refresh_token in results}) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_refresh_still_rotates(
+    async_session_factory, monkeypatch: pytest.MonkeyPatch
+):
+    async with async_session_factory() as session:
+        refresh_token = await RefreshView.start_family(USER_ID, session)
+    crud = RefreshView.refresh_family_crud
+    rotate = crud.rotate
+    entered, release = asyncio.Event(), asyncio.Event()
+    used_sessions = []
+
+    async def slow_rotate(*args):
+        used_sessions.append(args[-1])
+        entered.set()
+        await release.wait()
+        return await rotate(*args)
+
+    monkeypatch.setattr(crud, "rotate", slow_rotate)
+    first_session = async_session_factory()
+    second_session = async_session_factory()
+    first = asyncio.create_task(
+        RefreshView.rotate(refresh_token, first_session)
+    )
+    await entered.wait()
+    second = asyncio.create_task(
+        RefreshView.rotate(refresh_token, second_session)
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    await first_session.close()
+    release.set()
+    _, _, new_refresh_token = await second
+    await second_session.close()
+    assert used_sessions[0] not in (first_session, second_session)
+    claims = jwt.decode(new_refresh_token, options={"verify_signature": False})
+    async with async_session_factory() as session:
+        current = await crud.read_current([claims["fam"]], NOW, session)
+    assert current == {claims["fam"]: claims["jti"]}
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_family(
+    client: TestClient, override_db_dependency
+):
+    _, refresh_token = login(client)
+    response = refresh(client, refresh_token, AUTH_DATA)
+    rotated_token = response.cookies["refresh_token"]
+    use_tokens(client, "", refresh_token)
+    client.post("/logout")
+    assert refresh(client, rotated_token).status_code == 401
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+from src import server_timing
+from src.main import app
+from src.server_timing import (
+    NO_PHASE,
+    ServerTimingMiddleware,
+    Timings,
+    phase,
+    phase_duration,
+    time_queries,
+)
+
+from .test_reg_log import TEST_USER
+
+
+@pytest.fixture
+def timed(monkeypatch):
+    monkeypatch.setattr(server_timing, "SERVER_TIMING", True)
+    time_queries()
+    yield
+    time_queries(enabled=False)
+
+
+def test_disabled_phase_is_shared_no_op():
+    timings = Timings()
+    token = server_timing.current_timings.set(timings)
+    try:
+        with phase("hash") as entered:
+            pass
+    finally:
+        server_timing.current_timings.reset(token)
+    assert phase("db") is NO_PHASE and entered is None
+    assert timings.phases == {}
+
+
+def test_header_sums_phases():
+    timings = Timings()
+    timings.add("db", 0.002)
+    timings.add("db", 0.001)
+    timings.add("hash", 0.2)
+    assert timings.header(0.25) == (
+        'db;dur=3.00;desc="2x", hash;dur=200.00;desc="1x", app;dur=250.00'
+    )
+
+
+def test_register_reports_phases(timed, override_db_dependency):
+    hashed = phase_duration.labels("hash").sample()[0]
+    client = TestClient(
+        ServerTimingMiddleware(app), base_url="http://testserver/auth"
+    )
+    response = client.post("/register", json=TEST_USER)
+    assert response.status_code == 200
+    phases = {
+        metric.split(";")[0]: metric
+        for metric in response.headers["server-timing"].split(", ")
+    }
+    assert {"hash", "db", "jwt_sign", "app"} <= set(phases)
+    assert sum(phase_duration.labels("hash").sample()[0]) > sum(hashed)
@@ -0,0 +1,157 @@
+import json
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from src import signing_keys, token_utils
+from src.signing_keys import (
+    RETIRED,
+    VERIFY,
+    KeyRing,
+    SigningKey,
+    jwk_thumbprint,
+)
+from src.token_codec import TokenCodec
+
+
+def private_pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+@pytest.mark.parametrize(
+    "algorithm, private_key",
+    [
+        ("RS256", rsa.generate_private_key(65537, 2048)),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+    ],
+)
+def test_asymmetric_key_verifies_with_published_jwk(algorithm, private_key):
+    key = SigningKey.from_pem(private_pem(private_key), algorithm)
+    token = jwt.encode(
+        {"id": "asdasd"},
+        key.signing_key,
+        algorithm=algorithm,
+        headers={"kid": key.kid},
+    )
+    public_jwk = key.public_jwk()
+    assert public_jwk is not None
+    assert public_jwk["kid"] == key.kid == jwk_thumbprint(public_jwk)
+    assert jwt.get_unverified_header(token)["kid"] == key.kid
+    public_key = jwt.PyJWK(public_jwk).key
+    payload = jwt.decode(token, public_key, algorithms=[algorithm])
+    assert payload == {"id": "asdasd"}
+
+
+def test_jwk_thumbprint_rfc7638_example():
+    jwk = {
+        "kty": "RSA",
+        "n": "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT8"
+        "6zwu1RK7aPFFxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5J"
+        "sGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY368QQMic"
+        "AtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-b"
+        "FTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPksINHaQ-G_xBniIqbw0Ls1jF44-csFCu"
+        "r-kEgU8awapJzKnqDKgw",
+        "e": "AQAB",
+        "alg": "RS256",
+    }
+    assert jwk_thumbprint(jwk) == "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs"
+
+
+def test_symmetric_key_is_not_published():
+    key = SigningKey.from_secret("secret", "HS256")
+    assert key.signing_key == key.verifying_key == b"secret"
+    assert key.public_jwk() is None
+
+
+def test_key_ring_rotation():
+    old_key = SigningKey.from_secret("old", "HS256")
+    key_ring = KeyRing("access", [old_key])
+    codec = TokenCodec(key_ring)
+    old_token = codec.encode({"id": "asdasd"})
+    new_key = SigningKey.from_secret("new", "HS256")
+    key_ring.set_keys(
+        [new_key, SigningKey.from_secret("old", "HS256", status=VERIFY)]
+    )
+    new_token = codec.encode({"id": "asdasd"})
+    assert jwt.get_unverified_header(new_token)["kid"] == new_key.kid
+    assert codec.decode(old_token) == {"id": "asdasd"}
+    assert codec.decode(new_token) == {"id": "asdasd"}
+    key_ring.set_keys(
+        [new_key, SigningKey.from_secret("old", "HS256", status=RETIRED)]
+    )
+    with pytest.raises(jwt.InvalidSignatureError):
+        codec.decode(old_token)
+
+
+def test_key_ring_needs_one_active_key():
+    with pytest.raises(ValueError):
+        KeyRing(
+            "access", [SigningKey.from_secret("old", "HS256", status=VERIFY)]
+        )
+
+
+def test_token_without_kid_uses_active_key():
+    key_ring = KeyRing("access", [SigningKey.from_secret("secret", "HS256")])
+    token = jwt.encode({"id": "asdasd"}, "secret", algorithm="HS256")
+    assert TokenCodec(key_ring).decode(token) == {"id": "asdasd"}
+
+
+def test_reload_from_manifest(tmp_path, monkeypatch):
+    (tmp_path / "refresh.key").write_text("refresh secret\n")
+    manifest = tmp_path / "keys.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "access": [{"algorithm": "HS256", "secret": "access secret"}],
+                "refresh": [{"algorithm": "HS256", "key_file": "refresh.key"}],
+            }
+        )
+    )
+    access_keys = signing_keys.access_key_ring.keys
+    refresh_keys = signing_keys.refresh_key_ring.keys
+    monkeypatch.setattr(signing_keys, "KEY_RING_FILE", str(manifest))
+    try:
+        token_utils.reload_signing_keys()
+        assert (
+            signing_keys.refresh_key_ring.active.signing_key
+            == b"refresh secret"
+        )
+        token = token_utils.create_access_token({"id": "asdasd"})
+        assert token_utils.verify_access_token(token)["id"] == "asdasd"
+        manifest.write_text("broken")
+        assert not signing_keys.reload_key_rings()
+        assert token_utils.verify_access_token(token)["id"] == "asdasd"
+    finally:
+        signing_keys.access_key_ring.set_keys(access_keys)
+        signing_keys.refresh_key_ring.set_keys(refresh_keys)
+
+
+def test_jwks(client):
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.json() == {"keys": []}
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+
+def test_authorization_server_metadata(client):
+    response = client.get("/.well-known/oauth-authorization-server")
+    assert response.status_code == 200
+    metadata = response.json()
+    assert (
+        metadata["jwks_uri"] == f"{metadata['issuer']}/.well-known/jwks.json"
+    )
+    assert metadata["code_challenge_methods_supported"] == ["S256"]
+    assert "token_endpoint" not in metadata
+    assert "grant_types_supported" not in metadata
+    cached = client.get(
+        "/.well-known/oauth-authorization-server",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
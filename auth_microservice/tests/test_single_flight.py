@@ -0,0 +1,89 @@
+import asyncio
+import inspect
+
+import pytest
+from client import single_flight as client_single_flight
+from fastapi import HTTPException
+from src.single_flight import SingleFlight
+
+
+async def test_single_flight_coalesces_concurrent_calls():
+    flight: SingleFlight[int] = SingleFlight("test")
+    release = asyncio.Event()
+    runs = []
+
+    async def call() -> int:
+        runs.append(1)
+        await release.wait()
+        return 1
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(3)]
+    other = asyncio.create_task(flight.do("other", call))
+    await asyncio.sleep(0)
+    assert flight.in_flight == 2
+    release.set()
+    assert await asyncio.gather(*callers) == [1, 1, 1]
+    assert await other == 1
+    assert len(runs) == 2
+    assert flight.stats() == {"in_flight": 0, "calls": 2, "coalesced": 2}
+    await flight.do("key", call)
+    assert len(runs) == 3
+
+
+async def test_single_flight_shares_exceptions():
+    flight: SingleFlight[int] = SingleFlight("test")
+
+    async def call() -> int:
+        await asyncio.sleep(0)
+        raise HTTPException(status_code=401)
+
+    callers = [asyncio.create_task(flight.do("key", call)) for _ in range(2)]
+    for caller in callers:
+        with pytest.raises(HTTPException):
+            await caller
+    assert flight.in_flight == 0
+
+
+async def test_single_flight_cancelled_follower():
+    flight: SingleFlight[int] = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def call() -> int:
+        await release.wait()
+        return 1
+
+    leader = asyncio.create_task(flight.do("key", call))
+    follower = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0)
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+    release.set()
+    assert await leader == 1
+
+
+async def test_single_flight_cancelled_leader():
+    flight: SingleFlight[int] = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def call() -> int:
+        await release.wait()
+        return 1
+
+    leader = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert flight.in_flight == 1
+    release.set()
+    assert await follower == 1
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 1}
+
+
+def test_client_copy_is_identical():
+    assert inspect.getsource(client_single_flight.SingleFlight) == (
+        inspect.getsource(SingleFlight)
+    )
@@ -0,0 +1,54 @@
+import time
+
+from src.token_cache import TokenCache, access_token_cache
+from src.token_utils import create_access_token, verify_access_token
+
+PAYLOAD = {"id": "asdasd", "exp": time.time() + 60}
+
+
+def test_token_cache_hit_and_miss():
+    cache = TokenCache(max_size=10)
+    assert cache.get("token") is None
+    cache.put("token", PAYLOAD)
+    assert cache.get("token") == PAYLOAD
+    assert cache.stats() == {"size": 1, "max_size": 10, "hits": 1, "misses": 1}
+
+
+def test_token_cache_expired_entry():
+    cache = TokenCache(max_size=10)
+    cache.put("token", {**PAYLOAD, "exp": time.time() - 1})
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2)
+    cache.put("first", PAYLOAD)
+    cache.put("second", PAYLOAD)
+    cache.get("first")
+    cache.put("third", PAYLOAD)
+    assert cache.get("second") is None
+    assert cache.get("first") == PAYLOAD
+    assert cache.get("third") == PAYLOAD
+
+
+def test_token_cache_discard():
+    cache = TokenCache(max_size=10)
+    cache.put("token", PAYLOAD)
+    cache.discard("token")
+    assert cache.get("token") is None
+
+
+def test_token_cache_disabled():
+    cache = TokenCache(max_size=0)
+    cache.put("token", PAYLOAD)
+    assert cache.get("token") is None
+
+
+def test_verify_access_token_uses_cache():
+    token = create_access_token({"id": "asdasd"})
+    hits = access_token_cache.hits
+    payload = verify_access_token(token)
+    assert payload is not None
+    assert verify_access_token(token) is payload
+    assert access_token_cache.hits == hits + 1
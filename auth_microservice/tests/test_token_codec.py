@@ -0,0 +1,86 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from src.signing_keys import KeyRing, SigningKey
+from src.token_codec import TokenCodec
+
+CLAIMS = {"id": "asdasd", "exp": int(time.time()) + 60}
+
+
+def pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def hs_codec(secret: str = "secret", algorithm: str = "HS256"):
+    key = SigningKey.from_secret(secret, algorithm)
+    return key, TokenCodec(KeyRing("access", [key]))
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS384", "HS512"])
+def test_hmac_tokens_are_byte_identical_to_pyjwt(algorithm):
+    key, codec = hs_codec(algorithm=algorithm)
+    expected = jwt.encode(
+        CLAIMS, key.signing_key, algorithm=algorithm, headers={"kid": key.kid}
+    )
+    assert codec.encode(CLAIMS) == expected
+    assert codec.decode(expected) == CLAIMS
+
+
+@pytest.mark.parametrize(
+    "algorithm, private_key",
+    [
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+    ],
+)
+def test_asymmetric_tokens_verify_with_pyjwt(algorithm, private_key):
+    key = SigningKey.from_pem(pem(private_key), algorithm)
+    codec = TokenCodec(KeyRing("access", [key]))
+    token = codec.encode(CLAIMS)
+    assert (
+        jwt.decode(token, key.verifying_key, algorithms=[algorithm]) == CLAIMS
+    )
+    pyjwt_token = jwt.encode(
+        CLAIMS, key.signing_key, algorithm=algorithm, headers={"kid": key.kid}
+    )
+    assert codec.decode(pyjwt_token) == CLAIMS
+
+
+def test_decode_rejects_expired_token():
+    _, codec = hs_codec()
+    token = codec.encode({**CLAIMS, "exp": int(time.time()) - 1})
+    with pytest.raises(jwt.ExpiredSignatureError):
+        codec.decode(token)
+
+
+def test_decode_rejects_wrong_signature():
+    _, codec = hs_codec()
+    _, other_codec = hs_codec("other")
+    with pytest.raises(jwt.InvalidSignatureError):
+        codec.decode(other_codec.encode(CLAIMS))
+    header, payload, signature = codec.encode(CLAIMS).split(".")
+    with pytest.raises(jwt.InvalidSignatureError):
+        codec.decode(f"{header}.{payload}x.{signature}")
+
+
+def test_decode_rejects_algorithm_confusion():
+    key, codec = hs_codec()
+    token = jwt.encode(
+        CLAIMS, key.signing_key, algorithm="HS512", headers={"kid": key.kid}
+    )
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        codec.decode(token)
+
+
+@pytest.mark.parametrize("token", ["", "abc", "a.b", "a.b.c"])
+def test_decode_rejects_malformed_token(token):
+    _, codec = hs_codec()
+    with pytest.raises(jwt.InvalidTokenError):
+        codec.decode(token)
@@ -1,5 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
+from src import token_utils
+from src.permissions import ALL_PERMISSIONS
 
 # Test data
 TEST_USER_FOR_TOKEN = {
@@ -25,8 +27,16 @@ def registrer_user(client: TestClient, override_db_dependency):
     assert client.cookies.get("refresh_token") is None
     client.post("/register", json=TEST_USER_FOR_TOKEN)
     assert client.cookies.get("refresh_token")
-    client.post("/login", json=TEST_USER_FOR_TOKEN)
+    response = client.post("/login", json=TEST_USER_FOR_TOKEN)
     assert client.cookies.get("access_token")
+    # managing other users takes an admin's permissions
+    refresh_token = client.cookies["refresh_token"]
+    access_token = token_utils.create_access_token(
+        {"id": response.json()["id"], "perm": int(ALL_PERMISSIONS)}
+    )
+    client.cookies.clear()
+    client.cookies.set("access_token", access_token)
+    client.cookies.set("refresh_token", refresh_token)
 
 
 @pytest.mark.asyncio
@@ -155,3 +165,43 @@ async def test_delete_user(client: TestClient, override_db_dependency):
     rsp = response.json()
     assert isinstance(rsp, dict)
     assert "User not found" in rsp["detail"]
+
+
+@pytest.mark.asyncio
+async def test_get_my_user_with_access_token_only(
+    client: TestClient, override_db_dependency
+):
+    registrer_user(client, override_db_dependency)
+    client.cookies.delete("refresh_token")
+    response = client.get("/user/me")
+    assert response.status_code == 200
+    assert response.json()["email"] == TEST_USER_FOR_TOKEN["email"]
+
+
+@pytest.mark.asyncio
+async def test_get_users_unauthorized(
+    client: TestClient, override_db_dependency
+):
+    response = client.get("/user")
+    assert response.status_code == 401
+    assert "You should be authorized" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_token_verified_once_per_request(
+    client: TestClient, override_db_dependency, monkeypatch
+):
+    registrer_user(client, override_db_dependency)
+    calls = []
+
+    def verify_access_token(token: str):
+        calls.append(token)
+        return token_utils.verify_access_token(token)
+
+    monkeypatch.setattr(
+        "src.dependencies.auth_dependency.verify_access_token",
+        verify_access_token,
+    )
+    response = client.get("/user/me")
+    assert response.status_code == 200
+    assert len(calls) == 1